@@ -0,0 +1,437 @@
+'''
+benchmarks Module
+
+This module times the hot paths of the game and its persistence layer, so
+changes can be checked against a stored baseline. It runs offline with the
+standard library only and stores its results as JSON.
+
+Benchmarks
+----------
+generate_lucky_list[<difficulty>]
+    drawing the list of a new round
+guess_sequence[<difficulty>]
+    a new round, then check_guess (and so shorten_list) on the smallest
+    wrong number until only the lucky number is left
+my_gamer
+    validating and constructing a MyGamer
+number_game_init[rows=<n>]
+    constructing a NumberGame on a stats file of n rows
+save_to_csv[rows=<n>]
+    appending one result to a stats file of n rows
+show_stats[rows=<n>], show_stats_player[rows=<n>]
+    printing the newest page of a stats file of n rows, for everyone and
+    for one of 100 players
+player_games[rows=<n>]
+    reading every game of one player
+append_batch[rows=<n>]
+    appending 1000 results at once
+sqlite_<benchmark>[rows=<n>]
+    the same on an SQLite database of n rows, for the benchmarks above
+    from number_game_init on
+sqlite_best_week[rows=<n>]
+    the 10 best games of the last week, of n played over a year
+import[number_game]
+    importing number_game in a fresh interpreter, as python -X importtime
+    reports it
+
+The stress command is separate: it saves from several processes into one
+stats file at once and reports the saves per second.
+
+Functions
+---------
+run_benchmarks(rows, min_time, repeat, match)
+    runs the benchmarks and returns their timings
+compare(baseline, results, threshold)
+    returns the benchmarks that got slower than the threshold allows
+import_times(module)
+    returns the import time of every module a fresh import loads
+stress_appends(path, processes, rows)
+    saves from several processes into one file at once
+
+Example usage
+-------------
+python benchmarks.py run --output base.json
+...
+python benchmarks.py run --output new.json
+python benchmarks.py compare base.json new.json --threshold 0.1
+python benchmarks.py stress --processes 1,2,4,8 --rows 5000
+
+Notes:
+Every benchmark is timed in repeat rounds of as many calls as fill
+min_time, and the fastest round counts: it is the one least disturbed by
+the rest of the machine. Stats files are generated in a temporary
+directory, the 10^7 row one takes about 300 MB and its database about
+twice that.
+
+'''
+
+import os
+import io
+import sys
+import json
+import time
+import fnmatch
+import platform
+import argparse
+import tempfile
+import subprocess
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from gamer_module import MyGamer
+from number_game import NumberGame
+from results_store import CsvResultStore, FIELDNAMES
+from sqlite_store import SqliteResultStore, WEEK
+from difficulty import PROFILES
+
+ROWS = (10**3, 10**4, 10**5, 10**6, 10**7)
+PLAYER = 'Tyra Forsgren'
+IMPORTED = ('number_game',)
+ROW_BENCHMARKS = ('number_game_init', 'show_stats', 'show_stats_player',
+                  'save_to_csv', 'player_games', 'append_batch')
+BATCH = [{'name': PLAYER, 'birthday': '20030717', 'age': 20,
+          'lucky_number': nr, 'total_tries': nr % 9 + 1}
+         for nr in range(1000)]
+
+
+def _stats_file(directory: str, rows: int) -> str:
+    """Writes a stats file of rows results by 100 players, one PLAYER."""
+    path = os.path.join(directory, f'stats_{rows}.csv')
+    names = [PLAYER] + [f'Player {chr(65 + nr // 26)}{chr(97 + nr % 26)}'
+                        for nr in range(99)]
+    block = ''.join(f'{name},20030717,20,{nr},{nr % 9 + 1}\n'
+                    for nr, name in enumerate(names))
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(','.join(FIELDNAMES) + '\n')
+        for _ in range(rows // len(names)):
+            file.write(block)
+        file.write(''.join(block.splitlines(True)[:rows % len(names)]))
+    return path
+
+
+def _sqlite_file(directory: str, rows: int, stats_path: str) -> str:
+    """Copies a stats file into a database, its games spread over a
+    year."""
+    path = os.path.join(directory, f'stats_{rows}.db')
+    store = SqliteResultStore(path, fsync='never')
+    now, batch = time.time(), []
+    for nr, record in enumerate(CsvResultStore(stats_path).iter_records()):
+        record['played_at'] = now - nr % 365 * 24 * 3600
+        batch.append(record)
+        if len(batch) == 1 << 16:
+            store.append_many(batch)
+            batch = []
+    store.append_many(batch)
+    store.close()
+    return path
+
+
+def _row_cases(prefix: str, gamer: MyGamer, make_store, count: int):
+    """Yields the benchmarks of a store of count rows."""
+    store = make_store()
+    game = NumberGame(gamer, store, rng=0)
+    yield (f'{prefix}number_game_init[rows={count}]',
+           lambda: NumberGame(gamer, make_store()))
+    yield f'{prefix}show_stats[rows={count}]', game.show_stats
+    yield (f'{prefix}show_stats_player[rows={count}]',
+           lambda: game.show_stats(player=PLAYER))
+    yield f'{prefix}save_to_csv[rows={count}]', game.save_to_csv
+    if prefix:
+        yield (f'{prefix}player_games[rows={count}]',
+               lambda: store.player_records(PLAYER, '20030717'))
+        yield (f'{prefix}best_week[rows={count}]',
+               lambda: store.best_scores(time.time() - WEEK))
+    else:
+        yield (f'{prefix}player_games[rows={count}]',
+               lambda: [record for record in store.iter_records()
+                        if record['name'] == PLAYER and
+                        record['birthday'] == '20030717'])
+    yield (f'{prefix}append_batch[rows={count}]',
+           lambda: store.append_many(BATCH))
+    store.close()
+
+
+def _guess_sequence(game: NumberGame):
+    """Returns a function playing one round of game to the end."""
+    def play() -> None:
+        game.new_round()
+        while True:
+            game.tries += 1
+            guess = game.lucky_list.select(0)
+            if guess == game.lucky_nr and len(game.lucky_list) > 1:
+                guess = game.lucky_list.select(1)
+            if game.check_guess(guess):
+                return
+    return play
+
+
+def _cases(directory: str, rows: tuple, match: str):
+    """Yields (name, function) for every benchmark matching match."""
+    gamer = MyGamer(PLAYER, '20030717')
+    scratch = CsvResultStore(os.path.join(directory, 'scratch.csv'))
+    for difficulty in PROFILES:
+        game = NumberGame(gamer, scratch, difficulty, rng=0)
+        yield f'generate_lucky_list[{difficulty}]', game.generate_lucky_list
+        yield f'guess_sequence[{difficulty}]', _guess_sequence(game)
+    yield 'my_gamer', lambda: MyGamer(PLAYER, '20030717')
+
+    for count in rows:
+        # Spare writing stats files nobody reads.
+        csv_wanted, sqlite_wanted = (
+            any(fnmatch.fnmatchcase(f'{prefix}{name}[rows={count}]', match)
+                for name in ROW_BENCHMARKS + ('best_week',))
+            for prefix in ('', 'sqlite_'))
+        if not csv_wanted and not sqlite_wanted:
+            continue
+        path = _stats_file(directory, count)
+        if csv_wanted:
+            yield from _row_cases('', gamer,
+                                  lambda: CsvResultStore(path), count)
+        if sqlite_wanted:
+            db_path = _sqlite_file(directory, count, path)
+            yield from _row_cases('sqlite_', gamer,
+                                  lambda: SqliteResultStore(db_path), count)
+
+
+def import_times(module: str) -> dict:
+    """Returns the import time of every module a fresh import loads.
+
+    Parameters
+    ----------
+    module : str
+        Module to import, from the directory of this file.
+
+    Returns
+    -------
+    dict
+        Module name -> seconds its import took, submodules included.
+
+    """
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True,
+        text=True, check=True)
+    times = {}
+    for line in process.stderr.splitlines():
+        # import time: <self us> | <cumulative us> | <indented name>
+        fields = line.split('|')
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            times[fields[2].strip()] = int(fields[1]) / 1e6
+    return times
+
+
+def _append_rows(task: tuple) -> None:
+    """Saves rows results from one process, one append at a time.
+
+    Takes a single tuple so it can be sent to a process pool.
+    """
+    path, worker, rows = task
+    store = CsvResultStore(path)
+    for nr in range(rows):
+        store.append({'name': f'Worker {worker}', 'birthday': '20030717',
+                      'age': 20, 'lucky_number': nr, 'total_tries': 1})
+    store.close()
+
+
+def stress_appends(path: str, processes: int, rows: int) -> float:
+    """Saves from several processes into one file at once.
+
+    Parameters
+    ----------
+    path : str
+        Stats file every process appends to.
+    processes : int
+        Number of processes.
+    rows : int
+        Results each process saves.
+
+    Returns
+    -------
+    float
+        Results saved per second, over all processes.
+
+    """
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        list(pool.map(_append_rows, [(path, worker, rows)
+                                     for worker in range(processes)]))
+    return processes * rows / (time.perf_counter() - started)
+
+
+def _time(function, min_time: float, repeat: int) -> dict:
+    """Times function and returns per call seconds and the calls made."""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed * 4 >= min_time else 10
+    timings = [elapsed / number]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - started) / number)
+    timings.sort()
+    return {'min': timings[0], 'median': timings[len(timings) // 2],
+            'number': number, 'repeat': repeat}
+
+
+def run_benchmarks(rows: tuple = ROWS, min_time: float = 0.2,
+                   repeat: int = 5, match: str = '*') -> dict:
+    """Runs the benchmarks and returns their timings.
+
+    Parameters
+    ----------
+    rows : tuple
+        Sizes of the stats files to benchmark.
+    min_time : float
+        Seconds every round of calls should at least take.
+    repeat : int
+        Rounds per benchmark.
+    match : str
+        Only run benchmarks whose name matches this shell pattern.
+
+    Returns
+    -------
+    dict
+        'machine' describing where it ran and 'results' mapping every
+        benchmark name to its 'min' and 'median' seconds per call.
+
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory, \
+            open(os.devnull, 'w', encoding='utf-8') as devnull:
+        for name, function in _cases(directory, rows, match):
+            if fnmatch.fnmatchcase(name, match):
+                with contextlib.redirect_stdout(devnull):
+                    results[name] = _time(function, min_time, repeat)
+    for module in IMPORTED:
+        if fnmatch.fnmatchcase(f'import[{module}]', match):
+            timings = sorted(import_times(module)[module]
+                             for _ in range(repeat))
+            results[f'import[{module}]'] = {
+                'min': timings[0], 'median': timings[len(timings) // 2],
+                'number': 1, 'repeat': repeat}
+    return {
+        'machine': {'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'date': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'results': results,
+    }
+
+
+def compare(baseline: dict, results: dict, threshold: float = 0.1) -> list:
+    """Returns the benchmarks that got slower than the threshold allows.
+
+    Parameters
+    ----------
+    baseline, results : dict
+        Output of run_benchmarks, before and after a change.
+    threshold : float
+        Allowed slowdown, 0.1 lets a benchmark get 10 % slower.
+
+    Returns
+    -------
+    list
+        (name, baseline seconds, new seconds) of every regression, compared
+        on the fastest round.
+
+    """
+    regressions = []
+    for name, new in results['results'].items():
+        old = baseline['results'].get(name)
+        if old is not None and new['min'] > old['min'] * (1 + threshold):
+            regressions.append((name, old['min'], new['min']))
+    return regressions
+
+
+def _format_table(baseline: dict, results: dict) -> str:
+    """Returns the timings side by side, baseline first."""
+    lines = io.StringIO()
+    lines.write(f"{'benchmark':<36}{'baseline':>12}{'new':>12}{'ratio':>8}\n")
+    for name, new in results['results'].items():
+        old = baseline['results'].get(name)
+        old_text = f"{old['min'] * 1e6:10.1f}us" if old else f"{'-':>12}"
+        ratio = f"{new['min'] / old['min']:8.2f}" if old else f"{'-':>8}"
+        lines.write(f"{name:<36}{old_text}{new['min'] * 1e6:10.1f}us"
+                    f"{ratio}\n")
+    return lines.getvalue()
+
+
+def main(argv=None) -> int:
+    """Runs or compares benchmarks from the command line.
+
+    Parameters
+    ----------
+    argv : list, optional
+        Command line arguments, sys.argv[1:] when left out.
+
+    Returns
+    -------
+    int
+        0 on success, 1 if compare finds a regression or stress loses
+        rows.
+
+    """
+    parser = argparse.ArgumentParser(description='Number game benchmarks.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run')
+    run.add_argument('--output')
+    run.add_argument('--rows', default=','.join(map(str, ROWS)),
+                     help='comma separated stats file sizes')
+    run.add_argument('--min-time', type=float, default=0.2)
+    run.add_argument('--repeat', type=int, default=5)
+    run.add_argument('--match', default='*')
+    check = commands.add_parser('compare')
+    check.add_argument('baseline')
+    check.add_argument('results')
+    check.add_argument('--threshold', type=float, default=0.1)
+    stress = commands.add_parser('stress')
+    stress.add_argument('--processes', default='1,2,4,8',
+                        help='comma separated process counts')
+    stress.add_argument('--rows', type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    if args.command == 'stress':
+        lost = False
+        for processes in map(int, args.processes.split(',')):
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'stress.csv')
+                rate = stress_appends(path, processes, args.rows)
+                store = CsvResultStore(path)
+                saved = sum(1 for _ in store.iter_records())
+                store.close()
+            lost |= saved != processes * args.rows
+            print(f'{processes:>3} processes {rate:12,.0f} saves/s '
+                  f'{saved}/{processes * args.rows} rows')
+        return 1 if lost else 0
+
+    if args.command == 'run':
+        rows = tuple(int(float(count)) for count in args.rows.split(',')
+                     if count)
+        results = run_benchmarks(rows, args.min_time, args.repeat,
+                                 args.match)
+        for name, timing in results['results'].items():
+            print(f"{name:<36}{timing['min'] * 1e6:10.1f}us")
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as file:
+                json.dump(results, file, indent=2)
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as file:
+        baseline = json.load(file)
+    with open(args.results, encoding='utf-8') as file:
+        results = json.load(file)
+    print(_format_table(baseline, results), end='')
+    regressions = compare(baseline, results, args.threshold)
+    for name, old, new in regressions:
+        print(f'Regression: {name} {old * 1e6:.1f}us -> {new * 1e6:.1f}us',
+              file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,368 @@
+'''
+binary_store Module
+
+This module holds a compact binary backend for game results. Every result
+is one fixed-width record of a NumPy structured dtype, so the history can be
+memory-mapped and any page of it read without parsing the rest. Player names
+are interned: each distinct name is stored once in a side table next to the
+record file and records only hold its id.
+
+Files
+-----
+<path>
+    A short header followed by the records, oldest first.
+<path>.names
+    One name per line, the line number is the name id.
+
+Classes
+-------
+BinaryResultStore
+    append-only binary backend that can page through its history
+
+Functions
+---------
+convert_csv(csv_path, bin_path)
+    copies a CSV save file into a binary one
+
+Example usage
+-------------
+convert_csv('docs/game_save.csv', 'docs/game_save.bin')
+store = BinaryResultStore('docs/game_save.bin')
+game = NumberGame(gamer, store)
+
+From the command line:
+python binary_store.py docs/game_save.csv docs/game_save.bin
+
+Notes:
+A store assumes it is the only writer of its files.
+
+'''
+
+import os
+import csv
+import sys
+import numpy as np
+from results_store import ResultsStore, FIELDNAMES, FSYNC_POLICIES
+
+HEADER = b'NGSAVE1\n'
+RECORD_DTYPE = np.dtype([
+    ('name_id', '<u4'),
+    ('birthday', '<u4'),
+    ('age', '<u2'),
+    ('lucky_number', '<i8'),
+    ('total_tries', '<u4'),
+])
+# Records scanned at a time when filtering by player.
+SCAN_BLOCK = 1 << 16
+
+
+class BinaryResultStore(ResultsStore):
+    """
+    BinaryResultStore keeps game results as fixed-width binary records.
+
+    Attributes
+    ----------
+    path : str
+        Path to the record file.
+    fsync : str
+        When to fsync, as in CsvResultStore.
+    names : list
+        Interned player names, indexed by name id.
+
+    Methods
+    -------
+    append(record):
+        Appends one result.
+    append_many(records):
+        Appends several results with a single write.
+    records():
+        Returns every record as a read-only memory-mapped array.
+    read_page(page, page_size, player):
+        Returns one page of results, newest first.
+    iter_records():
+        Yields every result, oldest first.
+    flush():
+        Flushes the files, fsyncing unless the policy is 'never'.
+    close():
+        Flushes and closes the files.
+
+    """
+
+    def __init__(self, path: str, fsync: str = 'never') -> None:
+        """Initializes the BinaryResultStore instance.
+
+        Parameters
+        ----------
+        path : str
+            Path to the record file. Created if missing.
+        fsync : str
+            One of FSYNC_POLICIES.
+
+        Raises
+        ------
+        ValueError
+            If the fsync policy is unknown or the file is not a record file.
+
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Invalid fsync policy: {fsync}")
+        self.path = path
+        self.fsync = fsync
+        self.names = []
+        self._name_ids = {}
+        if os.path.exists(self.names_path):
+            with open(self.names_path, encoding='utf-8') as file:
+                for name in file.read().splitlines():
+                    self._name_ids[name] = len(self.names)
+                    self.names.append(name)
+        with open(path, 'ab+') as file:
+            file.seek(0)
+            header = file.read(len(HEADER))
+            if not header:
+                file.write(HEADER)
+            elif header != HEADER:
+                raise ValueError(f"Not a game record file: {path}")
+        self._file = None
+        self._names_file = None
+
+    @property
+    def names_path(self) -> str:
+        """Path to the name table."""
+        return self.path + '.names'
+
+    def _name_id(self, name: str) -> int:
+        """Returns the id of a name, adding it to the table if it is new."""
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            if self._names_file is None:
+                self._names_file = open(self.names_path, 'a',
+                                        encoding='utf-8')
+            self._names_file.write(name + '\n')
+            name_id = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def append(self, record: dict) -> int:
+        """Appends one result.
+
+        Parameters
+        ----------
+        record : dict
+            Game result keyed by FIELDNAMES.
+
+        Returns
+        -------
+        int
+            Number of bytes written.
+
+        """
+        return self.append_many([record])
+
+    def append_many(self, records: list) -> int:
+        """Appends several results with a single write.
+
+        New names are written to the name table before the records that
+        use them.
+
+        Parameters
+        ----------
+        records : list
+            Game results keyed by FIELDNAMES.
+
+        Returns
+        -------
+        int
+            Number of bytes written to the record file.
+
+        """
+        rows = np.array([
+            (self._name_id(record['name']), int(record['birthday']),
+             int(float(record['age'])), int(float(record['lucky_number'])),
+             int(float(record['total_tries'])))
+            for record in records], dtype=RECORD_DTYPE)
+        if self._names_file is not None:
+            self._sync(self._names_file, self.fsync == 'always')
+        if self._file is None:
+            self._file = open(self.path, 'ab')
+        data = rows.tobytes()
+        self._file.write(data)
+        self._sync(self._file, self.fsync == 'always')
+        return len(data)
+
+    def records(self) -> np.ndarray:
+        """Returns every record as a read-only memory-mapped array.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        numpy.ndarray
+            Records oldest first, with RECORD_DTYPE. Nothing is read until
+            the array is indexed.
+
+        """
+        if self._file is not None:
+            self._file.flush()
+        count = (os.path.getsize(self.path) - len(HEADER)) \
+            // RECORD_DTYPE.itemsize
+        if count == 0:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return np.memmap(self.path, dtype=RECORD_DTYPE, mode='r',
+                         offset=len(HEADER), shape=(count,))
+
+    def read_page(self, page: int = 0, page_size: int = 20,
+                  player: str = None) -> list:
+        """Returns one page of results, newest first.
+
+        Only the records of the page are read. With a player, the file is
+        scanned backwards in blocks of SCAN_BLOCK records until the page is
+        filled.
+
+        Parameters
+        ----------
+        page : int
+            Page number, 0 is the newest results.
+        page_size : int
+            Results per page.
+        player : str, optional
+            Only return results of the player with this name.
+
+        Returns
+        -------
+        list
+            Game results keyed by FIELDNAMES.
+
+        """
+        records = self.records()
+        skip = page * page_size
+        if player is None:
+            end = max(records.size - skip, 0)
+            rows = records[max(end - page_size, 0):end][::-1]
+            return [self._to_dict(row) for row in rows]
+
+        name_id = self._name_ids.get(player)
+        found = []
+        end = records.size
+        while name_id is not None and end > 0 and \
+                len(found) < skip + page_size:
+            block = records[max(end - SCAN_BLOCK, 0):end]
+            matches = block[block['name_id'] == name_id][::-1]
+            found.extend(matches[:skip + page_size - len(found)])
+            end -= block.size
+        return [self._to_dict(row) for row in found[skip:]]
+
+    def iter_records(self):
+        """Yields every result, oldest first.
+
+        Records are read SCAN_BLOCK at a time.
+
+        Parameters
+        ----------
+        None
+
+        Yields
+        ------
+        dict
+            Game result keyed by FIELDNAMES.
+
+        """
+        records = self.records()
+        for start in range(0, records.size, SCAN_BLOCK):
+            for row in records[start:start + SCAN_BLOCK]:
+                yield self._to_dict(row)
+
+    def _to_dict(self, row) -> dict:
+        """Turns a record back into a result keyed by FIELDNAMES."""
+        return {
+            'name': self.names[row['name_id']],
+            'birthday': f"{int(row['birthday']):08d}",
+            'age': int(row['age']),
+            'lucky_number': int(row['lucky_number']),
+            'total_tries': int(row['total_tries']),
+        }
+
+    def _sync(self, file, fsync: bool) -> None:
+        """Flushes a file and fsyncs it if asked to."""
+        file.flush()
+        if fsync:
+            os.fsync(file.fileno())
+
+    def flush(self) -> None:
+        """Flushes the files, fsyncing unless the policy is 'never'.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+
+        """
+        for file in (self._names_file, self._file):
+            if file is not None:
+                self._sync(file, self.fsync != 'never')
+
+    def close(self) -> None:
+        """Flushes and closes the files.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+
+        """
+        self.flush()
+        for file in (self._names_file, self._file):
+            if file is not None:
+                file.close()
+        self._names_file = self._file = None
+
+
+def convert_csv(csv_path: str, bin_path: str,
+                batch_size: int = 1 << 16) -> int:
+    """Copies a CSV save file into a binary one.
+
+    The CSV is streamed, so memory use depends on batch_size only.
+
+    Parameters
+    ----------
+    csv_path : str
+        Path to the CSV save file.
+    bin_path : str
+        Path to the binary record file, appended to if it exists.
+    batch_size : int
+        Results written at a time.
+
+    Returns
+    -------
+    int
+        Number of results converted.
+
+    """
+    store = BinaryResultStore(bin_path)
+    count = 0
+    with open(csv_path, newline='', encoding='utf-8') as file:
+        batch = []
+        for row in csv.DictReader(file):
+            batch.append({field: row[field] for field in FIELDNAMES})
+            if len(batch) >= batch_size:
+                count += len(batch)
+                store.append_many(batch)
+                batch = []
+        if batch:
+            count += len(batch)
+            store.append_many(batch)
+    store.close()
+    return count
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit('usage: python binary_store.py <csv_path> <bin_path>')
+    print(f'{convert_csv(sys.argv[1], sys.argv[2])} results converted.')
@@ -0,0 +1,329 @@
+'''
+candidate_set Module
+
+This module holds the set of numbers a player can still guess, stored as a
+bitset. Membership and removal cost O(1), the size is kept from popcounts
+and iterating gives the numbers in order, so a guess neither scans nor
+allocates a list however large the range is.
+
+Every number the set can hold has a slot, one bit of an array of 64-bit
+words. When the range is small next to the list (at most 64 numbers of
+range per number of the list) the slot is the number's offset into the
+range. Otherwise the slots index a sorted array of the starting numbers, and
+finding a slot is a binary search instead, so a list of 500 numbers out of
+10^9 does not need a bitset of 10^9 bits.
+
+Classes
+-------
+CandidateSet
+    the numbers that can still be guessed
+
+Example usage
+-------------
+candidates = CandidateSet([3, 17, 42, 99], low=0, high=100)
+candidates.remove(17)
+candidates.keep_range(10, 50)
+print(list(candidates), len(candidates))
+
+'''
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+class CandidateSet():
+    """
+    CandidateSet holds the numbers that can still be guessed as a bitset.
+
+    Attributes
+    ----------
+    low : int
+        Smallest number of the range.
+    high : int
+        Largest number of the range.
+
+    Methods
+    -------
+    remove(number):
+        Removes a number, KeyError if it is not in the set.
+    discard(number):
+        Removes a number if it is in the set.
+    keep_range(start, stop):
+        Removes every number outside start..stop.
+    rank(number):
+        Returns how many numbers of the set are smaller than number.
+    select(rank):
+        Returns the number with that rank.
+    pop_rank(rank):
+        Removes and returns the number with that rank.
+
+    """
+    __slots__ = ('low', 'high', '_universe', '_words', '_count', '_first',
+                 '_last')
+
+    def __init__(self, numbers, low: int, high: int,
+                 typecode: str = 'q') -> None:
+        """Initializes the CandidateSet instance.
+
+        Parameters
+        ----------
+        numbers : iterable
+            The numbers in the set, all within low..high.
+        low, high : int
+            Inclusive range of the numbers.
+        typecode : str
+            Array typecode able to hold every number of the range, used for
+            the sorted numbers of a sparse set.
+
+        Raises
+        ------
+        ValueError
+            If a number is outside low..high.
+
+        """
+        numbers = sorted(set(numbers))
+        if numbers and (numbers[0] < low or numbers[-1] > high):
+            raise ValueError(f"Numbers outside the range {low}-{high}.")
+        self.low = low
+        self.high = high
+        if high - low + 1 <= 64 * max(len(numbers), 1):
+            self._universe = None
+            slots = [number - low for number in numbers]
+            size = high - low + 1
+        else:
+            self._universe = array(typecode, numbers)
+            slots = range(len(numbers))
+            size = len(numbers)
+        self._words = words = array('Q', bytes(8 * ((size + 63) >> 6)))
+        for slot in slots:
+            words[slot >> 6] |= 1 << (slot & 63)
+        self._count = len(numbers)
+        # Words outside _first.._last - 1 are all zero.
+        self._first = slots[0] >> 6 if numbers else 0
+        self._last = (slots[-1] >> 6) + 1 if numbers else 0
+
+    def _slot(self, number: int) -> int:
+        """Returns the slot of a number, or -1 if it cannot be in the set."""
+        if self._universe is None:
+            return number - self.low if self.low <= number <= self.high \
+                else -1
+        index = bisect_left(self._universe, number)
+        if index < len(self._universe) and self._universe[index] == number:
+            return index
+        return -1
+
+    def _number(self, slot: int) -> int:
+        """Returns the number of a slot."""
+        if self._universe is None:
+            return self.low + slot
+        return self._universe[slot]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, number) -> bool:
+        slot = self._slot(number)
+        return slot >= 0 and bool(self._words[slot >> 6] >> (slot & 63) & 1)
+
+    def __iter__(self):
+        words = self._words
+        for index in range(self._first, self._last):
+            word = words[index]
+            while word:
+                lowest = word & -word
+                yield self._number((index << 6) | (lowest.bit_length() - 1))
+                word ^= lowest
+
+    def __repr__(self) -> str:
+        return f'CandidateSet({list(self)}, {self.low}, {self.high})'
+
+    def remove(self, number: int) -> None:
+        """Removes a number.
+
+        Parameters
+        ----------
+        number : int
+            The number to remove.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        KeyError
+            If the number is not in the set.
+
+        """
+        if not self.discard(number):
+            raise KeyError(number)
+
+    def discard(self, number: int) -> bool:
+        """Removes a number if it is in the set.
+
+        Parameters
+        ----------
+        number : int
+            The number to remove.
+
+        Returns
+        -------
+        bool
+            Whether the number was in the set.
+
+        """
+        slot = self._slot(number)
+        if slot < 0:
+            return False
+        index, bit = slot >> 6, 1 << (slot & 63)
+        word = self._words[index]
+        if not word & bit:
+            return False
+        self._words[index] = word ^ bit
+        self._count -= 1
+        if word == bit:
+            self._shrink_span()
+        return True
+
+    def keep_range(self, start: int, stop: int) -> None:
+        """Removes every number outside start..stop.
+
+        Only the words of the kept range are counted again.
+
+        Parameters
+        ----------
+        start, stop : int
+            Inclusive range of the numbers to keep.
+
+        Returns
+        -------
+        None
+
+        """
+        if self._universe is None:
+            first = max(start - self.low, 0)
+            last = min(stop - self.low, self.high - self.low)
+        else:
+            first = bisect_left(self._universe, start)
+            last = bisect_right(self._universe, stop) - 1
+        words = self._words
+        if first > last or (last >> 6) < self._first or \
+                first >> 6 >= self._last:
+            # Nothing of the live span is kept.
+            words[self._first:self._last] = array(
+                'Q', bytes(8 * max(self._last - self._first, 0)))
+            self._count = self._first = self._last = 0
+            return
+        for index in range(self._first, first >> 6):
+            words[index] = 0
+        for index in range((last >> 6) + 1, self._last):
+            words[index] = 0
+        words[first >> 6] &= ~((1 << (first & 63)) - 1) & (2 ** 64 - 1)
+        words[last >> 6] &= (2 << (last & 63)) - 1
+        self._first = max(self._first, first >> 6)
+        self._last = min(self._last, (last >> 6) + 1)
+        self._count = sum(word.bit_count()
+                          for word in words[self._first:self._last])
+        self._shrink_span()
+
+    def rank(self, number: int) -> int:
+        """Returns how many numbers of the set are smaller than number.
+
+        Parameters
+        ----------
+        number : int
+            Any number.
+
+        Returns
+        -------
+        int
+            The rank of the number.
+
+        """
+        if self._universe is None:
+            slot = min(max(number - self.low, 0), self.high - self.low + 1)
+        else:
+            slot = bisect_left(self._universe, number)
+        words = self._words
+        index = min(slot >> 6, self._last)
+        below = 0
+        for word_index in range(self._first, index):
+            below += words[word_index].bit_count()
+        if index < self._last:
+            below += (self._words[index] & ((1 << (slot & 63)) - 1)) \
+                .bit_count()
+        return below
+
+    def select(self, rank: int) -> int:
+        """Returns the number with that rank, 0 being the smallest.
+
+        Only the words between the smallest and largest number are scanned.
+
+        Parameters
+        ----------
+        rank : int
+            Rank of the number, below len(self).
+
+        Returns
+        -------
+        int
+            The number.
+
+        Raises
+        ------
+        IndexError
+            If the rank is out of range.
+
+        """
+        index, bit = self._locate(rank)
+        return self._number((index << 6) | (bit.bit_length() - 1))
+
+    def pop_rank(self, rank: int) -> int:
+        """Removes and returns the number with that rank.
+
+        Parameters
+        ----------
+        rank : int
+            Rank of the number, below len(self).
+
+        Returns
+        -------
+        int
+            The removed number.
+
+        Raises
+        ------
+        IndexError
+            If the rank is out of range.
+
+        """
+        index, bit = self._locate(rank)
+        word = self._words[index]
+        self._words[index] = word ^ bit
+        self._count -= 1
+        if word == bit:
+            self._shrink_span()
+        return self._number((index << 6) | (bit.bit_length() - 1))
+
+    def _locate(self, rank: int) -> tuple:
+        """Returns the word index and bit of the number with that rank."""
+        if not 0 <= rank < self._count:
+            raise IndexError(f"Rank out of range: {rank}")
+        words = self._words
+        for index in range(self._first, self._last):
+            word = words[index]
+            count = word.bit_count()
+            if rank < count:
+                for _ in range(rank):
+                    word &= word - 1
+                return index, word & -word
+            rank -= count
+        raise IndexError(f"Rank out of range: {rank}")
+
+    def _shrink_span(self) -> None:
+        """Moves _first and _last past words that became zero."""
+        words = self._words
+        while self._first < self._last and not words[self._first]:
+            self._first += 1
+        while self._last > self._first and not words[self._last - 1]:
+            self._last -= 1
@@ -0,0 +1,173 @@
+'''
+difficulty Module
+
+This module holds the difficulty profiles of the number game. A profile
+decides the range numbers are drawn from, how long the list is, how close to
+the lucky number a number must be to survive the first miss and how many
+numbers are dropped on every later miss.
+
+The drops of every miss are worked out once, when the profile is created,
+into a shrink schedule. During a game a miss only looks up its entry.
+
+Classes
+-------
+DifficultyProfile
+    holds the settings of one difficulty
+
+Functions
+---------
+shrink_schedule(list_size, drops)
+    expands drops into the number of drops for every possible miss
+get_profile(difficulty)
+    returns a profile by name
+
+Example usage
+-------------
+profile = get_profile('hard')
+game = NumberGame(gamer, difficulty=profile)
+
+'''
+
+from array import array
+
+
+class DifficultyProfile():
+    """
+    DifficultyProfile holds the settings of one difficulty.
+
+    Attributes
+    ----------
+    name : str
+        Name of the difficulty.
+    low : int
+        Smallest number that can be generated.
+    high : int
+        Largest number that can be generated.
+    list_size : int
+        Amount of numbers in the list at the start, lucky number included.
+    window : int
+        On the first miss, numbers closer than this to the lucky number stay.
+    drops : int or tuple
+        Numbers dropped per miss after the first. A tuple gives the drops of
+        the 2nd, 3rd, ... miss, its last value repeats.
+    schedule : tuple
+        schedule[m] is the amount of numbers to drop on miss m + 1.
+    typecode : str
+        Smallest array typecode that holds every number of the range.
+
+    """
+
+    def __init__(self, name: str, low: int, high: int, list_size: int,
+                 window: int, drops=1) -> None:
+        """Initializes the DifficultyProfile instance.
+
+        Parameters
+        ----------
+        name : str
+            Name of the difficulty.
+        low, high : int
+            Inclusive range of the numbers.
+        list_size : int
+            Amount of numbers in the list, lucky number included.
+        window : int
+            Numbers closer than this to the lucky number survive the
+            first miss.
+        drops : int or tuple
+            Numbers dropped per miss after the first.
+
+        Raises
+        ------
+        ValueError
+            If the settings cannot make a playable game.
+
+        """
+        if high < low or not 1 <= list_size <= high - low + 1:
+            raise ValueError(
+                f"Invalid list size {list_size} for range {low}-{high}.")
+        if window < 1:
+            raise ValueError(f"Invalid window: {window}")
+        self.name = name
+        self.low = low
+        self.high = high
+        self.list_size = list_size
+        self.window = window
+        self.drops = drops
+        self.schedule = shrink_schedule(list_size, drops)
+        self.typecode = next(
+            (code for code in 'bhil'
+             if -(1 << 8 * array(code).itemsize - 1) <= low and
+             high < 1 << 8 * array(code).itemsize - 1), 'q')
+
+    def __repr__(self) -> str:
+        return (f'DifficultyProfile({self.name!r}, {self.low}, {self.high}, '
+                f'{self.list_size}, {self.window}, {self.drops!r})')
+
+
+def shrink_schedule(list_size: int, drops) -> tuple:
+    """Expands drops into the number of drops for every possible miss.
+
+    A game has at most list_size - 1 misses. The first miss applies the
+    window instead of dropping numbers, so its entry is 0.
+
+    Parameters
+    ----------
+    list_size : int
+        Amount of numbers in the list at the start.
+    drops : int or tuple
+        Numbers dropped per miss after the first, the last value repeats.
+
+    Returns
+    -------
+    tuple
+        schedule[m] is the amount of numbers to drop on miss m + 1.
+
+    Raises
+    ------
+    ValueError
+        If a drop count is negative.
+
+    """
+    drops = (drops,) if isinstance(drops, int) else tuple(drops)
+    if not drops or min(drops) < 0:
+        raise ValueError(f"Invalid drops: {drops}")
+    later = [drops[min(miss, len(drops) - 1)]
+             for miss in range(max(list_size - 2, 1))]
+    return (0, *later)
+
+
+PROFILES = {
+    profile.name: profile for profile in (
+        DifficultyProfile('easy', 0, 50, 8, 10, drops=2),
+        DifficultyProfile('normal', 0, 100, 10, 10, drops=1),
+        DifficultyProfile('hard', 0, 1000, 20, 50, drops=(0, 1)),
+        DifficultyProfile('extreme', 0, 100_000, 5000, 2000, drops=1),
+    )
+}
+DEFAULT_DIFFICULTY = 'normal'
+
+
+def get_profile(difficulty) -> DifficultyProfile:
+    """Returns a profile by name.
+
+    Parameters
+    ----------
+    difficulty : str or DifficultyProfile
+        Name of a profile in PROFILES, or a profile that is returned as is.
+
+    Returns
+    -------
+    DifficultyProfile
+        The profile.
+
+    Raises
+    ------
+    ValueError
+        If there is no profile with that name.
+
+    """
+    if isinstance(difficulty, DifficultyProfile):
+        return difficulty
+    try:
+        return PROFILES[difficulty]
+    except KeyError:
+        raise ValueError(f"Unknown difficulty: {difficulty}") from None
@@ -0,0 +1,146 @@
+'''
+game_rng Module
+
+This module holds the random number generators games draw from. Each game
+gets its own generator, so games in different threads share no state and a
+game started from a known seed can be replayed exactly.
+
+The default generator is SplitMix64: one 64-bit word of state, where a
+random.Random carries 2.5 KB of Mersenne Twister state. That keeps the many
+idle sessions of a server small.
+
+Classes
+-------
+SplitMix64
+    small seedable generator with the random.Random methods games use
+
+Functions
+---------
+make_rng(rng)
+    returns the generator and seed a game draws from
+
+Example usage
+-------------
+rng, seed = make_rng(None)
+replay, _ = make_rng(seed)
+assert rng.randint(1, 100) == replay.randint(1, 100)
+
+'''
+
+import os
+
+MASK = (1 << 64) - 1
+
+
+class SplitMix64():
+    """
+    SplitMix64 is a small seedable random number generator.
+
+    It has the randint and randrange methods of random.Random, and draws
+    from Steele, Lea and Flood's SplitMix64 sequence: a Weyl sequence with
+    a 64-bit mixing function. Ranges are sampled without bias by rejection.
+
+    Attributes
+    ----------
+    state : int
+        The generator's 64-bit state.
+
+    Methods
+    -------
+    next64():
+        Returns the next 64 random bits.
+    randrange(stop):
+        Returns a random int in 0..stop - 1.
+    randint(low, high):
+        Returns a random int in low..high, both included.
+
+    """
+    __slots__ = ('state',)
+
+    def __init__(self, seed: int) -> None:
+        self.state = seed & MASK
+
+    def next64(self) -> int:
+        """Returns the next 64 random bits."""
+        self.state = state = (self.state + 0x9E3779B97F4A7C15) & MASK
+        state = ((state ^ (state >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+        state = ((state ^ (state >> 27)) * 0x94D049BB133111EB) & MASK
+        return state ^ (state >> 31)
+
+    def randrange(self, stop: int) -> int:
+        """Returns a random int in 0..stop - 1.
+
+        Parameters
+        ----------
+        stop : int
+            Number of possible values, 1 to 2^64.
+
+        Returns
+        -------
+        int
+            The random int.
+
+        Raises
+        ------
+        ValueError
+            If stop is out of range.
+
+        """
+        if not 0 < stop <= 1 << 64:
+            raise ValueError(f"Empty or too large range: {stop}")
+        shift = 64 - (stop - 1).bit_length()
+        while True:
+            value = self.next64() >> shift
+            if value < stop:
+                return value
+
+    def randint(self, low: int, high: int) -> int:
+        """Returns a random int in low..high, both included."""
+        return low + self.randrange(high - low + 1)
+
+
+class _GeneratorAdapter():
+    """Gives a numpy.random.Generator the random.Random methods used."""
+    __slots__ = ('generator',)
+
+    def __init__(self, generator) -> None:
+        self.generator = generator
+
+    def randint(self, low: int, high: int) -> int:
+        return int(self.generator.integers(low, high, endpoint=True))
+
+    def randrange(self, stop: int) -> int:
+        return int(self.generator.integers(stop))
+
+
+def make_rng(rng=None) -> tuple:
+    """Returns the generator and seed a game draws from.
+
+    Parameters
+    ----------
+    rng : None, int, random.Random or numpy.random.Generator
+        An int seeds a new SplitMix64. None does the same with a fresh seed
+        from os.urandom, so every game can be replayed. A generator is used
+        as it is and its seed is unknown.
+
+    Returns
+    -------
+    tuple
+        (generator, seed). The generator has randint and randrange like
+        random.Random, seed is None when a generator was passed in.
+
+    Raises
+    ------
+    TypeError
+        If rng is none of the above.
+
+    """
+    if rng is None:
+        rng = int.from_bytes(os.urandom(8), 'little')
+    if isinstance(rng, int) and not isinstance(rng, bool):
+        return SplitMix64(rng), rng
+    if hasattr(rng, 'randint') and hasattr(rng, 'randrange'):
+        return rng, None
+    if hasattr(rng, 'integers'):  # numpy.random.Generator
+        return _GeneratorAdapter(rng), None
+    raise TypeError(f"Not a random number generator or seed: {rng!r}")
@@ -0,0 +1,437 @@
+'''
+game_server Module
+
+This module hosts number games for many players at once. An asyncio TCP
+server keeps one NumberGame per connection and talks to it through a small
+line protocol instead of input() and print(), so thousands of sessions can
+share one process. A load generator is included to measure the server.
+
+Protocol
+--------
+Every request and reply is one line of UTF-8 text.
+
+PLAYER <birthdate> <first name> <last name>
+    OK, or ERR <reason> if the player data is invalid.
+PLAY [difficulty]
+    LIST <numbers...> with the numbers of a new round.
+GUESS <number>
+    MISS <tries> <numbers...>, OUTSIDE <numbers...> or WIN <tries>. The
+    result of a won game is handed to the results store before WIN is sent.
+    A guess that NumberGame.parse_guess rejects gets ERR not a number.
+QUIT
+    BYE, then the connection is closed.
+
+A line that is not UTF-8 gets ERR invalid encoding. A line longer than
+1 MiB gets ERR line too long, then the connection is closed.
+
+Classes
+-------
+GameServer
+    serves game sessions over TCP
+
+Functions
+---------
+run_load(host, port, sessions, concurrency)
+    plays sessions against a server and reports latency and throughput
+
+Example usage
+-------------
+python game_server.py serve --port 7777
+python game_server.py serve --port 7777 --metrics numbergame.prom
+python game_server.py serve --port 7777 --guess-log docs/guesses.log
+python game_server.py load --port 7777 --sessions 5000 --concurrency 500
+
+'''
+
+import sys
+import time
+import random
+import asyncio
+import argparse
+from gamer_module import MyGamer
+from number_game import NumberGame, HIT, MISS
+from results_store import ResultsStore, CsvResultStore, BatchedResultWriter
+from sqlite_store import SqliteResultStore
+from segmented_store import SegmentedResultStore
+from difficulty import DEFAULT_DIFFICULTY
+from instrumentation import instrument, uninstrument
+from replay import GuessLog
+
+
+class GameServer():
+    """
+    GameServer serves game sessions over TCP.
+
+    Each connection gets its own NumberGame, all of them saving to one
+    shared results store.
+
+    Attributes
+    ----------
+    host : str
+        Interface to listen on.
+    port : int
+        Port to listen on, 0 picks a free one (see start()).
+    store : ResultsStore
+        Where every session saves its results.
+    log : replay.GuessLog
+        Where every round is recorded, None when not recording.
+    sessions : int
+        Number of open sessions.
+
+    Methods
+    -------
+    start():
+        Starts listening and returns the bound port.
+    serve_forever():
+        Serves until cancelled.
+    close():
+        Stops listening and waits for the server to shut down.
+
+    """
+
+    def __init__(self, store: ResultsStore, host: str = '127.0.0.1',
+                 port: int = 0, log: GuessLog = None) -> None:
+        """Initializes the GameServer instance.
+
+        Parameters
+        ----------
+        store : ResultsStore
+            Where every session saves its results.
+        host : str
+            Interface to listen on.
+        port : int
+            Port to listen on, 0 picks a free one.
+        log : replay.GuessLog, optional
+            Where every round is recorded.
+
+        """
+        self.store = store
+        self.log = log
+        self.host = host
+        self.port = port
+        self.sessions = 0
+        self._server = None
+
+    async def start(self) -> int:
+        """Starts listening and returns the bound port.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        int
+            The port the server listens on.
+
+        """
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port, limit=1 << 20)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def serve_forever(self) -> None:
+        """Serves until cancelled.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+
+        """
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """Stops listening and waits for the server to shut down.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter) -> None:
+        """Runs one session until the client quits or disconnects."""
+        self.sessions += 1
+        session = _Session(self.store, self.log)
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b'\n')
+                except asyncio.IncompleteReadError as error:
+                    line = error.partial
+                except asyncio.LimitOverrunError:
+                    # Read the line to its end first, closing with unread
+                    # data resets the connection before ERR arrives.
+                    await _skip_line(reader)
+                    writer.write(b'ERR line too long\n')
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                try:
+                    words = line.decode('utf-8').split()
+                except UnicodeDecodeError:
+                    reply = 'ERR invalid encoding'
+                else:
+                    reply = session.handle(words)
+                writer.write(reply.encode('utf-8') + b'\n')
+                await writer.drain()
+                if reply == 'BYE':
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            if session.game is not None:
+                session.game.flush_log()
+            self.sessions -= 1
+            writer.close()
+
+
+async def _skip_line(reader: asyncio.StreamReader) -> None:
+    """Reads and drops the rest of a line longer than the limit."""
+    while True:
+        try:
+            await reader.readuntil(b'\n')
+            return
+        except asyncio.LimitOverrunError as error:
+            await reader.readexactly(error.consumed)
+        except asyncio.IncompleteReadError:
+            return
+
+
+class _Session():
+    """Protocol state of one connection: the player and the current game."""
+    __slots__ = ('store', 'log', 'gamer', 'game')
+
+    def __init__(self, store: ResultsStore, log: GuessLog = None) -> None:
+        self.store = store
+        self.log = log
+        self.gamer = None
+        self.game = None
+
+    def handle(self, words: list) -> str:
+        """Returns the reply to one request line split into words."""
+        command = words[0].upper() if words else ''
+        try:
+            if command == 'PLAYER':
+                self.gamer = MyGamer(' '.join(words[2:]), words[1])
+                return 'OK'
+            if command == 'PLAY':
+                if self.gamer is None:
+                    return 'ERR no player'
+                difficulty = words[1] if len(words) > 1 \
+                    else DEFAULT_DIFFICULTY
+                if self.game is not None:
+                    self.game.flush_log()
+                self.game = NumberGame(self.gamer, self.store, difficulty,
+                                       log=self.log)
+                return 'LIST ' + _numbers(self.game)
+            if command == 'GUESS':
+                return self._guess(words[1])
+            if command == 'QUIT':
+                return 'BYE'
+        except (ValueError, IndexError) as error:
+            return f'ERR {error}'.rstrip()
+        return f'ERR unknown command {command}'.rstrip()
+
+    def _guess(self, text: str) -> str:
+        """Applies a guess and returns the reply."""
+        game = self.game
+        if game is None:
+            return 'ERR no game'
+        guess = game.parse_guess(text)
+        if guess is None:
+            return 'ERR not a number'
+        game.tries += 1
+        outcome = game.judge_guess(guess)
+        if outcome == HIT:
+            game.save_to_csv()
+            self.game = None
+            return f'WIN {game.tries}'
+        if outcome == MISS:
+            return f'MISS {game.tries} ' + _numbers(game)
+        return 'OUTSIDE ' + _numbers(game)
+
+
+def _numbers(game: NumberGame) -> str:
+    """Returns the game's list as space separated numbers."""
+    return ' '.join(map(str, game.lucky_list))
+
+
+async def _play_session(host: str, port: int, latencies: list,
+                        difficulty: str) -> None:
+    """Plays one session to the end, guessing at random from the list."""
+    reader, writer = await asyncio.open_connection(host, port,
+                                                   limit=1 << 20)
+
+    async def request(line: str) -> list:
+        started = time.perf_counter()
+        writer.write(line.encode('utf-8') + b'\n')
+        reply = (await reader.readline()).decode('utf-8').split()
+        latencies.append(time.perf_counter() - started)
+        return reply
+
+    try:
+        await request('PLAYER 19900101 Load Tester')
+        reply = await request(f'PLAY {difficulty}')
+        numbers = reply[1:]
+        while True:
+            reply = await request('GUESS ' + random.choice(numbers))
+            if reply[0] == 'WIN':
+                break
+            numbers = reply[2:] if reply[0] == 'MISS' else reply[1:]
+        await request('QUIT')
+    finally:
+        writer.close()
+
+
+async def run_load(host: str, port: int, sessions: int,
+                   concurrency: int = 100,
+                   difficulty: str = DEFAULT_DIFFICULTY) -> dict:
+    """Plays sessions against a server and reports latency and throughput.
+
+    Parameters
+    ----------
+    host : str
+        Server address.
+    port : int
+        Server port.
+    sessions : int
+        Number of sessions to play.
+    concurrency : int
+        Sessions open at the same time.
+    difficulty : str
+        Difficulty every session plays.
+
+    Returns
+    -------
+    dict
+        'sessions', 'requests', 'seconds', 'sessions_per_second' and the
+        'p50_ms' and 'p99_ms' request latencies.
+
+    """
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited() -> None:
+        async with semaphore:
+            await _play_session(host, port, latencies, difficulty)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(limited() for _ in range(sessions)))
+    seconds = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'sessions': sessions,
+        'requests': len(latencies),
+        'seconds': seconds,
+        'sessions_per_second': sessions / seconds,
+        'p50_ms': 1000 * _percentile(latencies, 0.50),
+        'p99_ms': 1000 * _percentile(latencies, 0.99),
+    }
+
+
+def _percentile(ordered: list, fraction: float) -> float:
+    """Returns the value at fraction of an ordered list."""
+    if not ordered:
+        return 0.0
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+async def _export_metrics(metrics, path: str, interval: float) -> None:
+    """Writes the metrics to path every interval seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        metrics.write(path)
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    """Runs the server from the command line."""
+    if args.path.endswith('.db'):
+        backend = SqliteResultStore(args.path)
+    elif args.path.endswith('/'):
+        backend = SegmentedResultStore(args.path)
+    else:
+        backend = CsvResultStore(args.path)
+    store = BatchedResultWriter(backend)
+    log = GuessLog(args.guess_log) if args.guess_log else None
+    server = GameServer(store, args.host, args.port, log)
+    metrics = exporter = None
+    if args.metrics:
+        metrics = instrument()
+        exporter = asyncio.create_task(_export_metrics(
+            metrics, args.metrics, args.metrics_interval))
+    print(f'Serving on {args.host}:{await server.start()}')
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+        store.close()
+        if log is not None:
+            log.close()
+        if metrics is not None:
+            exporter.cancel()
+            metrics.write(args.metrics)
+            uninstrument()
+
+
+def main(argv=None) -> None:
+    """Runs the server or the load generator from the command line.
+
+    Parameters
+    ----------
+    argv : list, optional
+        Command line arguments, sys.argv[1:] when left out.
+
+    Returns
+    -------
+    None
+
+    """
+    parser = argparse.ArgumentParser(
+        description='Number game server and load generator.')
+    parser.add_argument('mode', choices=('serve', 'load'))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7777)
+    parser.add_argument('--path', default='docs/game_save.csv',
+                        help='results file, an SQLite database if it ends '
+                        'in .db, a segmented store if it ends in /')
+    parser.add_argument('--sessions', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--difficulty', default=DEFAULT_DIFFICULTY)
+    parser.add_argument('--metrics', help='file to export metrics to, JSON '
+                        'if it ends in .json, else Prometheus text')
+    parser.add_argument('--metrics-interval', type=float, default=10.0)
+    parser.add_argument('--guess-log', help='file to record every round to')
+    args = parser.parse_args(argv)
+
+    if args.mode == 'serve':
+        try:
+            asyncio.run(_serve(args))
+        except KeyboardInterrupt:
+            pass
+        return
+    report = asyncio.run(run_load(args.host, args.port, args.sessions,
+                                  args.concurrency, args.difficulty))
+    for key, value in report.items():
+        print(f'{key}: {value:.3f}' if isinstance(value, float)
+              else f'{key}: {value}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,7 +1,20 @@
 
 import re
+import sys
+import time
 import datetime
 
+# Error codes of validate_players, one per row.
+OK = 0
+BAD_NAME = 1
+BAD_DATE = 2
+TOO_YOUNG = 3
+
+_DATE_PATTERN = re.compile(r'[0-9]{8}')
+_DAYS_IN_MONTH = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+# Today's date and the time.time() at which it stops being today.
+_today_cache = [None, 0.0]
+
 
 class MyGamer():
     """
@@ -33,8 +46,11 @@ class MyGamer():
     Notes:
     The birthdate should be provided in 'YYYYMMDD' format.
     The name should be provided with two words. first/last name.
+    Instances are immutable and slotted, and names and birthdates are
+    interned, so a server holding many players stores each string once.
 
     """
+    __slots__ = ('name', 'birthdate', 'age')
 
     def __init__(self, name: str, birthdate) -> None:
         """Initialize a MyGamer instance with the provided name and birthdate.
@@ -47,9 +63,24 @@ class MyGamer():
             The player's birthdate in 'YYYYMMDD' format.
 
         """
-        self.name = self.val_name(name)
-        self.birthdate = self.val_birth_day(birthdate)
-        self.age = self.calc_age(self.birthdate)
+        birthdate = sys.intern(self.val_birth_day(birthdate))
+        age = self.calc_age(birthdate)
+        object.__setattr__(self, 'name', sys.intern(self.val_name(name)))
+        object.__setattr__(self, 'birthdate', birthdate)
+        object.__setattr__(self, 'age', age)
+
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError(f"MyGamer is immutable, cannot set {name}")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"MyGamer is immutable, cannot delete {name}")
+
+    def __repr__(self) -> str:
+        return f'MyGamer({self.name!r}, {self.birthdate!r})'
+
+    def __reduce__(self) -> tuple:
+        # Pickle and copy restore slots through setattr, rebuild instead.
+        return MyGamer, (self.name, self.birthdate)
 
     def val_name(self, name: str) -> str:
         """Validates and formats the player's name.
@@ -95,16 +126,17 @@ class MyGamer():
             If the birthdate format is invalid.
 
         """
-        date_pattern = r"^\d{8}$"
         birth_day = str(birth_day)
         # Check if the input string matches the pattern
-        if not re.match(date_pattern, birth_day):
+        if not _DATE_PATTERN.fullmatch(birth_day):
             raise ValueError(f"Invalid date format: {birth_day}")
         return birth_day
 
     def calc_age(self, birth_day: str) -> int:
         """Calculates the player's age based on the birthdate.
 
+        The age only goes up once the birthday has passed this year.
+
         Parameters
         ----------
         birth_day : str
@@ -118,13 +150,136 @@ class MyGamer():
         Raises
         ------
         ValueError
-            If the player is too young to play (under 18 years old).
+            If the date does not exist or the player is too young to play
+            (under 18 years old).
 
         """
-        now = datetime.date.today()
-        birth = datetime.datetime.strptime(birth_day, '%Y%m%d').date()
-        age = now.year - birth.year
+        year, month, day = _split_date(int(birth_day))
+        if not year or not 1 <= month <= 12 or \
+                not 1 <= day <= _days_in_month(year, month):
+            raise ValueError(f"Invalid date: {birth_day}")
+        age = _age(year, month, day, _today())
 
         if age >= 18:
             return age
         raise ValueError("You are too young to play.")
+
+
+def _today() -> datetime.date:
+    """Returns today's date, asking the clock for it once per day."""
+    if time.time() >= _today_cache[1]:
+        today = datetime.date.today()
+        midnight = datetime.datetime.combine(
+            today + datetime.timedelta(days=1), datetime.time())
+        _today_cache[:] = [today, midnight.timestamp()]
+    return _today_cache[0]
+
+
+def _split_date(value):
+    """Splits YYYYMMDD integers, or arrays of them, into year, month, day."""
+    return value // 10000, value // 100 % 100, value % 100
+
+
+def _is_leap(year):
+    """Whether year, or each year of an array, is a leap year."""
+    return (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+
+
+def _days_in_month(year: int, month: int) -> int:
+    """Returns the number of days in a month."""
+    return _DAYS_IN_MONTH[month] + (month == 2 and _is_leap(year))
+
+
+def _age(year, month, day, today: datetime.date):
+    """Age on today of someone born on year-month-day, arrays work too."""
+    return today.year - year \
+        - (month * 100 + day > today.month * 100 + today.day)
+
+
+def validate_players(names, birthdates, today: datetime.date = None) -> tuple:
+    """Validates columns of player data in one pass.
+
+    Applies the same rules as MyGamer, but to whole columns at once and
+    without raising: every row gets an error code instead. Birthdates are
+    checked with NumPy array arithmetic rather than a regex and strptime
+    per row.
+
+    Parameters
+    ----------
+    names : list or array
+        The players' names.
+    birthdates : list or array
+        The players' birthdates in 'YYYYMMDD' format, as str or int.
+    today : datetime.date, optional
+        The date ages are calculated on, today when left out.
+
+    Returns
+    -------
+    tuple
+        (records, codes). records holds a dict with 'name', 'birthday' and
+        'age' for every valid row, in order. codes is a NumPy array with
+        one of OK, BAD_NAME, BAD_DATE or TOO_YOUNG per row.
+
+    Raises
+    ------
+    ValueError
+        If the columns differ in length.
+
+    """
+    import numpy as np
+
+    names = [str(name).strip() for name in names]
+    births = [str(birth) for birth in birthdates]
+    if len(names) != len(births):
+        raise ValueError("Names and birthdates differ in length.")
+    if not names:
+        return [], np.zeros(0, dtype=np.uint8)
+    today = today or _today()
+
+    # Two parts around a single space, both passing the isalpha() test of
+    # MyGamer.val_name. A second space ends up in the last part and fails it.
+    parts = np.char.partition(np.asarray(names, dtype=str), ' ')
+    name_ok = (parts[:, 1] == ' ') & np.char.isalpha(parts[:, 0]) \
+        & np.char.isalpha(parts[:, 2])
+
+    # Eight ASCII digits: look at the code points of the strings directly.
+    text = np.asarray(births, dtype=str).reshape(-1)
+    date_ok = np.char.str_len(text) == 8
+    digits = np.where(date_ok, text, '00000000').astype('U8') \
+        .view(np.uint32).reshape(-1, 8) - ord('0')
+    date_ok &= (digits <= 9).all(axis=1)
+    value = digits.astype(np.int64) @ 10 ** np.arange(7, -1, -1)
+    year, month, day = _split_date(value)
+
+    month_days = np.array(_DAYS_IN_MONTH)[np.clip(month, 0, 12)] \
+        + ((month == 2) & _is_leap(year))
+    date_ok &= (year >= 1) & (month >= 1) & (month <= 12) \
+        & (day >= 1) & (day <= month_days)
+    ages = _age(year, month, day, today)
+
+    codes = np.select([~name_ok, ~date_ok, ages < 18],
+                      [BAD_NAME, BAD_DATE, TOO_YOUNG], OK).astype(np.uint8)
+    records = [{'name': names[row].title(), 'birthday': births[row],
+                'age': int(ages[row])}
+               for row in np.flatnonzero(codes == OK)]
+    return records, codes
+
+
+if __name__ == '__main__':
+    # Micro-benchmark: one construction against the strptime based age.
+    import timeit
+
+    def strptime_age(birth_day: str) -> int:
+        """The age as calc_age used to work it out."""
+        now = datetime.date.today()
+        return now.year - \
+            datetime.datetime.strptime(birth_day, '%Y%m%d').date().year
+
+    runs = 100_000
+    gamer = MyGamer('Tyra Forsgren', '20030717')
+    for label, statement in (
+            ('MyGamer()', lambda: MyGamer('Tyra Forsgren', '20030717')),
+            ('calc_age()', lambda: gamer.calc_age('20030717')),
+            ('strptime age', lambda: strptime_age('20030717'))):
+        seconds = min(timeit.repeat(statement, number=runs, repeat=5))
+        print(f'{label:<14}{seconds / runs * 1e6:8.2f} us')
@@ -0,0 +1,381 @@
+'''
+instrumentation Module
+
+This module measures where game sessions spend their time. It is opt-in:
+instrument() wraps the hot NumberGame methods with timers and counters and
+uninstrument() puts the original methods back, so a process that never
+calls it runs exactly the uninstrumented code.
+
+Metrics
+-------
+numbergame_history_load_seconds
+    histogram of reading the results history: a page from the results
+    store (read_stats) or the whole file (load_history)
+numbergame_input_wait_seconds
+    histogram of take_guess, which is mostly waiting for the player
+numbergame_guess_seconds
+    histogram of judging a guess, shortening the list included
+numbergame_save_seconds
+    histogram of saving a result
+numbergame_show_stats_seconds
+    histogram of printing a page of results
+numbergame_guesses_total{outcome}
+    guesses judged, by outcome: hit, miss or outside
+numbergame_invalid_inputs_total
+    player inputs that were not a number
+numbergame_wins_total
+    games won
+numbergame_save_bytes_total
+    bytes written by saves, an estimate of the inserted values for
+    SqliteResultStore and 0 for a BatchedResultWriter that writes later
+
+Classes
+-------
+Histogram
+    latency histogram with fixed buckets
+Metrics
+    counters and histograms, exported as Prometheus text or JSON
+
+Functions
+---------
+instrument(metrics)
+    starts recording metrics of every NumberGame
+uninstrument()
+    stops recording and restores the original methods
+
+Example usage
+-------------
+metrics = instrument()
+game = NumberGame(gamer)
+game.game_loop(begin=True)
+metrics.write('/var/lib/node_exporter/numbergame.prom')
+uninstrument()
+
+Notes:
+write() replaces the file atomically, so a scraper polling it never reads
+half of an export.
+
+'''
+
+import os
+import json
+import time
+import threading
+import functools
+from bisect import bisect_left
+import number_game
+from number_game import NumberGame, HIT
+
+PREFIX = 'numbergame_'
+# Upper bounds in seconds, from 10 microseconds to 10 seconds.
+DEFAULT_BUCKETS = (1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 0.1,
+                   0.5, 1.0, 5.0, 10.0)
+HELP = {
+    'history_load_seconds': 'Time spent reading the results history.',
+    'input_wait_seconds': 'Time spent in take_guess, mostly player input.',
+    'guess_seconds': 'Time spent judging a guess.',
+    'save_seconds': 'Time spent saving a result.',
+    'show_stats_seconds': 'Time spent printing a page of results.',
+    'guesses_total': 'Guesses judged, by outcome.',
+    'invalid_inputs_total': 'Player inputs that were not a number.',
+    'wins_total': 'Games won.',
+    'save_bytes_total': ('Bytes written by saves, estimated for SQLite, '
+                         'batched stores count 0.'),
+}
+
+# (owner, attribute) -> original, while instrumented.
+_originals = {}
+
+
+class Histogram():
+    """
+    Histogram counts observations into fixed buckets.
+
+    Attributes
+    ----------
+    buckets : tuple
+        Upper bounds of the buckets, ascending. A last, unbounded bucket
+        holds everything larger.
+    counts : list
+        Observations per bucket, not cumulative.
+    sum : float
+        Sum of the observations.
+    count : int
+        Number of observations.
+
+    """
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Counts one observation."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics():
+    """
+    Metrics holds counters and histograms and exports them.
+
+    Every method is thread-safe.
+
+    Methods
+    -------
+    inc(name, amount, **labels):
+        Adds to a counter.
+    observe(name, value):
+        Counts an observation in a histogram.
+    counter(name, **labels):
+        Returns the value of a counter.
+    histogram(name):
+        Returns a histogram.
+    to_dict():
+        Returns a JSON-friendly snapshot.
+    to_prometheus():
+        Returns the metrics in the Prometheus text format.
+    write(path):
+        Writes an export, JSON if path ends in '.json'.
+
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS) -> None:
+        """Initializes an empty Metrics instance.
+
+        Parameters
+        ----------
+        buckets : tuple
+            Upper bounds of the histogram buckets, in seconds.
+
+        """
+        self.buckets = tuple(buckets)
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        """Adds amount to the counter name with the given labels."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name: str, value: float) -> None:
+        """Counts value in the histogram name."""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def counter(self, name: str, **labels) -> float:
+        """Returns the value of a counter, 0 if it was never added to."""
+        return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def histogram(self, name: str) -> Histogram:
+        """Returns a histogram, None if nothing was observed in it."""
+        return self._histograms.get(name)
+
+    def to_dict(self) -> dict:
+        """Returns a JSON-friendly snapshot.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            'counters' as a list of name, labels and value, and
+            'histograms' by name with their buckets, counts, sum and count.
+
+        """
+        with self._lock:
+            return {
+                'time': time.time(),
+                'counters': [
+                    {'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in sorted(
+                        self._counters.items())],
+                'histograms': {
+                    name: {'buckets': list(histogram.buckets),
+                           'counts': list(histogram.counts),
+                           'sum': histogram.sum, 'count': histogram.count}
+                    for name, histogram in sorted(self._histograms.items())},
+            }
+
+    def to_prometheus(self) -> str:
+        """Returns the metrics in the Prometheus text format.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        str
+            One sample per line, with HELP and TYPE lines. Bucket counts
+            are cumulative as Prometheus expects.
+
+        """
+        lines = []
+        snapshot = self.to_dict()
+        described = set()
+        for counter in snapshot['counters']:
+            name = PREFIX + counter['name']
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {HELP.get(counter['name'], '')}")
+                lines.append(f'# TYPE {name} counter')
+            lines.append(f"{name}{_labels(counter['labels'])} "
+                         f"{counter['value']}")
+        for short, histogram in snapshot['histograms'].items():
+            name = PREFIX + short
+            lines.append(f"# HELP {name} {HELP.get(short, '')}")
+            lines.append(f'# TYPE {name} histogram')
+            total = 0
+            for bound, count in zip(histogram['buckets'] + ['+Inf'],
+                                    histogram['counts']):
+                total += count
+                lines.append(f'{name}_bucket{_labels({"le": bound})} {total}')
+            lines.append(f"{name}_sum {histogram['sum']}")
+            lines.append(f"{name}_count {histogram['count']}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str) -> None:
+        """Writes an export, replacing the file atomically.
+
+        Parameters
+        ----------
+        path : str
+            Where to write. A path ending in '.json' gets the to_dict
+            snapshot, any other the Prometheus text.
+
+        Returns
+        -------
+        None
+
+        """
+        if path.endswith('.json'):
+            text = json.dumps(self.to_dict(), indent=2)
+        else:
+            text = self.to_prometheus()
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            file.write(text)
+        os.replace(temporary, path)
+
+
+def _labels(labels: dict) -> str:
+    """Returns labels in the Prometheus format, empty if there are none."""
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"'
+                          for key, value in labels.items()) + '}'
+
+
+def _timed(function, name: str, metrics: Metrics):
+    """Returns function wrapped to observe its duration in name."""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            metrics.observe(name, time.perf_counter() - started)
+    return wrapper
+
+
+def _wrappers(metrics: Metrics) -> dict:
+    """Returns (owner, attribute) -> instrumented replacement."""
+    judge_guess = NumberGame.judge_guess
+    save_to_csv = NumberGame.save_to_csv
+    parse_guess = NumberGame.parse_guess
+
+    @functools.wraps(judge_guess)
+    def judged(self, guess: int) -> str:
+        started = time.perf_counter()
+        outcome = judge_guess(self, guess)
+        metrics.observe('guess_seconds', time.perf_counter() - started)
+        metrics.inc('guesses_total', outcome=outcome)
+        if outcome == HIT:
+            metrics.inc('wins_total')
+        return outcome
+
+    @functools.wraps(save_to_csv)
+    def saved(self) -> int:
+        started = time.perf_counter()
+        written = save_to_csv(self)
+        metrics.observe('save_seconds', time.perf_counter() - started)
+        metrics.inc('save_bytes_total', written or 0)
+        return written
+
+    @functools.wraps(parse_guess)
+    def parsed(self, player_input: str):
+        guess = parse_guess(self, player_input)
+        if guess is None:
+            metrics.inc('invalid_inputs_total')
+        return guess
+
+    return {
+        (NumberGame, 'judge_guess'): judged,
+        (NumberGame, 'save_to_csv'): saved,
+        (NumberGame, 'parse_guess'): parsed,
+        (NumberGame, 'take_guess'): _timed(
+            NumberGame.take_guess, 'input_wait_seconds', metrics),
+        (NumberGame, 'show_stats'): _timed(
+            NumberGame.show_stats, 'show_stats_seconds', metrics),
+        (NumberGame, 'read_stats'): _timed(
+            NumberGame.read_stats, 'history_load_seconds', metrics),
+        (number_game, 'load_history'): _timed(
+            number_game.load_history, 'history_load_seconds', metrics),
+    }
+
+
+def instrument(metrics: Metrics = None) -> Metrics:
+    """Starts recording metrics of every NumberGame.
+
+    Parameters
+    ----------
+    metrics : Metrics, optional
+        Where to record, a new Metrics instance when left out.
+
+    Returns
+    -------
+    Metrics
+        The metrics being recorded.
+
+    Raises
+    ------
+    RuntimeError
+        If instrumentation is already on.
+
+    """
+    if _originals:
+        raise RuntimeError("NumberGame is already instrumented.")
+    metrics = metrics if metrics is not None else Metrics()
+    for (owner, attribute), wrapper in _wrappers(metrics).items():
+        _originals[(owner, attribute)] = getattr(owner, attribute)
+        setattr(owner, attribute, wrapper)
+    return metrics
+
+
+def uninstrument() -> None:
+    """Stops recording and restores the original methods.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+
+    """
+    while _originals:
+        (owner, attribute), original = _originals.popitem()
+        setattr(owner, attribute, original)
@@ -0,0 +1,345 @@
+'''
+leaderboard Module
+
+This module keeps aggregate statistics of the game results up to date as
+games are saved, so questions like "how does this player do" or "who are
+the best players" never need to scan the history.
+
+Players are keyed by (name, birthday). For each one the index keeps the
+games played, the best and mean total tries, a histogram of total tries and
+how often every lucky number came up. A global top-K leaderboard of the
+fewest tries is held in a heap.
+
+Classes
+-------
+PlayerStats
+    aggregates of one player
+AggregateIndex
+    per-player aggregates and the global leaderboard
+IndexedResultStore
+    results store wrapper that updates an index on every save
+
+Example usage
+-------------
+index = AggregateIndex.from_store(CsvResultStore('docs/game_save.csv'))
+store = IndexedResultStore(CsvResultStore('docs/game_save.csv'), index)
+game = NumberGame(gamer, store)
+...
+print(index.leaderboard())
+print(index.player('Tyra Forsgren', '20030717').mean_tries)
+
+'''
+
+import heapq
+import json
+from results_store import ResultsStore
+
+
+class PlayerStats():
+    """
+    PlayerStats holds the aggregates of one player.
+
+    Attributes
+    ----------
+    games : int
+        Games played.
+    best : int
+        Fewest tries of any game.
+    total_tries : int
+        Tries summed over every game.
+    tries_histogram : dict
+        Total tries -> number of games won with that many tries.
+    lucky_numbers : dict
+        Lucky number -> number of games it was the lucky number in.
+    mean_tries : float
+        Average tries per game.
+
+    """
+    __slots__ = ('games', 'best', 'total_tries', 'tries_histogram',
+                 'lucky_numbers')
+
+    def __init__(self) -> None:
+        self.games = 0
+        self.best = None
+        self.total_tries = 0
+        self.tries_histogram = {}
+        self.lucky_numbers = {}
+
+    @property
+    def mean_tries(self) -> float:
+        """Average tries per game."""
+        return self.total_tries / self.games if self.games else 0.0
+
+    def add(self, tries: int, lucky_number: int) -> None:
+        """Counts one game in the aggregates."""
+        self.games += 1
+        self.total_tries += tries
+        self.best = tries if self.best is None else min(self.best, tries)
+        self.tries_histogram[tries] = self.tries_histogram.get(tries, 0) + 1
+        self.lucky_numbers[lucky_number] = \
+            self.lucky_numbers.get(lucky_number, 0) + 1
+
+    def to_dict(self) -> dict:
+        """Returns the aggregates as JSON-friendly data."""
+        return {
+            'games': self.games, 'best': self.best,
+            'total_tries': self.total_tries,
+            'tries_histogram': list(self.tries_histogram.items()),
+            'lucky_numbers': list(self.lucky_numbers.items()),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'PlayerStats':
+        """Returns aggregates read back from to_dict data."""
+        stats = cls()
+        stats.games = data['games']
+        stats.best = data['best']
+        stats.total_tries = data['total_tries']
+        stats.tries_histogram = dict(data['tries_histogram'])
+        stats.lucky_numbers = dict(data['lucky_numbers'])
+        return stats
+
+
+class AggregateIndex():
+    """
+    AggregateIndex holds per-player aggregates and the global leaderboard.
+
+    Adding a result costs O(1) for the player aggregates and O(log top_k)
+    for the leaderboard. Looking a player up is O(1) and reading the
+    leaderboard O(top_k log top_k), whatever the size of the history.
+
+    Attributes
+    ----------
+    top_k : int
+        Length of the leaderboard.
+    results : int
+        Results counted so far.
+
+    Methods
+    -------
+    add(record):
+        Counts one game result.
+    player(name, birthday):
+        Returns the aggregates of one player.
+    leaderboard():
+        Returns the best results, fewest tries first.
+    from_store(store, top_k):
+        Builds an index from every result of a store.
+    save(path):
+        Writes the index to a JSON snapshot.
+    load(path):
+        Reads an index back from a JSON snapshot.
+
+    """
+
+    def __init__(self, top_k: int = 10) -> None:
+        """Initializes an empty AggregateIndex.
+
+        Parameters
+        ----------
+        top_k : int
+            Length of the leaderboard.
+
+        """
+        self.top_k = top_k
+        self.results = 0
+        self._players = {}
+        # Max-heap on (tries, order) through negation: the root is the
+        # worst entry on the board. Earlier results win ties.
+        self._board = []
+
+    def add(self, record: dict) -> None:
+        """Counts one game result.
+
+        Parameters
+        ----------
+        record : dict
+            Game result keyed by results_store.FIELDNAMES.
+
+        Returns
+        -------
+        None
+
+        """
+        name, birthday = record['name'], str(record['birthday'])
+        tries = int(float(record['total_tries']))
+        lucky_number = int(float(record['lucky_number']))
+        stats = self._players.get((name, birthday))
+        if stats is None:
+            stats = self._players[(name, birthday)] = PlayerStats()
+        stats.add(tries, lucky_number)
+
+        entry = (-tries, -self.results, name, birthday, lucky_number)
+        if len(self._board) < self.top_k:
+            heapq.heappush(self._board, entry)
+        elif self._board and entry > self._board[0]:
+            heapq.heapreplace(self._board, entry)
+        self.results += 1
+
+    def player(self, name: str, birthday: str) -> PlayerStats:
+        """Returns the aggregates of one player.
+
+        Parameters
+        ----------
+        name : str
+            The player's name.
+        birthday : str
+            The player's birthdate in 'YYYYMMDD' format.
+
+        Returns
+        -------
+        PlayerStats
+            The aggregates, or None if the player has no results.
+
+        """
+        return self._players.get((name, str(birthday)))
+
+    def leaderboard(self) -> list:
+        """Returns the best results, fewest tries first.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        list
+            Dicts with 'name', 'birthday', 'total_tries' and 'lucky_number'.
+
+        """
+        return [
+            {'name': name, 'birthday': birthday, 'total_tries': -tries,
+             'lucky_number': lucky_number}
+            for tries, _, name, birthday, lucky_number in
+            sorted(self._board, reverse=True)]
+
+    @classmethod
+    def from_store(cls, store: ResultsStore,
+                   top_k: int = 10) -> 'AggregateIndex':
+        """Builds an index from every result of a store.
+
+        Parameters
+        ----------
+        store : ResultsStore
+            Store whose results are counted, oldest first.
+        top_k : int
+            Length of the leaderboard.
+
+        Returns
+        -------
+        AggregateIndex
+            The rebuilt index.
+
+        """
+        index = cls(top_k)
+        for record in store.iter_records():
+            index.add(record)
+        return index
+
+    def save(self, path: str) -> None:
+        """Writes the index to a JSON snapshot.
+
+        Parameters
+        ----------
+        path : str
+            Path to the snapshot file.
+
+        Returns
+        -------
+        None
+
+        """
+        data = {
+            'top_k': self.top_k,
+            'results': self.results,
+            'players': [[name, birthday, stats.to_dict()]
+                        for (name, birthday), stats in self._players.items()],
+            'board': self._board,
+        }
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(data, file)
+
+    @classmethod
+    def load(cls, path: str) -> 'AggregateIndex':
+        """Reads an index back from a JSON snapshot.
+
+        Parameters
+        ----------
+        path : str
+            Path to the snapshot file.
+
+        Returns
+        -------
+        AggregateIndex
+            The index as it was saved.
+
+        """
+        with open(path, encoding='utf-8') as file:
+            data = json.load(file)
+        index = cls(data['top_k'])
+        index.results = data['results']
+        index._players = {
+            (name, birthday): PlayerStats.from_dict(stats)
+            for name, birthday, stats in data['players']}
+        index._board = [tuple(entry) for entry in data['board']]
+        heapq.heapify(index._board)
+        return index
+
+
+class IndexedResultStore(ResultsStore):
+    """
+    IndexedResultStore updates an index on every save.
+
+    It wraps another store: results are written to it first and then
+    counted in the index, everything else is passed through.
+
+    Attributes
+    ----------
+    store : ResultsStore
+        The store results are written to.
+    index : AggregateIndex
+        The index kept up to date.
+
+    Methods
+    -------
+    append(record), append_many(records):
+        Write results to the store and count them in the index.
+    read_page(page, page_size, player), iter_records(), flush(), close():
+        Passed through to the store.
+
+    """
+
+    def __init__(self, store: ResultsStore, index: AggregateIndex) -> None:
+        """Wraps store so every result saved to it is counted in index."""
+        self.store = store
+        self.index = index
+
+    def append(self, record: dict) -> int:
+        """Writes one result to the store, then counts it."""
+        written = self.store.append(record)
+        self.index.add(record)
+        return written
+
+    def append_many(self, records: list) -> int:
+        """Writes several results to the store, then counts them."""
+        written = self.store.append_many(records)
+        for record in records:
+            self.index.add(record)
+        return written
+
+    def read_page(self, page: int = 0, page_size: int = 20,
+                  player: str = None) -> list:
+        """Returns one page of results from the store."""
+        return self.store.read_page(page, page_size, player)
+
+    def iter_records(self):
+        """Yields every result of the store, oldest first."""
+        return self.store.iter_records()
+
+    def flush(self) -> None:
+        """Flushes the store."""
+        self.store.flush()
+
+    def close(self) -> None:
+        """Closes the store."""
+        self.store.close()
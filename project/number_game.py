@@ -5,12 +5,15 @@ number_game Module
 This module holds the game logic for a game about guessing numbers. The
 goal is to guess correctly a 'lucky number' from a list of generated numbers.
 By every try the game gets a little easier with reductions made to the list
-of potential guesses. When the game is won, the results are saved to a CSV.
+of potential guesses. When the game is won, the results are appended to a
+results store (a CSV file by default).
 
 Classes
 -------
 NumberGame
     holds game logic
+SessionState
+    holds the phase of a session between game_loop iterations
 
 Example usage
 -------------
@@ -18,16 +21,54 @@ gamer = MyGamer('Tyra Forsgren',20030717)
 game = NumberGame(gamer)
 game.game_loop(begin=True)
 
+replay = NumberGame(gamer, rng=game.seed)  # Draws the same numbers.
+
+log = GuessLog('docs/guesses.log')
+game = NumberGame(gamer, log=log)  # Every round is written to log.
+
 Notes:
 The class is dependant on the module gamer_module that handles validation
 for user data.
 
 '''
 
-import sys
-import random
-import pandas as pd
 from gamer_module import MyGamer
+from candidate_set import CandidateSet
+from results_store import ResultsStore, CsvResultStore, load_history, \
+    format_results
+from difficulty import DEFAULT_DIFFICULTY, get_profile
+from game_rng import make_rng
+
+
+# Phases of a session, see NumberGame.game_loop.
+MENU = 'menu'
+PLAYING = 'playing'
+WON = 'won'
+QUIT = 'quit'
+
+# Outcomes of a guess, see NumberGame.judge_guess.
+HIT = 'hit'
+MISS = 'miss'
+OUTSIDE = 'outside'
+
+
+class SessionState():
+    """
+    SessionState holds where a session is between game_loop iterations.
+
+    Attributes
+    ----------
+    phase : str
+        One of MENU, PLAYING, WON or QUIT.
+    games_played : int
+        Games won so far in the session.
+
+    """
+    __slots__ = ('phase', 'games_played')
+
+    def __init__(self, phase: str) -> None:
+        self.phase = phase
+        self.games_played = 0
 
 
 class NumberGame():
@@ -45,91 +86,198 @@ class NumberGame():
         Instance of class holding users data.
     lucky_nr : int
         Winning number
-    lucky_list : list
-        List containing random numbers including the lucky_nr.
+    lucky_list : CandidateSet
+        Numbers that can still be guessed, including the lucky_nr. Any
+        iterable of numbers in range can be assigned to it.
+    difficulty : DifficultyProfile
+        Range, list size and shrink rules of the game.
     tries : int
         Count flag for the amount of guesses user has done.
     path : str
         Path to the game data CSV file.
     save_file : pandas.DataFrame
-        DataFrame containing game data.
+        DataFrame containing game data, loaded on first access.
+    store : ResultsStore
+        Backend that finished games are appended to.
+    rng : game_rng.SplitMix64
+        Generator every number of the game is drawn from, or the
+        random.Random-like generator passed in.
+    seed : int
+        Seed of rng, None if a generator was passed in. A game made with
+        the same seed, difficulty and guesses plays out the same.
+    log : replay.GuessLog
+        Log every round is recorded to, None when not recording.
 
     Methods
     -------
     game_loop(begin):
         Manages game chronology.
+    play_round():
+        Takes guesses until the lucky number is found.
+    new_round():
+        Draws a new lucky number and list and resets the tries.
     start_menu():
         Handles the player interface at the start menu.
     win_menu():
-        Handles the output if the user has won, saves,
-        and returns to main menu.
+        Handles the output if the user has won and saves.
     take_guess():
         Recieves and validates the dttype players guesses.
+    parse_guess(player_input):
+        Converts one line of player input to a guess.
     generate_lucky_list():
-        Generates a list of random numbers 0-100 without repeats and adds
+        Generates a list of random numbers low-high without repeats and adds
         the winning number.
     generate_lucky_number():
         Generates the winning number.
     check_guess(guess):
         Validates the guess and checks if it is the winning number.
+    judge_guess(guess):
+        Applies a guess to the game without any terminal output.
+    flush_log():
+        Writes the guesses of an unfinished round to the guess log.
     shorten_list():
         Shortens the list of options depending on how many tries there've been.
-    show_satas():
-        Prints the data from the game save file.
+    read_stats(page, page_size, player):
+        Returns one page of the game results, newest first.
+    show_satas(page, page_size, player):
+        Prints one page of the game results, newest first.
+    browse_stats():
+        Lets the player page through the game results.
     save_to_csv():
-        Saves game results to th game data file.
+        Appends game results to the results store.
 
     """
+    # A server keeps one game per live session: no per-instance __dict__.
+    __slots__ = ('gamer', 'difficulty', 'lucky_nr', '_candidates', 'tries',
+                 'path', 'store', 'rng', 'seed', 'log', '_round')
 
-    def __init__(self, the_gamer: MyGamer) -> None:
+    def __init__(self, the_gamer: MyGamer, store: ResultsStore = None,
+                 difficulty=DEFAULT_DIFFICULTY, rng=None,
+                 log=None) -> None:
         """Initializes the NumberGame instance.
 
         Parameters
         ----------
         the_gamer : MyGamer
             Instance holding users data.
+        store : ResultsStore, optional
+            Where results are saved. Defaults to appending to the CSV at path.
+        difficulty : str or DifficultyProfile
+            Name of a profile in difficulty.PROFILES, or a profile.
+        rng : None, int, random.Random or numpy.random.Generator
+            Seed or generator for the game's numbers, see
+            game_rng.make_rng.
+        log : replay.GuessLog, optional
+            Log to record every round to. Needs rng to be a seed.
 
         Returns
         -------
         None
 
+        Raises
+        ------
+        ValueError
+            If the difficulty is unknown.
+        TypeError
+            If rng is not a seed or generator, or if log is given and rng
+            is a generator.
+
         """
         self.gamer = the_gamer
-        self.lucky_nr = self.generate_lucky_nr()
-        self.lucky_list = self.generate_lucky_list()
-        self.tries = 0
+        self.difficulty = get_profile(difficulty)
+        self.rng, self.seed = make_rng(rng)
+        self.log = log
+        self._round = None
+        self.new_round()
         self.path = 'docs/game_save.csv'
-        self.save_file = pd.read_csv(self.path)
+        self.store = store if store is not None else CsvResultStore(self.path)
+
+    @property
+    def lucky_list(self) -> CandidateSet:
+        """The numbers that can still be guessed, in order."""
+        return self._candidates
+
+    @lucky_list.setter
+    def lucky_list(self, numbers) -> None:
+        self._candidates = CandidateSet(
+            numbers, self.difficulty.low, self.difficulty.high,
+            self.difficulty.typecode)
+
+    @property
+    def save_file(self):
+        """The game data, read lazily through the process-wide cache."""
+        return load_history(self.path)
 
     def game_loop(self, begin: bool) -> None:
         """Manages game chronology
 
-        This method starts the main menu, iterates the user guessing and
-        initiates the winning menu.
+        This method runs the session as a state machine: the start menu,
+        the user guessing and the winning menu each return the next phase,
+        and one flat loop moves between them until the player quits. The
+        stack depth stays the same however many games are played.
 
         Parameters
         ----------
         begin : bool
-            Flag to check if it is the first game round or not.
+            Flag to check if it is the first game round or not. If it is
+            not, the session goes straight to guessing.
 
         Returns
         -------
         None
 
         """
-        if begin:
-            self.start_menu()
+        state = SessionState(MENU if begin else PLAYING)
+        while state.phase != QUIT:
+            if state.phase == MENU:
+                state.phase = self.start_menu()
+            elif state.phase == PLAYING:
+                state.phase = self.play_round()
+            else:  # WON
+                state.games_played += 1
+                state.phase = self.win_menu()
+
+    def play_round(self) -> str:
+        """Takes guesses until the lucky number is found.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        str
+            The next phase, WON.
+
+        """
+        while not self.check_guess(self.take_guess()):
+            pass
+        return WON
+
+    def new_round(self) -> None:
+        """Draws a new lucky number and list and resets the tries.
+
+        Parameters
+        ----------
+        None
 
-        win_flag = False
-        while win_flag is not True:
-            win_flag = self.check_guess(self.take_guess())
-        self.win_menu()
+        Returns
+        -------
+        None
+
+        """
+        if self.log is not None:
+            self.flush_log()
+            self._round = self.log.begin_round(self.rng, self.difficulty)
+        self.lucky_nr = self.generate_lucky_nr()
+        self.lucky_list = self.generate_lucky_list()
+        self.tries = 0
 
     # Player interface
-    def start_menu(self) -> None:
+    def start_menu(self) -> str:
         """Handles the player interface at the start menu.
 
-        This method prompts+begins the users next action. The choices are:
+        This method prompts for the users next action. The choices are:
         to quit, to play, or to see gamestats.
 
         Parameters
@@ -138,7 +286,8 @@ class NumberGame():
 
         Returns
         -------
-        None
+        str
+            The next phase: QUIT, PLAYING, or MENU after showing stats.
 
         """
         prompt = \
@@ -146,28 +295,22 @@ class NumberGame():
             'SEE STATS [S]\n'\
             'QUIT [Q]\n\n'
 
-        choice = input(prompt)
         while True:
-            # print('loop')
-            if choice.lower() == 'q':  # QUIT GAME
-                q_choice = input('ARE YOU SURE [Y]')
-                if q_choice.lower() == 'y':
-                    sys.exit()
-                    break
-
-            elif choice.lower() == 's':  # SEE STATS
-                self.show_stats()
-                break
+            choice = input(prompt).lower()
+            if choice == 'q':  # QUIT GAME
+                if input('ARE YOU SURE [Y]').lower() == 'y':
+                    return QUIT
 
-            elif choice.lower() == 'p':  # PLAY GAME
-                self.game_loop(begin=False)
-                break
+            elif choice == 's':  # SEE STATS
+                self.browse_stats()
+                return MENU
 
-            choice = input(prompt)
+            elif choice == 'p':  # PLAY GAME
+                self.new_round()
+                return PLAYING
 
-    def win_menu(self) -> None:
-        """Handles the output if the user has won, saves,
-        and returns to main menu.
+    def win_menu(self) -> str:
+        """Handles the output if the user has won and saves.
 
         Parameters
         ----------
@@ -175,14 +318,15 @@ class NumberGame():
 
         Returns
         -------
-        None
+        str
+            The next phase, MENU.
 
         """
         print('\nGongrats, game is over!\n'
               f'And you got the lucky number on try#{self.tries}')
         self.save_to_csv()
         print('Your results have been saved.')
-        self.game_loop(begin=True)
+        return MENU
 
     def take_guess(self) -> int:
         """Recieves and validates the dtype of players guesses.
@@ -198,18 +342,38 @@ class NumberGame():
 
         """
         self.tries += 1
-        player_input = ''
-        while player_input.isnumeric() is not True:
-            player_input = (input(
-                f'Lucky number list: {self.lucky_list} \n'
+        guess = None
+        while guess is None:
+            guess = self.parse_guess(input(
+                f'Lucky number list: {list(self.lucky_list)} \n'
                 f'Your guess: '))
-        return int(player_input)
+        return guess
+
+    def parse_guess(self, player_input: str):
+        """Converts one line of player input to a guess.
+
+        Parameters
+        ----------
+        player_input : str
+            What the player typed.
+
+        Returns
+        -------
+        int or None
+            The guess, or None if the input is not a number.
+
+        """
+        return int(player_input) if player_input.isdecimal() else None
 
     # Generation
     def generate_lucky_list(self) -> list:
-        """Generates a list of random numbers 0-100 without
+        """Generates a list of random numbers low-high without
         repeats and add winning number.
 
+        Uses Floyd's algorithm over every number but the winning one, so
+        each number costs exactly one draw and no membership retries,
+        however close list_size is to the size of the range.
+
         Parameters
         ----------
         None
@@ -220,12 +384,17 @@ class NumberGame():
             list of random numbers
 
         """
-        luck_list = []
-        while len(luck_list) < 9:
-            ran = random.randint(0, 100)
-            if ran not in luck_list and ran != self.lucky_nr:
-                luck_list.append(ran)
-
+        low = self.difficulty.low
+        span = self.difficulty.high - low + 1
+        offset = self.lucky_nr - low
+        picked = set()
+        randint = self.rng.randint
+        for top in range(span - self.difficulty.list_size, span - 1):
+            ran = randint(0, top)
+            picked.add(top if ran in picked else ran)
+
+        # Slots at or above the winning number's offset shift up by one.
+        luck_list = [low + ran + (ran >= offset) for ran in picked]
         luck_list.append(self.lucky_nr)
         luck_list.sort()
         return luck_list
@@ -243,7 +412,7 @@ class NumberGame():
             the winning number
 
         """
-        return random.randint(0, 100)
+        return self.rng.randint(self.difficulty.low, self.difficulty.high)
 
     def check_guess(self, guess: int) -> bool:
         """Validates the guess and checks if it is the winning number.
@@ -258,24 +427,74 @@ class NumberGame():
         bool
             Wether or not the guess was right.
         """
-        if guess == self.lucky_nr:
-            return True
-        if guess in self.lucky_list:
+        outcome = self.judge_guess(guess)
+        if outcome == MISS:
             print(f'\nYou guessed the wrong number. Tries = {self.tries} \n'
                   'Let\'s make it a bit easier!\n')
-            self.lucky_list.remove(guess)
-            self.shorten_list()
-            return False
-        print('Your guess is not in the list.')
-        self.tries -= 1
-        return False
-
-    def shorten_list(self) -> None:
+        elif outcome == OUTSIDE:
+            print('Your guess is not in the list.')
+        return outcome == HIT
+
+    def judge_guess(self, guess: int) -> str:
+        """Applies a guess to the game without any terminal output.
+
+        The guess is expected to be counted in tries already. A wrong guess
+        is removed and the list shortened; a guess that is not in the list
+        is not counted after all.
+
+        Parameters
+        ----------
+        guess : int
+            the users guess
+
+        Returns
+        -------
+        str
+            HIT, MISS or OUTSIDE.
+
+        """
+        dropped = ()
+        if guess == self.lucky_nr:
+            outcome = HIT
+        elif self._candidates.discard(guess):
+            dropped = self.shorten_list()
+            outcome = MISS
+        else:
+            self.tries -= 1
+            outcome = OUTSIDE
+        if self._round is not None:
+            self._round.guess(guess, outcome, len(self._candidates), dropped)
+            if outcome == HIT:
+                self.flush_log()
+        return outcome
+
+    def flush_log(self) -> None:
+        """Writes the guesses of an unfinished round to the guess log.
+
+        A won round is written by itself. Rounds without guesses are not
+        written at all.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+
+        """
+        if self._round is not None:
+            self._round.finish()
+            self._round = None
+
+    def shorten_list(self) -> list:
         """Shortens the list of options depending on how many tries
         there've been.
 
         If it is the first try, limit the numbers in the list to those
-        within a range of 10 to the lucky nr. Otherwise drop a number.
+        within the difficulty's window of the lucky nr. Otherwise drop as
+        many numbers as the shrink schedule says for this try, each one
+        picked uniformly among the numbers that are not the lucky nr.
 
         Parameters
         ----------
@@ -283,38 +502,117 @@ class NumberGame():
 
         Returns
         -------
-        None
+        list
+            The numbers dropped at random, in the order they were drawn.
+            Empty on the first try, whose cut follows from the list.
 
         """
+        candidates = self._candidates
         if self.tries == 1:  # First try
-            self.lucky_list = [
-                number for number in self.lucky_list
-                if abs(self.lucky_nr - number) < 10]
-        elif len(self.lucky_list) == 1:
-            pass
-        else:
-            while True:
-                ran = random.choice(self.lucky_list)
-                if ran != self.lucky_nr:
-                    self.lucky_list.remove(ran)
-                    break
+            window = self.difficulty.window
+            candidates.keep_range(self.lucky_nr - window + 1,
+                                  self.lucky_nr + window - 1)
+            return []
+
+        schedule = self.difficulty.schedule
+        drops = schedule[min(self.tries, len(schedule)) - 1]
+        lucky_rank = candidates.rank(self.lucky_nr) \
+            if self.lucky_nr in candidates else len(candidates)
+        dropped = []
+        for _ in range(min(drops, len(candidates) - 1)):
+            # Draw a rank among the other numbers and skip over the lucky
+            # nr's, so every drop is one draw and never a retry.
+            rank = self.rng.randrange(len(candidates) - 1)
+            if rank >= lucky_rank:
+                rank += 1
+            dropped.append(candidates.pop_rank(rank))
+            if rank < lucky_rank:
+                lucky_rank -= 1
+        return dropped
+
+    def read_stats(self, page: int = 0, page_size: int = 20,
+                   player: str = None) -> list:
+        """Returns one page of the game results, newest first.
+
+        Parameters
+        ----------
+        page : int
+            Page number, 0 is the newest results.
+        page_size : int
+            Results per page.
+        player : str, optional
+            Only return results of the player with this name.
+
+        Returns
+        -------
+        list
+            Game results keyed by FIELDNAMES.
+
+        """
+        return self.store.read_page(page, page_size, player)
 
-    def show_stats(self) -> None:
-        """Prints the data from the game save file.
+    def show_stats(self, page: int = 0, page_size: int = 20,
+                   player: str = None) -> None:
+        """Prints one page of the game results, newest first.
+
+        The page is streamed from the results store, so printing it costs
+        the same however long the history is.
 
         Parameters
         ----------
+        page : int
+            Page number, 0 is the newest results.
+        page_size : int
+            Results per page.
+        player : str, optional
+            Only show results of the player with this name.
+
+        Returns
+        -------
         None
 
+        """
+        records = self.read_stats(page, page_size, player)
+        print(format_results(records) if records else 'No results here.')
+
+    def browse_stats(self, page_size: int = 20) -> None:
+        """Lets the player page through the game results.
+
+        Parameters
+        ----------
+        page_size : int
+            Results per page.
+
         Returns
         -------
         None
 
         """
-        print(self.save_file.sort_index(ascending=False))
+        prompt = \
+            '\nNEXT PAGE [N]\n'\
+            'PREVIOUS PAGE [P]\n'\
+            'FILTER BY PLAYER [F]\n'\
+            'BACK TO MENU [ANY OTHER KEY]\n\n'
 
-    def save_to_csv(self):
-        """Saves the stats from the game to CSV
+        page, player = 0, None
+        while True:
+            self.show_stats(page, page_size, player)
+            choice = input(prompt).lower()
+            if choice == 'n':
+                page += 1
+            elif choice == 'p':
+                page = max(page - 1, 0)
+            elif choice == 'f':
+                name = input('PLAYER NAME (EMPTY FOR EVERYONE): ').strip()
+                player = name.title() or None
+                page = 0
+            else:
+                return
+
+    def save_to_csv(self) -> int:
+        """Appends the stats from the game to the results store.
+
+        Only the new result is written, earlier rows are never rewritten.
 
         Parameters
         ----------
@@ -322,18 +620,15 @@ class NumberGame():
 
         Returns
         -------
-        None
+        int
+            Number of bytes written.
 
         """
         new_row = {
-            'name': [self.gamer.name],
-            'birthday': [self.gamer.birthdate],
-            'age': [self.gamer.age],
-            'lucky_number': [self.lucky_nr],
-            'total_tries': [int(self.tries)]
+            'name': self.gamer.name,
+            'birthday': self.gamer.birthdate,
+            'age': self.gamer.age,
+            'lucky_number': self.lucky_nr,
+            'total_tries': int(self.tries)
         }
-        self.save_file = pd.concat(
-            [self.save_file, pd.DataFrame(new_row)],
-            ignore_index=True,
-            axis=0)
-        self.save_file.to_csv(self.path, index=False)
+        return self.store.append(new_row)
@@ -0,0 +1,543 @@
+'''
+replay Module
+
+This module records every round of a NumberGame to a compact binary guess
+log and replays logs through the game logic headlessly. A replay draws the
+round again from its logged generator state, feeds it the logged guesses
+and checks that every outcome, list size and dropped number comes out the
+same. That reproduces a round a player reported exactly, and shows whether
+a change to the rules alters the outcome of any logged round.
+
+File format
+-----------
+The file starts with MAGIC and holds one frame per round, oldest first. A
+frame is its payload length (uint32) followed by the payload, all little
+endian:
+
+round header
+    generator state (uint64), low, high (int64), list_size, window
+    (uint32), length of the difficulty name (uint8), number of drop
+    counts (uint16), the name in UTF-8 and the drop counts (uint32 each)
+one entry per guess
+    guess (int64), outcome (uint8: 0 hit, 1 miss, 2 outside), numbers left
+    (uint32), numbers dropped at random (uint16) and those numbers (int64
+    each)
+
+Classes
+-------
+GuessLog
+    append-only log the rounds of any number of games are recorded to
+RoundLog
+    the entries of one round, written to its GuessLog when it ends
+LoggedRound
+    one round read back from a log
+ReplayReport
+    what a replay found
+
+Functions
+---------
+read_log(path)
+    yields the rounds of a log, oldest first
+replay_round(logged)
+    replays one round and returns how it differs from the log
+replay_log(path, workers)
+    replays every round of a log, on a pool of processes if asked
+
+Example usage
+-------------
+log = GuessLog('docs/guesses.log')
+game = NumberGame(gamer, log=log)
+game.game_loop(begin=True)
+log.close()
+
+report = replay_log('docs/guesses.log', workers=4)
+print(report.rounds, report.mismatches)
+
+From the command line:
+python replay.py docs/guesses.log --workers 4
+
+Notes:
+Only games drawing from a seed can be logged: the header holds the state of
+their SplitMix64 at the start of the round. A round is written when it is
+won or when the game moves on (NumberGame.flush_log) and handed to the OS
+right away, so a crash of the process loses at most the rounds being
+played. Frames are not fsynced, a crash of the OS can lose what it had not
+written to disk yet. A frame cut short by a crash is ignored.
+
+'''
+
+import os
+import sys
+import time
+import struct
+import argparse
+import contextlib
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from difficulty import DifficultyProfile
+from game_rng import SplitMix64
+from gamer_module import MyGamer
+from number_game import NumberGame, HIT, MISS, OUTSIDE
+from results_store import ResultsStore
+
+MAGIC = b'NGGUESS1'
+OUTCOMES = (HIT, MISS, OUTSIDE)
+_CODES = {outcome: code for code, outcome in enumerate(OUTCOMES)}
+_LENGTH = struct.Struct('<I')
+_STATE = struct.Struct('<Q')
+_PROFILE = struct.Struct('<qqIIBH')
+_HEADER = struct.Struct('<QqqIIBH')  # _STATE then _PROFILE
+_GUESS = struct.Struct('<qBIH')
+# Guesses beyond int64 are outside every list, logged as the nearest bound.
+_GUESS_LIMIT = (1 << 63) - 1
+# Rounds handed to a worker at a time.
+TASK_ROUNDS = 4096
+
+
+class GuessLog():
+    """
+    GuessLog is an append-only binary log of game rounds.
+
+    One log can be shared by any number of games and threads: a round is
+    buffered by its RoundLog and written in one piece, then flushed to the
+    OS.
+
+    Attributes
+    ----------
+    path : str
+        Path to the log file.
+
+    Methods
+    -------
+    begin_round(rng, profile):
+        Returns the RoundLog of a round about to be drawn.
+    write(payload):
+        Appends the payload of one round.
+    flush():
+        Pushes buffered rounds to the file.
+    close():
+        Flushes and closes the file.
+
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initializes the GuessLog instance.
+
+        Parameters
+        ----------
+        path : str
+            Path to the log file, created if it does not exist.
+
+        Raises
+        ------
+        ValueError
+            If the file exists and is not a guess log.
+
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._profiles = {}
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+        else:
+            with open(path, 'rb') as file:
+                if file.read(len(MAGIC)) != MAGIC:
+                    self._file.close()
+                    raise ValueError(f"Not a guess log: {path}")
+
+    def begin_round(self, rng, profile: DifficultyProfile) -> 'RoundLog':
+        """Returns the RoundLog of a round about to be drawn.
+
+        Parameters
+        ----------
+        rng : game_rng.SplitMix64
+            Generator the round is drawn from, before any draw.
+        profile : DifficultyProfile
+            Difficulty of the round.
+
+        Returns
+        -------
+        RoundLog
+            Where the guesses of the round are recorded.
+
+        Raises
+        ------
+        TypeError
+            If the generator's state cannot be logged.
+
+        """
+        if not isinstance(rng, SplitMix64):
+            raise TypeError("Only games seeded with an int can be logged.")
+        encoded = self._profiles.get(profile)
+        if encoded is None:
+            encoded = self._profiles[profile] = _encode_profile(profile)
+        return RoundLog(self, _STATE.pack(rng.state) + encoded)
+
+    def write(self, payload: bytes) -> None:
+        """Appends the payload of one round as a frame and flushes it."""
+        with self._lock:
+            self._file.write(_LENGTH.pack(len(payload)) + payload)
+            self._file.flush()
+
+    def flush(self) -> None:
+        """Pushes buffered rounds to the file."""
+        with self._lock:
+            self._file.flush()
+
+    def close(self) -> None:
+        """Flushes and closes the file."""
+        with self._lock:
+            self._file.close()
+
+
+class RoundLog():
+    """
+    RoundLog buffers the entries of one round.
+
+    Methods
+    -------
+    guess(guess, outcome, remaining, dropped):
+        Records one judged guess.
+    finish():
+        Writes the round to its log, if it has any guesses.
+
+    """
+    __slots__ = ('log', 'buffer', 'header_size')
+
+    def __init__(self, log: GuessLog, header: bytes) -> None:
+        self.log = log
+        self.buffer = bytearray(header)
+        self.header_size = len(self.buffer)
+
+    def guess(self, guess: int, outcome: str, remaining: int,
+              dropped) -> None:
+        """Records one judged guess.
+
+        Parameters
+        ----------
+        guess : int
+            The guess.
+        outcome : str
+            HIT, MISS or OUTSIDE.
+        remaining : int
+            Numbers left in the list after the guess.
+        dropped : sequence
+            Numbers the guess dropped at random.
+
+        Returns
+        -------
+        None
+
+        """
+        guess = max(min(guess, _GUESS_LIMIT), -_GUESS_LIMIT)
+        self.buffer += _GUESS.pack(guess, _CODES[outcome], remaining,
+                                   len(dropped))
+        if dropped:
+            self.buffer += struct.pack(f'<{len(dropped)}q', *dropped)
+
+    def finish(self) -> None:
+        """Writes the round to its log, if it has any guesses."""
+        if len(self.buffer) > self.header_size:
+            self.log.write(bytes(self.buffer))
+
+
+class LoggedRound():
+    """
+    LoggedRound is one round read back from a guess log.
+
+    Attributes
+    ----------
+    state : int
+        Generator state at the start of the round.
+    profile : DifficultyProfile
+        Difficulty of the round.
+    guesses : list
+        (guess, outcome, remaining, dropped) of every guess, dropped being
+        a tuple of the numbers dropped at random.
+    payload : bytes
+        The round as it is stored.
+
+    """
+    __slots__ = ('state', 'profile', 'guesses', 'payload')
+
+    def __init__(self, state: int, profile: DifficultyProfile,
+                 guesses: list, payload: bytes) -> None:
+        self.state = state
+        self.profile = profile
+        self.guesses = guesses
+        self.payload = payload
+
+    def __repr__(self) -> str:
+        return (f'LoggedRound(state={self.state}, profile={self.profile!r}, '
+                f'guesses={len(self.guesses)})')
+
+
+class ReplayReport():
+    """
+    ReplayReport holds what a replay found.
+
+    Attributes
+    ----------
+    rounds : int
+        Rounds replayed.
+    guesses : int
+        Guesses replayed.
+    mismatches : list
+        (round index, description) of every round that played out
+        differently from its log.
+    seconds : float
+        Wall time of the replay.
+
+    """
+    __slots__ = ('rounds', 'guesses', 'mismatches', 'seconds')
+
+    def __init__(self) -> None:
+        self.rounds = 0
+        self.guesses = 0
+        self.mismatches = []
+        self.seconds = 0.0
+
+
+class _Capture(GuessLog):
+    """GuessLog keeping the last round in memory, for replays."""
+
+    def __init__(self) -> None:
+        self._profiles = {}
+        self.payload = None
+
+    def write(self, payload: bytes) -> None:
+        self.payload = payload
+
+
+def _encode_profile(profile: DifficultyProfile) -> bytes:
+    """Returns the part of a round header describing the difficulty."""
+    drops = (profile.drops,) if isinstance(profile.drops, int) \
+        else tuple(profile.drops)
+    name = profile.name.encode('utf-8')[:255]
+    return (_PROFILE.pack(profile.low, profile.high, profile.list_size,
+                          profile.window, len(name), len(drops)) +
+            name + struct.pack(f'<{len(drops)}I', *drops))
+
+
+def _decode(payload: bytes, profiles: dict) -> LoggedRound:
+    """Returns the round of a payload, sharing profiles between rounds."""
+    state, low, high, list_size, window, name_size, drop_count = \
+        _HEADER.unpack_from(payload)
+    offset = _HEADER.size + name_size + 4 * drop_count
+    key = payload[_STATE.size:offset]
+    profile = profiles.get(key)
+    if profile is None:
+        name = payload[_HEADER.size:_HEADER.size + name_size].decode('utf-8')
+        drops = struct.unpack_from(f'<{drop_count}I', payload,
+                                   _HEADER.size + name_size)
+        profile = profiles[key] = DifficultyProfile(
+            name, low, high, list_size, window,
+            drops[0] if drop_count == 1 else drops)
+    guesses = []
+    while offset < len(payload):
+        guess, code, remaining, count = _GUESS.unpack_from(payload, offset)
+        offset += _GUESS.size
+        dropped = struct.unpack_from(f'<{count}q', payload, offset)
+        offset += 8 * count
+        guesses.append((guess, OUTCOMES[code], remaining, dropped))
+    return LoggedRound(state, profile, guesses, payload)
+
+
+def _frames(path: str):
+    """Yields the payload of every complete frame of a log."""
+    with open(path, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Not a guess log: {path}")
+        while True:
+            length = file.read(_LENGTH.size)
+            if len(length) < _LENGTH.size:
+                return
+            payload = file.read(_LENGTH.unpack(length)[0])
+            if len(payload) < _LENGTH.unpack(length)[0]:
+                return  # Cut short by a crash.
+            yield payload
+
+
+def read_log(path: str):
+    """Yields the rounds of a log, oldest first.
+
+    Parameters
+    ----------
+    path : str
+        Path to the log file.
+
+    Yields
+    ------
+    LoggedRound
+        One round.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a guess log.
+
+    """
+    profiles = {}
+    for payload in _frames(path):
+        yield _decode(payload, profiles)
+
+
+class _Replayer():
+    """Replays rounds on one reusable game per difficulty."""
+
+    def __init__(self) -> None:
+        self.gamer = MyGamer('Replay Player', '20000101')
+        self.store = ResultsStore()
+        self.capture = _Capture()
+        self.games = {}
+
+    def replay(self, logged: LoggedRound) -> str:
+        """Returns how a round differs from its log, None if it does not."""
+        game = self.games.get(logged.profile)
+        if game is None:
+            game = self.games[logged.profile] = NumberGame(
+                self.gamer, self.store, logged.profile, rng=0,
+                log=self.capture)
+        game.rng = SplitMix64(logged.state)
+        game.new_round()
+        for guess, _, _, _ in logged.guesses:
+            game.tries += 1
+            game.judge_guess(guess)
+        game.flush_log()
+        replayed = self.capture.payload
+        self.capture.payload = None
+        if replayed == logged.payload:
+            return None
+        return _difference(logged, replayed)
+
+
+def _difference(logged: LoggedRound, replayed: bytes) -> str:
+    """Describes the first guess that played out differently."""
+    if replayed is None:
+        return 'no guesses were replayed'
+    again = _decode(replayed, {}).guesses
+    for number, (old, new) in enumerate(zip(logged.guesses, again), 1):
+        if old != new:
+            return (f'guess {number} ({old[0]}): logged {old[1]}, '
+                    f'{old[2]} left, dropped {list(old[3])}; replayed '
+                    f'{new[1]}, {new[2]} left, dropped {list(new[3])}')
+    return (f'logged {len(logged.guesses)} guesses, replay recorded '
+            f'{len(again)}')
+
+
+def replay_round(logged: LoggedRound) -> str:
+    """Replays one round and returns how it differs from the log.
+
+    Parameters
+    ----------
+    logged : LoggedRound
+        The round, from read_log.
+
+    Returns
+    -------
+    str
+        Description of the first guess that played out differently, None
+        if the round played out exactly as logged.
+
+    """
+    return _Replayer().replay(logged)
+
+
+def _replay_span(task: tuple) -> tuple:
+    """Replays payloads and returns (rounds, guesses, mismatches).
+
+    Takes a single tuple so it can be sent to a process pool.
+    """
+    first, payloads = task
+    replayer, profiles = _Replayer(), {}
+    guesses, mismatches = 0, []
+    for index, payload in enumerate(payloads, first):
+        logged = _decode(payload, profiles)
+        guesses += len(logged.guesses)
+        difference = replayer.replay(logged)
+        if difference is not None:
+            mismatches.append((index, difference))
+    return len(payloads), guesses, mismatches
+
+
+def _tasks(path: str):
+    """Yields (first round index, payloads) of TASK_ROUNDS rounds."""
+    payloads, first = [], 0
+    for payload in _frames(path):
+        payloads.append(payload)
+        if len(payloads) == TASK_ROUNDS:
+            yield first, payloads
+            payloads, first = [], first + TASK_ROUNDS
+    if payloads:
+        yield first, payloads
+
+
+def replay_log(path: str, workers: int = 1) -> ReplayReport:
+    """Replays every round of a log.
+
+    Parameters
+    ----------
+    path : str
+        Path to the log file.
+    workers : int
+        Number of processes, None for the number of CPUs. With 1 the
+        rounds are replayed in this process.
+
+    Returns
+    -------
+    ReplayReport
+        Rounds and guesses replayed and every mismatch, by round index.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a guess log.
+
+    """
+    report = ReplayReport()
+    started = time.perf_counter()
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers) if workers > 1 \
+            else contextlib.nullcontext() as pool:
+        spans = pool.map(_replay_span, _tasks(path)) if pool is not None \
+            else map(_replay_span, _tasks(path))
+        for rounds, guesses, mismatches in spans:
+            report.rounds += rounds
+            report.guesses += guesses
+            report.mismatches += mismatches
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def main(argv=None) -> int:
+    """Replays a guess log from the command line.
+
+    Parameters
+    ----------
+    argv : list, optional
+        Command line arguments, sys.argv[1:] when left out.
+
+    Returns
+    -------
+    int
+        0 if every round played out as logged, 1 otherwise.
+
+    """
+    parser = argparse.ArgumentParser(description='Replay a guess log.')
+    parser.add_argument('path')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='processes to replay on, 0 for every CPU')
+    args = parser.parse_args(argv)
+
+    report = replay_log(args.path, args.workers)
+    rate = report.rounds / report.seconds if report.seconds else 0.0
+    print(f'{report.rounds} rounds, {report.guesses} guesses replayed in '
+          f'{report.seconds:.2f}s ({rate:,.0f} rounds/s)')
+    for index, difference in report.mismatches:
+        print(f'Round {index}: {difference}', file=sys.stderr)
+    return 1 if report.mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,984 @@
+'''
+results_store Module
+
+This module holds the persistence layer for finished games. A results store
+receives one record per won game and keeps it somewhere durable. The default
+backend appends a single CSV line per result, so saving a game costs the same
+no matter how long the history already is.
+
+Classes
+-------
+ResultsStore
+    base class describing what every results backend must provide
+CsvResultStore
+    append-only CSV backend, safe to share between processes
+BatchedResultWriter
+    coalesces results from many producers into batched appends on a
+    background thread
+
+Functions
+---------
+format_results(records)
+    formats results as a table for printing
+parse_row(values)
+    turns the values of a CSV line into a result
+reverse_lines(file)
+    yields the lines of a binary file from last to first
+load_history(path)
+    returns the save file as a DataFrame, cached process-wide
+clear_history_cache()
+    drops every cached history
+
+Example usage
+-------------
+store = CsvResultStore('docs/game_save.csv', fsync='always')
+store.append({'name': 'Tyra Forsgren', 'birthday': '20030717',
+              'age': 20, 'lucky_number': 78, 'total_tries': 2})
+store.close()
+
+Notes:
+Any number of processes can share one CSV file. Every write holds an
+advisory lock on <path>.lock (flock, or msvcrt on Windows) and is a single
+O_APPEND write, so no process overwrites or splits another's rows.
+compact() rewrites the file to a temporary file and renames it over the
+original; writers notice the new file and reopen it. On Windows the rename
+fails while another process has the file open.
+Records are plain dicts keyed by FIELDNAMES, the same columns the game save
+file has always had. The cached history is shared between every caller in
+the process, so treat it as read-only.
+Only load_history needs pandas and imports it on first use, so importing
+this module (and number_game) stays cheap.
+
+'''
+
+import os
+import csv
+import io
+import time
+import queue
+import tempfile
+import threading
+import contextlib
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+FIELDNAMES = ('name', 'birthday', 'age', 'lucky_number', 'total_tries')
+FSYNC_POLICIES = ('never', 'flush', 'always')
+
+# path -> (file signature, DataFrame), shared by every game in the process.
+_history_cache = {}
+_history_lock = threading.Lock()
+
+
+class ResultsStore():
+    """
+    ResultsStore is the base class for game result backends.
+
+    Subclasses decide where records end up, NumberGame only ever talks to
+    this interface.
+
+    Methods
+    -------
+    append(record):
+        Persists one game result.
+    append_many(records):
+        Persists several game results at once.
+    read_page(page, page_size, player):
+        Returns one page of results, newest first.
+    iter_records():
+        Yields every result, oldest first.
+    flush():
+        Pushes buffered results to durable storage.
+    close():
+        Flushes and releases any held resources.
+
+    """
+
+    def append(self, record: dict) -> int:
+        """Persists one game result.
+
+        Parameters
+        ----------
+        record : dict
+            Game result keyed by FIELDNAMES.
+
+        Returns
+        -------
+        int
+            Number of bytes written.
+
+        """
+        raise NotImplementedError
+
+    def append_many(self, records: list) -> int:
+        """Persists several game results at once.
+
+        Backends that can write a batch in one go override this.
+
+        Parameters
+        ----------
+        records : list
+            Game results keyed by FIELDNAMES.
+
+        Returns
+        -------
+        int
+            Number of bytes written.
+
+        """
+        return sum(self.append(record) for record in records)
+
+    def read_page(self, page: int = 0, page_size: int = 20,
+                  player: str = None) -> list:
+        """Returns one page of results, newest first.
+
+        Parameters
+        ----------
+        page : int
+            Page number, 0 is the newest results.
+        page_size : int
+            Results per page.
+        player : str, optional
+            Only return results of the player with this name.
+
+        Returns
+        -------
+        list
+            Game results keyed by FIELDNAMES.
+
+        Raises
+        ------
+        NotImplementedError
+            If the backend cannot page through its results.
+
+        """
+        raise NotImplementedError
+
+    def iter_records(self):
+        """Yields every result, oldest first.
+
+        Parameters
+        ----------
+        None
+
+        Yields
+        ------
+        dict
+            Game result keyed by FIELDNAMES.
+
+        Raises
+        ------
+        NotImplementedError
+            If the backend cannot read its results back.
+
+        """
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Pushes buffered results to durable storage.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+
+        """
+
+    def close(self) -> None:
+        """Flushes and releases any held resources.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+
+        """
+        self.flush()
+
+
+class CsvResultStore(ResultsStore):
+    """
+    CsvResultStore appends game results to a CSV file, one line per result.
+
+    The file is opened lazily in append mode and kept open between saves,
+    so a save never reads or rewrites earlier rows. Every write takes an
+    exclusive advisory lock on <path>.lock and readers take a shared one
+    to find where the complete rows end, so processes can share the file.
+
+    Attributes
+    ----------
+    path : str
+        Path to the CSV file.
+    fsync : str
+        When to fsync: 'never' leaves it to the OS, 'flush' only on explicit
+        flush/close, 'always' after every appended result.
+
+    Methods
+    -------
+    append(record):
+        Writes one CSV line for the result.
+    append_many(records):
+        Writes the lines of several results with a single write.
+    read_page(page, page_size, player):
+        Returns one page of results, newest first, reading the file
+        backwards.
+    iter_records():
+        Yields every result, oldest first.
+    compact():
+        Rewrites the file without damaged rows, atomically.
+    flush():
+        Fsyncs the file unless the policy is 'never'.
+    close():
+        Flushes and closes the file.
+
+    """
+
+    def __init__(self, path: str, fsync: str = 'never') -> None:
+        """Initializes the CsvResultStore instance.
+
+        Parameters
+        ----------
+        path : str
+            Path to the CSV file. Created with a header if missing.
+        fsync : str
+            One of FSYNC_POLICIES.
+
+        Raises
+        ------
+        ValueError
+            If the fsync policy is unknown.
+
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Invalid fsync policy: {fsync}")
+        self.path = path
+        self.fsync = fsync
+        self._fd = None
+        self._identity = None
+        self._lock_fd = None
+        self._thread_lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _check_process(self) -> None:
+        """Drops what a process started with fork inherited.
+
+        A child shares the parent's open lock file, and flock does not
+        exclude between holders of one open file, so it opens its own. The
+        thread lock may have been held by another thread during the fork.
+        """
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._thread_lock = threading.Lock()
+        # The parent keeps its lock, flock is only released when every
+        # copy of the descriptor is closed.
+        for fd in (self._fd, self._lock_fd):
+            if fd is not None:
+                os.close(fd)
+        self._fd = self._lock_fd = self._identity = None
+
+    @contextlib.contextmanager
+    def _locked(self, exclusive: bool = True):
+        """Holds the lock of the file, against threads and processes."""
+        self._check_process()
+        with self._thread_lock:
+            if self._lock_fd is None:
+                self._lock_fd = os.open(self.path + '.lock',
+                                        os.O_RDWR | os.O_CREAT, 0o666)
+            _lock(self._lock_fd, exclusive)
+            try:
+                yield
+            finally:
+                _unlock(self._lock_fd)
+
+    def _open(self) -> int:
+        """Returns the descriptor to append to, under the exclusive lock.
+
+        The file is reopened when another store compacted or removed it. A
+        new file gets the header, a file ending in a torn row a newline.
+        """
+        if self._fd is not None:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                stat = None
+            if stat is not None and \
+                    (stat.st_dev, stat.st_ino) == self._identity:
+                return self._fd
+            os.close(self._fd)
+            self._fd = None
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT |
+                     getattr(os, 'O_BINARY', 0), 0o666)
+        stat = os.fstat(fd)
+        if stat.st_size == 0:
+            _write_all(fd, format_row(FIELDNAMES).encode('utf-8'))
+        else:
+            with open(self.path, 'rb') as file:
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b'\n':
+                    _write_all(fd, b'\n')
+        self._fd, self._identity = fd, (stat.st_dev, stat.st_ino)
+        return fd
+
+    def _snapshot(self):
+        """Opens the file for reading and returns it with the size of its
+        complete rows, None if there is no file."""
+        with self._locked(exclusive=False):
+            try:
+                file = open(self.path, 'rb')
+            except FileNotFoundError:
+                return None, 0
+            return file, os.fstat(file.fileno()).st_size
+
+    def append(self, record: dict) -> int:
+        """Writes one CSV line for the result.
+
+        Parameters
+        ----------
+        record : dict
+            Game result keyed by FIELDNAMES.
+
+        Returns
+        -------
+        int
+            Number of bytes written.
+
+        """
+        return self.append_many([record])
+
+    def append_many(self, records: list) -> int:
+        """Writes the lines of several results with a single write.
+
+        Parameters
+        ----------
+        records : list
+            Game results keyed by FIELDNAMES.
+
+        Returns
+        -------
+        int
+            Number of bytes written.
+
+        """
+        lines = ''.join(format_row([record[field] for field in FIELDNAMES])
+                        for record in records).encode('utf-8')
+        with self._locked():
+            fd = self._open()
+            _write_all(fd, lines)
+            if self.fsync == 'always':
+                os.fsync(fd)
+        return len(lines)
+
+    def read_page(self, page: int = 0, page_size: int = 20,
+                  player: str = None) -> list:
+        """Returns one page of results, newest first, reading the file
+        backwards.
+
+        The file is read from its end in blocks and stops as soon as the
+        page is full. Skipped results are only counted, so memory depends on
+        the page size and not on the size of the history.
+
+        Parameters
+        ----------
+        page : int
+            Page number, 0 is the newest results.
+        page_size : int
+            Results per page.
+        player : str, optional
+            Only return results of the player with this name.
+
+        Returns
+        -------
+        list
+            Game results keyed by FIELDNAMES.
+
+        """
+        file, size = self._snapshot()
+        if file is None:
+            return []
+        skip = page * page_size
+        results = []
+        prefix = None if player is None else player.encode('utf-8') + b','
+        with file:
+            for line in reverse_lines(file, end=size):
+                quoted = b'"' in line
+                # Cheap byte check first, most lines of a filtered read
+                # belong to other players.
+                if prefix is not None and not quoted and \
+                        not line.startswith(prefix):
+                    continue
+                text = line.decode('utf-8')
+                row = next(csv.reader([text])) if quoted else text.split(',')
+                if len(row) != len(FIELDNAMES) or tuple(row) == FIELDNAMES:
+                    continue
+                if player is not None and row[0] != player:
+                    continue
+                if skip:
+                    skip -= 1
+                    continue
+                results.append(parse_row(row))
+                if len(results) == page_size:
+                    break
+        return results
+
+    def iter_records(self):
+        """Yields every result, oldest first.
+
+        Parameters
+        ----------
+        None
+
+        Yields
+        ------
+        dict
+            Game result keyed by FIELDNAMES.
+
+        """
+        file, size = self._snapshot()
+        if file is None:
+            return
+        with file:
+            lines = (line.decode('utf-8') for line in _lines(file, size))
+            for row in csv.reader(lines):
+                if len(row) == len(FIELDNAMES) and tuple(row) != FIELDNAMES:
+                    yield parse_row(row)
+
+    def compact(self) -> int:
+        """Rewrites the file without damaged rows, atomically.
+
+        The rows are copied to a temporary file next to the original, which
+        is fsynced and renamed over it while the exclusive lock is held.
+        Readers see either file whole, writers reopen the new one.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        int
+            Number of damaged rows dropped. Repeated headers and blank
+            lines are dropped without being counted.
+
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        dropped = 0
+        with self._locked():
+            if not os.path.exists(self.path):
+                return 0
+            fd, temporary = tempfile.mkstemp(
+                dir=directory, prefix=os.path.basename(self.path) + '.',
+                suffix='.tmp')
+            try:
+                with open(self.path, newline='', encoding='utf-8',
+                          errors='replace') as source, \
+                        os.fdopen(fd, 'w', newline='',
+                                  encoding='utf-8') as target:
+                    target.write(format_row(FIELDNAMES))
+                    for row in csv.reader(source):
+                        if not row or tuple(row) == FIELDNAMES:
+                            continue
+                        try:
+                            parse_row(row)
+                        except ValueError:
+                            dropped += 1
+                            continue
+                        target.write(format_row(row))
+                    target.flush()
+                    os.fsync(target.fileno())
+                os.chmod(temporary, os.stat(self.path).st_mode & 0o777)
+                os.replace(temporary, self.path)
+            except BaseException:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(temporary)
+                raise
+            _fsync_directory(directory)
+        return dropped
+
+    def flush(self) -> None:
+        """Fsyncs the file unless the policy is 'never'.
+
+        Rows are written straight to the file, there is no buffer to flush.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+
+        """
+        self._check_process()
+        if self._fd is not None and self.fsync != 'never':
+            os.fsync(self._fd)
+
+    def close(self) -> None:
+        """Flushes and closes the file.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+
+        """
+        self._check_process()
+        if self._fd is not None:
+            self.flush()
+            os.close(self._fd)
+            self._fd = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+
+class BatchedResultWriter(ResultsStore):
+    """
+    BatchedResultWriter coalesces results into batched appends.
+
+    Any number of threads (or an asyncio loop) can append; the results go
+    on a queue and a single background thread writes them to the wrapped
+    store. A batch is written when it holds max_batch results or when its
+    oldest result has waited max_delay seconds, whichever comes first.
+
+    Attributes
+    ----------
+    store : ResultsStore
+        The store batches are written to. Only the writer thread uses it.
+    max_batch : int
+        Results written together at most.
+    max_delay : float
+        Seconds a result may wait before its batch is written.
+
+    Methods
+    -------
+    append(record):
+        Queues one game result.
+    read_page(page, page_size, player):
+        Flushes, then returns one page of results from the store.
+    iter_records():
+        Flushes, then yields every result of the store.
+    flush():
+        Writes everything queued so far and flushes the store.
+    close():
+        Writes everything queued, stops the thread and closes the store.
+
+    """
+
+    _FLUSH = 'flush'
+    _CLOSE = 'close'
+
+    def __init__(self, store: ResultsStore, max_batch: int = 512,
+                 max_delay: float = 0.05) -> None:
+        """Initializes the BatchedResultWriter and starts its thread.
+
+        Parameters
+        ----------
+        store : ResultsStore
+            The store batches are written to.
+        max_batch : int
+            Results written together at most.
+        max_delay : float
+            Seconds a result may wait before its batch is written.
+
+        """
+        self.store = store
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name='BatchedResultWriter', daemon=True)
+        self._thread.start()
+
+    def append(self, record: dict) -> int:
+        """Queues one game result.
+
+        Parameters
+        ----------
+        record : dict
+            Game result keyed by FIELDNAMES.
+
+        Returns
+        -------
+        int
+            0, the result is written later by the writer thread.
+
+        Raises
+        ------
+        ValueError
+            If the writer has been closed.
+
+        """
+        if self._closed:
+            raise ValueError("Writer is closed.")
+        self._queue.put(record)
+        return 0
+
+    def read_page(self, page: int = 0, page_size: int = 20,
+                  player: str = None) -> list:
+        """Flushes, then returns one page of results from the store.
+
+        Parameters
+        ----------
+        page : int
+            Page number, 0 is the newest results.
+        page_size : int
+            Results per page.
+        player : str, optional
+            Only return results of the player with this name.
+
+        Returns
+        -------
+        list
+            Game results keyed by FIELDNAMES.
+
+        """
+        self.flush()
+        return self.store.read_page(page, page_size, player)
+
+    def iter_records(self):
+        """Flushes, then yields every result of the store.
+
+        Parameters
+        ----------
+        None
+
+        Yields
+        ------
+        dict
+            Game result keyed by FIELDNAMES.
+
+        """
+        self.flush()
+        yield from self.store.iter_records()
+
+    def flush(self) -> None:
+        """Writes everything queued so far and flushes the store.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        Exception
+            The first error the writer thread ran into, if any.
+
+        """
+        if not self._closed:
+            self._control(self._FLUSH)
+        self._raise_error()
+
+    def close(self) -> None:
+        """Writes everything queued, stops the thread and closes the store.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+
+        """
+        if not self._closed:
+            self._closed = True
+            self._control(self._CLOSE)
+            self._thread.join()
+        self._raise_error()
+
+    def _control(self, command: str) -> None:
+        """Queues a command behind every result and waits until it is done."""
+        done = threading.Event()
+        self._queue.put((command, done))
+        done.wait()
+
+    def _raise_error(self) -> None:
+        """Re-raises an error of the writer thread once."""
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def _write(self, batch: list) -> None:
+        """Writes a batch, keeping the first error for the producers."""
+        if batch:
+            try:
+                self.store.append_many(batch)
+            except Exception as error:  # pylint: disable=broad-except
+                self._error = self._error or error
+            batch.clear()
+
+    def _run(self) -> None:
+        """Writer thread: collects results into batches and writes them."""
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if not batch else \
+                max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._write(batch)
+                continue
+            if isinstance(item, tuple):
+                command, done = item
+                self._write(batch)
+                try:
+                    if command == self._CLOSE:
+                        self.store.close()
+                    else:
+                        self.store.flush()
+                except Exception as error:  # pylint: disable=broad-except
+                    self._error = self._error or error
+                done.set()
+                if command == self._CLOSE:
+                    return
+                continue
+            if not batch:
+                deadline = time.monotonic() + self.max_delay
+            batch.append(item)
+            if len(batch) >= self.max_batch:
+                self._write(batch)
+
+
+def format_row(values) -> str:
+    """Formats values as a single CSV line.
+
+    Parameters
+    ----------
+    values : iterable
+        Field values in column order.
+
+    Returns
+    -------
+    str
+        The CSV line including the line terminator.
+
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='\n').writerow(values)
+    return buffer.getvalue()
+
+
+def parse_row(values: list) -> dict:
+    """Turns the values of a CSV line into a result.
+
+    Numbers are read through float, as older save files wrote them as
+    float text ('20.0').
+
+    Parameters
+    ----------
+    values : list
+        Field values in FIELDNAMES order.
+
+    Returns
+    -------
+    dict
+        Game result keyed by FIELDNAMES.
+
+    """
+    name, birthday, age, lucky_number, total_tries = values
+    return {
+        'name': name,
+        'birthday': birthday,
+        'age': int(float(age)),
+        'lucky_number': int(float(lucky_number)),
+        'total_tries': int(float(total_tries)),
+    }
+
+
+def reverse_lines(file, block_size: int = 1 << 16, end: int = None):
+    """Yields the lines of a binary file from last to first.
+
+    Parameters
+    ----------
+    file : file object
+        File opened in binary mode.
+    block_size : int
+        Bytes read at a time.
+    end : int, optional
+        Only read the file up to this offset, its end when left out.
+
+    Yields
+    ------
+    bytes
+        One line without its line terminator.
+
+    """
+    position = file.seek(0, os.SEEK_END) if end is None else end
+    partial = b''
+    while position > 0:
+        size = min(block_size, position)
+        position -= size
+        file.seek(position)
+        lines = (file.read(size) + partial).split(b'\n')
+        partial = lines.pop(0)
+        for line in reversed(lines):
+            if line.strip():
+                yield line.rstrip(b'\r')
+    if partial.strip():
+        yield partial.rstrip(b'\r')
+
+
+def _lines(file, size: int):
+    """Yields the lines of a binary file within its first size bytes."""
+    for line in file:
+        if size <= 0:
+            return
+        size -= len(line)
+        yield line
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    """Writes all of data to a descriptor, however the OS splits it."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def _lock(fd: int, exclusive: bool) -> None:
+    """Blocks until the advisory lock on a lock file is held.
+
+    msvcrt has no shared locks, so on Windows every lock is exclusive.
+    """
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        return
+    os.lseek(fd, 0, os.SEEK_SET)
+    while True:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            return
+        except OSError:  # LK_LOCK gives up after 10 seconds.
+            continue
+
+
+def _try_lock(fd: int) -> bool:
+    """Takes the exclusive advisory lock on a lock file if it is free.
+
+    Returns False, without waiting, if anyone else holds it.
+    """
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(fd: int) -> None:
+    """Releases the advisory lock on a lock file."""
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        return
+    os.lseek(fd, 0, os.SEEK_SET)
+    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+def _fsync_directory(directory: str) -> None:
+    """Makes a rename in directory durable, where the OS allows it."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:  # Windows cannot open directories.
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def format_results(records: list) -> str:
+    """Formats results as a table for printing.
+
+    Parameters
+    ----------
+    records : list
+        Game results keyed by FIELDNAMES.
+
+    Returns
+    -------
+    str
+        One header line and one line per result.
+
+    """
+    rows = [FIELDNAMES] + [
+        [str(record[field]) for field in FIELDNAMES] for record in records]
+    widths = [max(len(row[col]) for row in rows)
+              for col in range(len(FIELDNAMES))]
+    return '\n'.join(
+        '  '.join(value.ljust(width) for value, width in zip(row, widths))
+        .rstrip() for row in rows)
+
+
+def _signature(path: str) -> tuple:
+    """Returns what identifies a version of the file: inode, mtime and
+    size."""
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def load_history(path: str) -> 'pandas.DataFrame':
+    """Returns the save file as a DataFrame, cached process-wide.
+
+    The file is parsed on first use only and the result is reused until
+    the file's modification time or size changes.
+
+    Parameters
+    ----------
+    path : str
+        Path to the CSV file.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The game history. Shared between callers, do not modify it.
+
+    """
+    with _history_lock:
+        signature = _signature(path)
+        cached = _history_cache.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        import pandas as pd
+        history = pd.read_csv(path)
+        _history_cache[path] = (signature, history)
+        return history
+
+
+def clear_history_cache() -> None:
+    """Drops every cached history.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+
+    """
+    with _history_lock:
+        _history_cache.clear()
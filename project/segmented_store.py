@@ -0,0 +1,771 @@
+'''
+segmented_store Module
+
+This module holds a results backend that keeps the history as a directory
+of bounded segments instead of one ever-growing CSV file. Results are
+appended to the active segment, a plain CSV file. Once it holds max_bytes
+or is max_age seconds old it is sealed and a new one is started. A
+background thread compresses sealed segments with gzip and records a
+summary of each: its result count and fewest and most tries, overall and
+per player.
+
+manifest.json lists the segments in order, with their state and summary.
+Opening a store reads the manifest and nothing else. Queries skip every
+segment the summaries rule out: a player's page never opens a segment
+the player has no results in, and player_stats reads no compacted segment
+at all.
+
+Classes
+-------
+SegmentedResultStore
+    results backend storing the history as a manifest of segments
+
+Functions
+---------
+summarize(records)
+    returns the summary of a segment's results
+convert_csv(csv_path, directory)
+    copies a CSV save file into a segmented store
+
+Example usage
+-------------
+store = SegmentedResultStore('docs/game_history', max_bytes=1 << 20)
+game = NumberGame(gamer, store)
+...
+print(store.read_page(0, 20, player='Tyra Forsgren'))
+print(store.player_stats('Tyra Forsgren'))
+
+From the command line:
+python segmented_store.py docs/game_save.csv docs/game_history
+
+Notes:
+One store uses a directory at a time: it holds an exclusive lock on
+store.lock (flock, or msvcrt on Windows) until it is closed, and a second
+store of the directory, in this process or another, fails to open. A store
+can be shared between threads.
+The manifest is replaced atomically whenever a segment is sealed or
+compacted, and a compacted segment is renamed into place before the
+manifest names it, so a crash loses at most the work in progress. Files
+the manifest does not name are removed by the background thread.
+
+'''
+
+import os
+import io
+import csv
+import sys
+import gzip
+import json
+import time
+import threading
+import contextlib
+from results_store import ResultsStore, CsvResultStore, FIELDNAMES, \
+    FSYNC_POLICIES, format_row, parse_row, _lines, _fsync_directory, \
+    _try_lock, _unlock
+
+MANIFEST = 'manifest.json'
+LOCK = 'store.lock'
+VERSION = 1
+# States of a segment, in the order it goes through them.
+ACTIVE, SEALED, COMPACTED = 'active', 'sealed', 'compacted'
+HEADER = format_row(FIELDNAMES).encode('utf-8')
+
+
+class SegmentedResultStore(ResultsStore):
+    """
+    SegmentedResultStore keeps game results in size- or time-bounded
+    segments listed by a manifest.
+
+    Attributes
+    ----------
+    directory : str
+        Directory holding the manifest and the segments.
+    max_bytes : int
+        The active segment is sealed once it holds this many bytes.
+    max_age : float or None
+        The active segment is sealed at the first save after it is this
+        many seconds old, never when None.
+    fsync : str
+        Fsync policy of the active segment, as in CsvResultStore.
+
+    Methods
+    -------
+    append(record):
+        Writes one result to the active segment.
+    append_many(records):
+        Writes several results to the active segment with a single write.
+    read_page(page, page_size, player):
+        Returns one page of results, newest first, skipping segments by
+        their summaries.
+    iter_records():
+        Yields every result, oldest first.
+    player_stats(name):
+        Returns how many games a player has and their fewest and most
+        tries.
+    segments():
+        Returns the manifest entries of the segments, oldest first.
+    rotate():
+        Seals the active segment.
+    compact():
+        Compacts every sealed segment in the calling thread.
+    flush():
+        Fsyncs the active segment unless the policy is 'never'.
+    close():
+        Closes the active segment, stops the background thread and
+        releases the directory.
+
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 1 << 22,
+                 max_age: float = None, fsync: str = 'never',
+                 background: bool = True) -> None:
+        """Initializes the SegmentedResultStore instance.
+
+        Only the manifest is read. Segments sealed but not yet compacted
+        when the store was last closed are compacted in the background.
+
+        Parameters
+        ----------
+        directory : str
+            Directory of the store. Created if missing.
+        max_bytes : int
+            Size of the active segment at which it is sealed.
+        max_age : float, optional
+            Age in seconds at which the active segment is sealed.
+        fsync : str
+            One of FSYNC_POLICIES.
+        background : bool
+            Compact sealed segments on a background thread. Without it
+            they stay uncompressed until compact() is called.
+
+        Raises
+        ------
+        ValueError
+            If a setting is invalid or the manifest is of another version.
+        RuntimeError
+            If another store has the directory open.
+
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Invalid fsync policy: {fsync}")
+        if max_bytes < 1:
+            raise ValueError(f"Invalid segment size: {max_bytes}")
+        if max_age is not None and max_age <= 0:
+            raise ValueError(f"Invalid segment age: {max_age}")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.fsync = fsync
+        self._lock_fd = os.open(self._path(LOCK), os.O_RDWR | os.O_CREAT,
+                                0o666)
+        if not _try_lock(self._lock_fd):
+            os.close(self._lock_fd)
+            raise RuntimeError(f"Store directory is in use: {directory}")
+        try:
+            self._manifest = self._load()
+        except BaseException:
+            self._release()
+            raise
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._writer = None
+        self._size = None
+        self._compacting = set()
+        self._error = None
+        self._closed = False
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(
+                target=self._run, name='SegmentCompactor', daemon=True)
+            self._thread.start()
+
+    def _path(self, name: str) -> str:
+        """Returns the path of a file of the store."""
+        return os.path.join(self.directory, name)
+
+    def _load(self) -> dict:
+        """Returns the manifest, an empty one if there is none."""
+        try:
+            with open(self._path(MANIFEST), encoding='utf-8') as file:
+                manifest = json.load(file)
+        except FileNotFoundError:
+            return {'version': VERSION, 'next': 1, 'segments': []}
+        if manifest.get('version') != VERSION:
+            raise ValueError(
+                f"Unsupported manifest version: {manifest.get('version')}")
+        return manifest
+
+    def _save(self) -> None:
+        """Replaces the manifest atomically, under the lock."""
+        temporary = self._path(MANIFEST + '.tmp')
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(self._manifest, file, separators=(',', ':'))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self._path(MANIFEST))
+        _fsync_directory(self.directory)
+
+    def _measure(self, entry: dict) -> int:
+        """Returns the size of the active segment, under the lock."""
+        if self._size is None:
+            try:
+                self._size = os.stat(self._path(entry['file'])).st_size
+            except FileNotFoundError:
+                self._size = 0
+        return self._size
+
+    def _active(self) -> dict:
+        """Returns the active segment, starting one if needed, under the
+        lock. A full or old segment is sealed first."""
+        segments = self._manifest['segments']
+        entry = segments[-1] if segments else None
+        if entry is not None and entry['state'] == ACTIVE:
+            if self._measure(entry) <= len(HEADER) or (
+                    self._size < self.max_bytes and (
+                        self.max_age is None or
+                        time.time() - entry['created'] < self.max_age)):
+                return entry
+            self._seal(entry)
+        number = self._manifest['next']
+        entry = {'id': number, 'file': f'segment-{number:06d}.csv',
+                 'state': ACTIVE, 'created': time.time()}
+        self._manifest['next'] = number + 1
+        segments.append(entry)
+        self._save()
+        self._size = 0
+        return entry
+
+    def _seal(self, entry: dict) -> None:
+        """Seals the active segment and wakes the compactor, under the
+        lock."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        entry['state'] = SEALED
+        entry['sealed'] = time.time()
+        self._size = None
+        self._save()
+        self._wake.notify_all()
+
+    def append(self, record: dict) -> int:
+        """Writes one result to the active segment.
+
+        Parameters
+        ----------
+        record : dict
+            Game result keyed by FIELDNAMES.
+
+        Returns
+        -------
+        int
+            Number of bytes written.
+
+        """
+        return self.append_many([record])
+
+    def append_many(self, records: list) -> int:
+        """Writes several results to the active segment with a single
+        write.
+
+        The segment is sealed before the write if it is full or too old,
+        so a segment grows past max_bytes by at most one batch.
+
+        Parameters
+        ----------
+        records : list
+            Game results keyed by FIELDNAMES.
+
+        Returns
+        -------
+        int
+            Number of bytes written.
+
+        Raises
+        ------
+        ValueError
+            If the store has been closed.
+
+        """
+        if not records:
+            return 0
+        with self._lock:
+            if self._closed:
+                raise ValueError("Store is closed.")
+            entry = self._active()
+            if self._writer is None:
+                self._writer = CsvResultStore(self._path(entry['file']),
+                                              self.fsync)
+            written = self._writer.append_many(records)
+            # A new file got the header too.
+            self._size += written + (0 if self._size else len(HEADER))
+        return written
+
+    def _newest(self, entry: dict, count: int, player: str) -> list:
+        """Returns the newest count results of an uncompacted segment,
+        under the lock."""
+        if entry['state'] == ACTIVE and self._writer is not None:
+            return self._writer.read_page(0, count, player)
+        store = CsvResultStore(self._path(entry['file']))
+        try:
+            return store.read_page(0, count, player)
+        finally:
+            store.close()
+
+    def _slice(self, entry: dict, start: int, stop: int,
+               player: str) -> list:
+        """Returns results start..stop - 1 (of the player) of a compacted
+        segment, newest first, under the lock.
+
+        The segment is decompressed up to the last of them. Rows before
+        the slice are only matched against the player, never parsed.
+        """
+        file, _ = self._open(entry)
+        prefix = None if player is None else player.encode('utf-8') + b','
+        found = []
+        index = 0
+        with file:
+            next(file, None)  # The header.
+            for line in file:
+                quoted = b'"' in line
+                if prefix is not None and not quoted and \
+                        not line.startswith(prefix):
+                    continue
+                if quoted or index >= start:
+                    text = line.decode('utf-8')
+                    row = next(csv.reader([text])) if quoted else \
+                        text.rstrip('\r\n').split(',')
+                    if player is not None and row[0] != player:
+                        continue
+                    if index >= start:
+                        found.append(parse_row(row))
+                index += 1
+                if index == stop:
+                    break
+        return found[::-1]
+
+    def _open(self, entry: dict) -> tuple:
+        """Opens a segment for reading, under the lock.
+
+        Returns the file and how many bytes of it hold complete rows, None
+        for a compressed segment. The file is None if there is none yet.
+        Appends take the lock too, so the size never ends in a torn row.
+        """
+        path = self._path(entry['file'])
+        if entry['state'] == COMPACTED:
+            return gzip.open(path, 'rb'), None
+        try:
+            file = open(path, 'rb')
+        except FileNotFoundError:
+            return None, 0
+        return file, os.fstat(file.fileno()).st_size
+
+    def read_page(self, page: int = 0, page_size: int = 20,
+                  player: str = None) -> list:
+        """Returns one page of results, newest first, skipping segments by
+        their summaries.
+
+        Segments are walked from the newest. One whose summary counts no
+        more results (of the player) than are left to skip is skipped
+        without being opened. The summary also tells which of its results
+        the page holds, so a compacted segment is streamed up to them and
+        only those are kept. Uncompacted segments are read backwards.
+
+        Parameters
+        ----------
+        page : int
+            Page number, 0 is the newest results.
+        page_size : int
+            Results per page.
+        player : str, optional
+            Only return results of the player with this name.
+
+        Returns
+        -------
+        list
+            Game results keyed by FIELDNAMES.
+
+        """
+        skip = page * page_size
+        results = []
+        with self._lock:
+            for entry in reversed(self._manifest['segments']):
+                if len(results) == page_size:
+                    break
+                summary = entry.get('summary')
+                if summary is not None:
+                    count = summary['rows'] if player is None else \
+                        summary['players'].get(player, (0,))[0]
+                    if count <= skip:
+                        skip -= count
+                        continue
+                    stop = count - skip
+                    results.extend(self._slice(
+                        entry, max(stop - page_size + len(results), 0),
+                        stop, player))
+                    skip = 0
+                    continue
+                records = self._newest(
+                    entry, skip + page_size - len(results), player)
+                results.extend(records[skip:])
+                skip = max(skip - len(records), 0)
+        return results
+
+    def iter_records(self):
+        """Yields every result, oldest first.
+
+        Each segment is opened under the lock and read without it, so
+        saving goes on while the history is streamed.
+
+        Parameters
+        ----------
+        None
+
+        Yields
+        ------
+        dict
+            Game result keyed by FIELDNAMES.
+
+        """
+        with self._lock:
+            segments = list(self._manifest['segments'])
+        for entry in segments:
+            with self._lock:
+                file, size = self._open(entry)
+            if file is not None:
+                yield from _rows(file, size)
+
+    def player_stats(self, name: str) -> dict:
+        """Returns how many games a player has and their fewest and most
+        tries.
+
+        Compacted segments answer from their summaries, only the segments
+        not compacted yet are read.
+
+        Parameters
+        ----------
+        name : str
+            Name of the player.
+
+        Returns
+        -------
+        dict
+            'games', 'fewest_tries' and 'most_tries', the tries None if
+            the player has no games.
+
+        """
+        found, opened = [], []
+        with self._lock:
+            for entry in self._manifest['segments']:
+                summary = entry.get('summary')
+                if summary is None:
+                    opened.append(self._open(entry))
+                elif name in summary['players']:
+                    found.append(summary['players'][name])
+        for file, size in opened:
+            if file is not None:
+                players = summarize(
+                    record for record in _rows(file, size)
+                    if record['name'] == name)['players']
+                if name in players:
+                    found.append(players[name])
+        return {'games': sum(games for games, _, _ in found),
+                'fewest_tries': min((low for _, low, _ in found),
+                                    default=None),
+                'most_tries': max((high for _, _, high in found),
+                                  default=None)}
+
+    def segments(self) -> list:
+        """Returns the manifest entries of the segments, oldest first.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        list
+            Copies of the entries: 'id', 'file', 'state', 'created',
+            'sealed' once sealed and 'summary' once compacted.
+
+        """
+        with self._lock:
+            return [dict(entry) for entry in self._manifest['segments']]
+
+    def rotate(self) -> None:
+        """Seals the active segment, if it holds any results.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+
+        """
+        with self._lock:
+            segments = self._manifest['segments']
+            if segments and segments[-1]['state'] == ACTIVE and \
+                    self._measure(segments[-1]) > len(HEADER):
+                self._seal(segments[-1])
+
+    def _claim(self) -> dict:
+        """Returns a sealed segment nobody is compacting and claims it,
+        under the lock. None if there is none."""
+        for entry in self._manifest['segments']:
+            if entry['state'] == SEALED and \
+                    entry['id'] not in self._compacting:
+                self._compacting.add(entry['id'])
+                return entry
+        return None
+
+    def _compact(self, entry: dict) -> None:
+        """Compresses a claimed segment and records its summary.
+
+        The sealed file never changes, so it is read and compressed
+        without the lock. The manifest names the compressed file only once
+        it is complete and renamed into place.
+        """
+        try:
+            source = entry['file']
+            with self._lock:
+                file, size = self._open(entry)
+            records = [] if file is None else list(_rows(file, size))
+            target = source + '.gz'
+            temporary = self._path(target + '.tmp')
+            with open(temporary, 'wb') as raw:
+                with gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as data, \
+                        io.TextIOWrapper(data, encoding='utf-8',
+                                         newline='') as text:
+                    writer = csv.writer(text, lineterminator='\n')
+                    writer.writerow(FIELDNAMES)
+                    writer.writerows([record[field] for field in FIELDNAMES]
+                                     for record in records)
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.replace(temporary, self._path(target))
+            _fsync_directory(self.directory)
+            with self._lock:
+                entry.update(file=target, state=COMPACTED,
+                             summary=summarize(records))
+                self._save()
+                # Open readers keep their file, except on Windows, where
+                # the leftover is removed by the next background thread.
+                for name in (source, source + '.lock'):
+                    with contextlib.suppress(OSError):
+                        os.remove(self._path(name))
+        finally:
+            with self._wake:
+                self._compacting.discard(entry['id'])
+                self._wake.notify_all()
+
+    def compact(self) -> int:
+        """Compacts every sealed segment in the calling thread.
+
+        Segments the background thread is compacting are waited for.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        int
+            Number of segments this call compacted.
+
+        """
+        count = 0
+        while True:
+            with self._wake:
+                entry = self._claim()
+                if entry is None:
+                    while self._compacting:
+                        self._wake.wait()
+                    return count
+            self._compact(entry)
+            count += 1
+
+    def _remove_leftovers(self) -> None:
+        """Removes the segment files the manifest does not name, such as
+        those of a compaction cut short."""
+        with self._lock:
+            keep = {MANIFEST}
+            for entry in self._manifest['segments']:
+                keep.update((entry['file'], entry['file'] + '.lock'))
+                if entry['id'] in self._compacting:
+                    keep.add(entry['file'] + '.gz.tmp')
+            for name in os.listdir(self.directory):
+                if name not in keep and (name.startswith('segment-') or
+                                         name == MANIFEST + '.tmp'):
+                    with contextlib.suppress(OSError):
+                        os.remove(self._path(name))
+
+    def _run(self) -> None:
+        """Background thread: compacts sealed segments as they come."""
+        try:
+            self._remove_leftovers()
+            while True:
+                with self._wake:
+                    while not self._closed:
+                        entry = self._claim()
+                        if entry is not None:
+                            break
+                        self._wake.wait()
+                    else:
+                        return
+                self._compact(entry)
+        except Exception as error:  # pylint: disable=broad-except
+            self._error = self._error or error
+
+    def _raise_error(self) -> None:
+        """Re-raises an error of the background thread once."""
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def flush(self) -> None:
+        """Fsyncs the active segment unless the policy is 'never'.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        Exception
+            The error that stopped the background thread, if any.
+
+        """
+        with self._lock:
+            if self._writer is not None:
+                self._writer.flush()
+        self._raise_error()
+
+    def close(self) -> None:
+        """Closes the active segment, stops the background thread and
+        releases the directory.
+
+        A compaction in progress is finished, sealed segments left are
+        compacted by the next store of the directory.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+
+        """
+        with self._wake:
+            self._closed = True
+            self._wake.notify_all()
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._release()
+        self._raise_error()
+
+    def _release(self) -> None:
+        """Releases the lock of the directory."""
+        if self._lock_fd is not None:
+            _unlock(self._lock_fd)
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+
+def _rows(file, size: int):
+    """Yields the results of an opened segment, then closes it."""
+    with file:
+        lines = file if size is None else _lines(file, size)
+        for row in csv.reader(line.decode('utf-8') for line in lines):
+            if len(row) == len(FIELDNAMES) and tuple(row) != FIELDNAMES:
+                yield parse_row(row)
+
+
+def summarize(records) -> dict:
+    """Returns the summary of a segment's results.
+
+    Parameters
+    ----------
+    records : iterable
+        Game results keyed by FIELDNAMES.
+
+    Returns
+    -------
+    dict
+        'rows': number of results, 'min_tries' and 'max_tries': fewest and
+        most tries, None without results, and 'players': name ->
+        [games, fewest tries, most tries].
+
+    """
+    rows, players = 0, {}
+    for record in records:
+        rows += 1
+        tries = record['total_tries']
+        stats = players.get(record['name'])
+        if stats is None:
+            players[record['name']] = [1, tries, tries]
+        else:
+            stats[0] += 1
+            stats[1] = min(stats[1], tries)
+            stats[2] = max(stats[2], tries)
+    return {'rows': rows,
+            'min_tries': min((low for _, low, _ in players.values()),
+                             default=None),
+            'max_tries': max((high for _, _, high in players.values()),
+                             default=None),
+            'players': players}
+
+
+def convert_csv(csv_path: str, directory: str, max_bytes: int = 1 << 22,
+                batch_size: int = 1 << 12) -> int:
+    """Copies a CSV save file into a segmented store.
+
+    The CSV is streamed and every segment but the last is compacted before
+    returning.
+
+    Parameters
+    ----------
+    csv_path : str
+        Path to the CSV save file.
+    directory : str
+        Directory of the store, appended to if it exists.
+    max_bytes : int
+        Size at which segments are sealed.
+    batch_size : int
+        Results appended at a time.
+
+    Returns
+    -------
+    int
+        Number of results converted.
+
+    """
+    store = SegmentedResultStore(directory, max_bytes, background=False)
+    count, batch = 0, []
+    for record in CsvResultStore(csv_path).iter_records():
+        batch.append(record)
+        if len(batch) >= batch_size:
+            count += len(batch)
+            store.append_many(batch)
+            batch = []
+    count += len(batch)
+    store.append_many(batch)
+    store.compact()
+    store.close()
+    return count
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit('usage: python segmented_store.py <csv_path> <directory>')
+    print(f'{convert_csv(sys.argv[1], sys.argv[2])} results converted.')
@@ -0,0 +1,410 @@
+'''
+simulation Module
+
+This module plays NumberGame rounds headlessly and in bulk. Instead of one
+game driven through input(), a whole batch of games is held in NumPy arrays,
+one list per game, and every round of guessing is applied to all unfinished
+games at once. The result is the distribution of total tries, which is what
+difficulty tuning needs.
+
+The simulated player guesses uniformly at random among the numbers still in
+the list. The rules are the ones NumberGame uses: a wrong guess is removed,
+the first miss keeps only the numbers within `window` of the lucky number,
+and every later miss drops random non-winning numbers as the shrink schedule
+of the difficulty says (see difficulty.shrink_schedule).
+
+Functions
+---------
+simulate(n_games, seed, low, high, list_size, window, drops, chunk_size)
+    plays n_games games and returns the histogram of total tries
+simulate_parallel(n_games, seed, workers, ...)
+    same as simulate, spread over a pool of processes
+simulate_chunk(n_games, seed_seq, low, high, list_size, window, drops)
+    plays one batch of games from its own seed
+sample_lists(rng, n_games, low, high, list_size)
+    draws the starting list of every game in a batch
+mean_tries(histogram)
+    returns the average number of tries of a histogram
+
+Example usage
+-------------
+histogram = simulate(1_000_000, seed=7)
+print(histogram[1:] / histogram.sum(), mean_tries(histogram))
+
+From the command line, for CI runs against a stored baseline:
+python simulation.py 1e9 --seed 7 --workers 8 --baseline base.json
+
+Notes:
+Only the first miss depends on the values in the list. After it every
+remaining non-winning number is equally likely to be guessed or dropped, so
+from the second round on each game is tracked by how many of them are left.
+Lists longer than LIST_LIMIT are not drawn at all: the outcome of the first
+miss is drawn from its exact (hypergeometric) distribution instead. Ranges
+too wide for numpy's hypergeometric sampler draw it one number at a time.
+
+Games are split into fixed batches of chunk_size and batch i always draws
+from spawn key (i,) of the master seed. Histograms are integer counts, so
+adding them up gives the same result whatever the number of workers.
+
+'''
+
+import os
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from difficulty import PROFILES, shrink_schedule
+
+CHUNK_SIZE = 1 << 18
+# Longer lists skip drawing the lists, which costs list_size**2 per game.
+LIST_LIMIT = 64
+# numpy's hypergeometric sampler takes fewer good and bad items than this.
+HYPERGEOMETRIC_LIMIT = 10**9
+
+
+def _check_config(low: int, high: int, list_size: int, window: int,
+                  drops) -> None:
+    """Raises ValueError if the game configuration cannot be played."""
+    if high < low:
+        raise ValueError(f"Invalid range: {low}-{high}")
+    if not 1 <= list_size <= high - low + 1:
+        raise ValueError(f"Invalid list size: {list_size}")
+    if window < 1:
+        raise ValueError(f"Invalid window: {window}")
+    shrink_schedule(list_size, drops)
+
+
+def _dtype(low: int, high: int):
+    """Returns the smallest integer dtype used for numbers in low-high.
+
+    Lists are drawn as offsets from low, so the span has to fit as well.
+    """
+    info = np.iinfo(np.int32)
+    return np.int32 if info.min <= low and high <= info.max and \
+        high - low <= info.max else np.int64
+
+
+def sample_lists(rng: np.random.Generator, n_games: int, low: int,
+                 high: int, list_size: int) -> np.ndarray:
+    """Draws list_size distinct numbers in low-high for every game.
+
+    Floyd's algorithm is run one list position at a time for all games at
+    once, so every number costs one draw and there are no retries.
+
+    Parameters
+    ----------
+    rng : numpy.random.Generator
+        Source of randomness.
+    n_games : int
+        Number of lists to draw.
+    low, high : int
+        Inclusive range of the numbers.
+    list_size : int
+        Numbers per list.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape (list_size, n_games), column g is the list of game g.
+        Keeping the games along the last axis makes every step a contiguous
+        pass over memory.
+
+    """
+    span = high - low + 1
+    dtype = _dtype(low, high)
+    lists = np.empty((list_size, n_games), dtype=dtype)
+    for row, top in enumerate(range(span - list_size, span)):
+        pick = rng.integers(0, top + 1, size=n_games, dtype=dtype)
+        taken = (lists[:row] == pick).any(axis=0)
+        lists[row] = np.where(taken, top, pick)
+    lists += low
+    return lists
+
+
+def simulate_chunk(n_games: int, seed_seq: np.random.SeedSequence,
+                   low: int = 0, high: int = 100, list_size: int = 10,
+                   window: int = 10, drops=1) -> np.ndarray:
+    """Plays one batch of games from its own seed.
+
+    Parameters
+    ----------
+    n_games : int
+        Number of games in the batch.
+    seed_seq : numpy.random.SeedSequence
+        Seed of the batch. The same seed always gives the same histogram.
+    low, high : int
+        Inclusive range of the numbers.
+    list_size : int
+        Numbers in the list at the start, including the lucky number.
+    window : int
+        Numbers closer than this to the lucky number survive the first miss.
+    drops : int or tuple
+        Numbers dropped per miss after the first, as in DifficultyProfile.
+
+    Returns
+    -------
+    numpy.ndarray
+        histogram[t] is the number of games won on try t.
+
+    """
+    rng = np.random.default_rng(seed_seq)
+    schedule = shrink_schedule(list_size, drops)
+    histogram = np.zeros(list_size + 1, dtype=np.int64)
+    if list_size <= LIST_LIMIT:
+        histogram[1], decoys = _first_round_lists(
+            rng, n_games, low, high, list_size, window)
+    else:
+        histogram[1], decoys = _first_round_drawn(
+            rng, n_games, low, high, list_size, window)
+
+    # Later rounds: win with chance 1/(decoys + 1), else the guessed number
+    # and the scheduled drops leave the list.
+    for tries in range(2, list_size + 1):
+        if decoys.size == 0:
+            break
+        won = rng.random(decoys.size) * (decoys + 1) < 1
+        histogram[tries] = np.count_nonzero(won)
+        removed = 1 + schedule[min(tries, len(schedule)) - 1]
+        decoys = np.maximum(decoys[~won] - removed, 0)
+    return histogram
+
+
+def _first_round_lists(rng: np.random.Generator, n_games: int, low: int,
+                       high: int, list_size: int, window: int) -> tuple:
+    """Plays the first round on drawn lists.
+
+    Returns the number of games won on try 1 and, for every other game,
+    how many non-winning numbers are left after the first miss.
+    """
+    lists = sample_lists(rng, n_games, low, high, list_size)
+    games = np.arange(n_games)
+    lucky = lists[rng.integers(0, list_size, size=n_games), games]
+
+    # Round 1: the list is whole, so the guess hits with chance 1/list_size.
+    guess = lists[rng.integers(0, list_size, size=n_games), games]
+    won = guess == lucky
+
+    # First miss: drop the guess, keep only numbers close to the lucky one.
+    lists, lucky, guess = lists[:, ~won], lucky[~won], guess[~won]
+    close = np.abs(lists.astype(np.int64) - lucky) < window
+    close &= (lists != lucky) & (lists != guess)
+    return np.count_nonzero(won), np.count_nonzero(close, axis=0)
+
+
+def _first_round_drawn(rng: np.random.Generator, n_games: int, low: int,
+                       high: int, list_size: int, window: int) -> tuple:
+    """Plays the first round without drawing the lists.
+
+    After a first miss the list_size - 2 numbers left besides the lucky
+    one are a uniform sample of the other numbers in range, so how many of
+    them are within the window is hypergeometric. Drawing that directly
+    gives the same distribution as _first_round_lists.
+    """
+    won = rng.random(n_games) * list_size < 1
+    lucky = rng.integers(low, high + 1, size=n_games - np.count_nonzero(won))
+    close = np.minimum(lucky - low, window - 1) \
+        + np.minimum(high - lucky, window - 1)
+    decoys = _hypergeometric(rng, close, high - low - close, list_size - 2)
+    return np.count_nonzero(won), decoys
+
+
+def _hypergeometric(rng: np.random.Generator, good: np.ndarray,
+                    bad: np.ndarray, draws: int) -> np.ndarray:
+    """Draws how many of draws without replacement are good, per game.
+
+    Populations numpy cannot sample are drawn one item at a time, each a
+    good one with chance good left / items left. That is exact, and costs
+    draws steps over all games.
+    """
+    if bad.size == 0 or max(good.max(), bad.max()) < HYPERGEOMETRIC_LIMIT:
+        return rng.hypergeometric(good, bad, draws)
+    good = good.astype(np.int64)
+    total = good + bad
+    count = np.zeros(good.size, dtype=np.int64)
+    for _ in range(draws):
+        hit = rng.random(good.size) * total < good
+        count += hit
+        good -= hit
+        total -= 1
+    return count
+
+
+def simulate(n_games: int, seed=None, low: int = 0, high: int = 100,
+             list_size: int = 10, window: int = 10, drops=1,
+             chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+    """Plays n_games games and returns the histogram of total tries.
+
+    Games are played in batches of chunk_size to bound memory. Batch i is
+    seeded from spawn key (i,) of the master seed, so a seed determines the
+    result completely.
+
+    Parameters
+    ----------
+    n_games : int
+        Number of games to play.
+    seed : int, optional
+        Master seed. A random one is used when left out.
+    low, high : int
+        Inclusive range of the numbers.
+    list_size : int
+        Numbers in the list at the start, including the lucky number.
+    window : int
+        Numbers closer than this to the lucky number survive the first miss.
+    drops : int or tuple
+        Numbers dropped per miss after the first, as in DifficultyProfile.
+    chunk_size : int
+        Games per batch.
+
+    Returns
+    -------
+    numpy.ndarray
+        histogram[t] is the number of games won on try t.
+
+    Raises
+    ------
+    ValueError
+        If the configuration cannot be played.
+
+    """
+    _check_config(low, high, list_size, window, drops)
+    entropy = np.random.SeedSequence(seed).entropy
+    n_chunks = -(-n_games // chunk_size)
+    return _simulate_span((entropy, 0, n_chunks, n_games, chunk_size,
+                           (low, high, list_size, window, drops)))
+
+
+def simulate_parallel(n_games: int, seed=None, workers: int = None,
+                      low: int = 0, high: int = 100, list_size: int = 10,
+                      window: int = 10, drops=1, chunk_size: int = CHUNK_SIZE,
+                      chunks_per_task: int = 16) -> np.ndarray:
+    """Plays n_games games on a pool of processes.
+
+    The batches are the same as in simulate and every worker sends back
+    only the summed histogram of its batches. For a given seed and
+    chunk_size the result is bit-identical to simulate, whatever the
+    number of workers.
+
+    Parameters
+    ----------
+    n_games : int
+        Number of games to play.
+    seed : int, optional
+        Master seed. A random one is used when left out.
+    workers : int, optional
+        Number of processes. Defaults to the number of CPUs.
+    low, high, list_size, window, drops, chunk_size
+        As in simulate.
+    chunks_per_task : int
+        Batches handed to a worker at a time.
+
+    Returns
+    -------
+    numpy.ndarray
+        histogram[t] is the number of games won on try t.
+
+    Raises
+    ------
+    ValueError
+        If the configuration cannot be played.
+
+    """
+    _check_config(low, high, list_size, window, drops)
+    entropy = np.random.SeedSequence(seed).entropy
+    config = (low, high, list_size, window, drops)
+    n_chunks = -(-n_games // chunk_size)
+    tasks = [(entropy, first, min(first + chunks_per_task, n_chunks),
+              n_games, chunk_size, config)
+             for first in range(0, n_chunks, chunks_per_task)]
+    histogram = np.zeros(list_size + 1, dtype=np.int64)
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        for task in tasks:
+            histogram += _simulate_span(task)
+        return histogram
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for partial in pool.map(_simulate_span, tasks):
+            histogram += partial
+    return histogram
+
+
+def _simulate_span(task: tuple) -> np.ndarray:
+    """Plays batches first to last - 1 and returns their summed histogram.
+
+    Takes a single tuple so it can be sent to a process pool.
+    """
+    entropy, first, last, n_games, chunk_size, config = task
+    histogram = np.zeros(config[2] + 1, dtype=np.int64)
+    for index in range(first, last):
+        seed_seq = np.random.SeedSequence(entropy, spawn_key=(index,))
+        size = min(chunk_size, n_games - index * chunk_size)
+        histogram += simulate_chunk(size, seed_seq, *config)
+    return histogram
+
+
+def mean_tries(histogram: np.ndarray) -> float:
+    """Returns the average number of tries of a histogram.
+
+    Parameters
+    ----------
+    histogram : numpy.ndarray
+        histogram[t] is the number of games won on try t.
+
+    Returns
+    -------
+    float
+        The mean of total tries.
+
+    """
+    return float(np.dot(np.arange(histogram.size), histogram)
+                 / histogram.sum())
+
+
+def main(argv=None) -> int:
+    """Runs a simulation from the command line.
+
+    Prints the histogram as JSON, optionally writes it to --output and
+    compares it to a --baseline written the same way.
+
+    Parameters
+    ----------
+    argv : list, optional
+        Command line arguments, sys.argv[1:] when left out.
+
+    Returns
+    -------
+    int
+        0 on success, 1 if the histogram differs from the baseline.
+
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('games', type=lambda text: int(float(text)))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--difficulty', choices=sorted(PROFILES),
+                        default='normal')
+    parser.add_argument('--output')
+    parser.add_argument('--baseline')
+    args = parser.parse_args(argv)
+
+    profile = PROFILES[args.difficulty]
+    histogram = simulate_parallel(
+        args.games, args.seed, args.workers, profile.low, profile.high,
+        profile.list_size, profile.window, profile.drops)
+    result = {
+        'games': args.games, 'seed': args.seed,
+        'difficulty': args.difficulty, 'histogram': histogram.tolist()}
+    print(json.dumps(result))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(result, file, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            if json.load(file) != result:
+                print('Histogram differs from the baseline.', file=sys.stderr)
+                return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,239 @@
+'''
+solver Module
+
+This module computes the exact distribution of total tries of a NumberGame
+round, for the same simulated player as the simulation module: every guess
+is uniform among the numbers still in the list. Where simulate plays games
+and counts, this works the probabilities out, so difficulty tuning gets the
+answer without sampling noise and in milliseconds.
+
+The rules reduce to two steps:
+
+first miss
+    The lucky number is uniform in the range. The list_size - 2 numbers
+    left besides it and the guess are a uniform sample of the other
+    numbers, so how many of them survive the window (the decoys) is
+    hypergeometric in the count of numbers within the window of the lucky
+    one. That count only depends on how close the lucky number is to the
+    ends of the range, so lucky numbers are grouped by it.
+later misses
+    With d decoys the guess wins with chance 1 / (d + 1). A miss removes
+    the guess and the drops of the shrink schedule. The distribution over
+    d is carried forward one try at a time.
+
+Functions
+---------
+exact_distribution(low, high, list_size, window, drops)
+    returns the probability of winning on every try
+expected_tries(low, high, list_size, window, drops)
+    returns the exact mean of total tries
+compare(histogram, distribution)
+    returns how far a simulated histogram is from the exact distribution
+
+Example usage
+-------------
+exact = exact_distribution(0, 100, 10, 10)
+print(exact[1:], expected_tries(0, 100, 10, 10))
+print(compare(simulate(1_000_000, seed=7), exact))
+
+From the command line:
+python solver.py --difficulty hard --games 1e6
+
+Notes:
+Results are cached per configuration. The arrays returned are read-only,
+copy one before changing it.
+
+'''
+
+import sys
+import json
+import argparse
+from functools import lru_cache
+import numpy as np
+from difficulty import PROFILES, shrink_schedule
+from simulation import _check_config, simulate, mean_tries
+
+
+def _hypergeometric(good: int, bad: int, draws: int) -> np.ndarray:
+    """Returns P(k good) of draws without replacement, for k = 0..draws.
+
+    The terms are built in log space from the ratio of neighbouring terms,
+    shifted so the largest is 1 and normalised, so large ranges neither
+    overflow nor underflow nor need big binomials.
+    """
+    pmf = np.zeros(draws + 1)
+    first, last = max(0, draws - bad), min(good, draws)
+    if first > last:
+        return pmf
+    k = np.arange(first, last, dtype=np.float64)
+    log_terms = np.zeros(last - first + 1)
+    log_terms[1:] = np.cumsum(np.log(good - k) + np.log(draws - k)
+                              - np.log(k + 1) - np.log(bad - draws + k + 1))
+    terms = np.exp(log_terms - log_terms.max())
+    pmf[first:last + 1] = terms / terms.sum()
+    return pmf
+
+
+def _close_counts(span: int, window: int) -> dict:
+    """Returns {numbers within the window: lucky numbers with that many}."""
+    reach = window - 1
+    edges = set(range(min(reach, span))) \
+        | set(range(max(span - reach, 0), span))
+    counts = {}
+    for index in edges:
+        close = min(index, reach) + min(span - 1 - index, reach)
+        counts[close] = counts.get(close, 0) + 1
+    if span > len(edges):
+        counts[2 * reach] = counts.get(2 * reach, 0) + span - len(edges)
+    return counts
+
+
+@lru_cache(maxsize=256)
+def _distribution(span: int, list_size: int, window: int,
+                  schedule: tuple) -> np.ndarray:
+    """Returns the exact distribution of total tries of one configuration."""
+    distribution = np.zeros(list_size + 1)
+    distribution[1] = 1 / list_size
+    if list_size > 1:
+        # Decoys after the first miss, mixed over the lucky number groups.
+        draws = list_size - 2
+        decoys = np.zeros(draws + 1)
+        for close, count in _close_counts(span, window).items():
+            decoys += count * _hypergeometric(close, span - 1 - close, draws)
+        decoys *= (1 - distribution[1]) / span
+
+        for tries in range(2, list_size + 1):
+            if not decoys.any():
+                break
+            chance = 1 / np.arange(1, decoys.size + 1)
+            distribution[tries] = np.dot(decoys, chance)
+            missed = decoys * (1 - chance)
+            removed = 1 + schedule[min(tries, len(schedule)) - 1]
+            # d decoys become max(d - removed, 0).
+            decoys = np.zeros(max(missed.size - removed, 1))
+            decoys[0] = missed[:removed + 1].sum()
+            decoys[1:] = missed[removed + 1:]
+    distribution.setflags(write=False)
+    return distribution
+
+
+def exact_distribution(low: int = 0, high: int = 100, list_size: int = 10,
+                       window: int = 10, drops=1) -> np.ndarray:
+    """Returns the probability of winning on every try.
+
+    Parameters
+    ----------
+    low, high : int
+        Inclusive range of the numbers.
+    list_size : int
+        Numbers in the list at the start, including the lucky number.
+    window : int
+        Numbers closer than this to the lucky number survive the first miss.
+    drops : int or tuple
+        Numbers dropped per miss after the first, as in DifficultyProfile.
+
+    Returns
+    -------
+    numpy.ndarray
+        distribution[t] is the chance of winning on try t, read-only. It
+        is laid out like the histograms of simulation.simulate.
+
+    Raises
+    ------
+    ValueError
+        If the configuration cannot be played.
+
+    """
+    _check_config(low, high, list_size, window, drops)
+    return _distribution(high - low + 1, list_size, window,
+                         shrink_schedule(list_size, drops))
+
+
+def expected_tries(low: int = 0, high: int = 100, list_size: int = 10,
+                   window: int = 10, drops=1) -> float:
+    """Returns the exact mean of total tries.
+
+    Parameters
+    ----------
+    low, high, list_size, window, drops
+        As in exact_distribution.
+
+    Returns
+    -------
+    float
+        The expected number of tries.
+
+    """
+    distribution = exact_distribution(low, high, list_size, window, drops)
+    return float(np.dot(np.arange(distribution.size), distribution))
+
+
+def compare(histogram: np.ndarray, distribution: np.ndarray) -> dict:
+    """Returns how far a simulated histogram is from the exact distribution.
+
+    Parameters
+    ----------
+    histogram : numpy.ndarray
+        histogram[t] is the number of games won on try t, as simulate
+        returns it.
+    distribution : numpy.ndarray
+        Exact distribution of the same configuration.
+
+    Returns
+    -------
+    dict
+        'total_variation': half the summed absolute difference of the
+        probabilities, 'max_error': the largest difference on one try,
+        'mean_error': simulated minus exact mean tries, and 'games'.
+
+    """
+    games = int(histogram.sum())
+    error = np.asarray(histogram, dtype=np.float64) / games - distribution
+    exact_mean = float(np.dot(np.arange(distribution.size), distribution))
+    return {
+        'games': games,
+        'total_variation': float(np.abs(error).sum() / 2),
+        'max_error': float(np.abs(error).max()),
+        'mean_error': mean_tries(histogram) - exact_mean,
+    }
+
+
+def main(argv=None) -> int:
+    """Prints the exact distribution of a difficulty.
+
+    With --games a simulation of that many games is compared to it.
+
+    Parameters
+    ----------
+    argv : list, optional
+        Command line arguments, sys.argv[1:] when left out.
+
+    Returns
+    -------
+    int
+        0.
+
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--difficulty', choices=sorted(PROFILES),
+                        default='normal')
+    parser.add_argument('--games', type=lambda text: int(float(text)))
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    profile = PROFILES[args.difficulty]
+    config = (profile.low, profile.high, profile.list_size, profile.window,
+              profile.drops)
+    distribution = exact_distribution(*config)
+    result = {'difficulty': args.difficulty,
+              'expected_tries': expected_tries(*config),
+              'distribution': distribution.tolist()}
+    if args.games:
+        result['simulated'] = compare(simulate(args.games, args.seed,
+                                               *config), distribution)
+    print(json.dumps(result))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
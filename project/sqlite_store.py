@@ -0,0 +1,484 @@
+'''
+sqlite_store Module
+
+This module holds an SQLite backend for game results. Unlike the CSV file,
+the database answers "every game of this player" and "the best games this
+week" from indexes, without reading the rest of the history.
+
+Every result is one row of the results table, with the time it was saved.
+The database runs in WAL mode, so readers never block the writer, and has
+indexes on the player name and on the time played.
+
+Classes
+-------
+SqliteResultStore
+    results backend storing every result as a row of an SQLite database
+
+Functions
+---------
+convert_csv(csv_path, db_path)
+    copies a CSV save file into a database
+
+Example usage
+-------------
+store = SqliteResultStore('docs/game_save.db')
+game = NumberGame(gamer, store)
+...
+print(store.player_records('Tyra Forsgren', '20030717'))
+print(store.best_scores(since=time.time() - WEEK))
+
+From the command line:
+python sqlite_store.py docs/game_save.csv docs/game_save.db
+
+Notes:
+Stores of the same database in one process share one connection, and with
+it one lock: SQLite connections are not safe to use from two threads at
+once. A store used in a process started with fork opens a connection of
+its own there and drops the results its parent had not committed yet, the
+parent commits those. The fsync policy is set on the shared connection,
+the store opened last decides it.
+
+'''
+
+import os
+import csv
+import sys
+import time
+import sqlite3
+import itertools
+import threading
+from results_store import ResultsStore, FIELDNAMES, FSYNC_POLICIES
+
+WEEK = 7 * 24 * 3600
+# PRAGMA synchronous for every fsync policy of the CSV store.
+SYNCHRONOUS = {'never': 'OFF', 'flush': 'NORMAL', 'always': 'FULL'}
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    birthday TEXT NOT NULL,
+    age INTEGER NOT NULL,
+    lucky_number INTEGER NOT NULL,
+    total_tries INTEGER NOT NULL,
+    played_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_player ON results (name, id);
+CREATE INDEX IF NOT EXISTS results_played_at ON results (played_at);
+'''
+INSERT = ('INSERT INTO results (name, birthday, age, lucky_number, '
+          'total_tries, played_at) VALUES (?, ?, ?, ?, ?, ?)')
+COLUMNS = ', '.join(FIELDNAMES)
+# Rows fetched at a time by iter_records.
+SCAN_BLOCK = 1 << 16
+
+# (process id, absolute path) -> [connection, lock, stores using it]
+_connections = {}
+_connections_lock = threading.Lock()
+
+
+def _acquire(path: str, synchronous: str) -> tuple:
+    """Returns the connection and lock of a database, opening it once."""
+    key = (os.getpid(), os.path.abspath(path))
+    with _connections_lock:
+        shared = _connections.get(key)
+        if shared is None:
+            connection = sqlite3.connect(path, check_same_thread=False,
+                                         isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(SCHEMA)
+            shared = _connections[key] = [connection, threading.Lock(), 0]
+        with shared[1]:
+            shared[0].execute(f'PRAGMA synchronous={synchronous}')
+        shared[2] += 1
+        return shared[0], shared[1]
+
+
+def _forget_connections() -> None:
+    """Drops the connections of the parent in a child started with fork.
+
+    They belong to the parent and are neither used nor closed here. The
+    lock is replaced, another thread may have held it during the fork.
+    """
+    global _connections_lock  # pylint: disable=global-statement
+    _connections.clear()
+    _connections_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):  # Not on Windows.
+    os.register_at_fork(after_in_child=_forget_connections)
+
+
+def _release(path: str) -> None:
+    """Closes the connection of a database when no store uses it."""
+    key = (os.getpid(), os.path.abspath(path))
+    with _connections_lock:
+        shared = _connections.get(key)
+        if shared is None:
+            return
+        shared[2] -= 1
+        if shared[2] == 0:
+            del _connections[key]
+            shared[0].close()
+
+
+class SqliteResultStore(ResultsStore):
+    """
+    SqliteResultStore keeps game results as rows of an SQLite database.
+
+    Attributes
+    ----------
+    path : str
+        Path to the database file.
+    fsync : str
+        When to sync, as in CsvResultStore: 'never' leaves it to the OS,
+        'flush' syncs at WAL checkpoints, 'always' on every commit.
+    batch_size : int
+        Results appended one at a time are committed together once this
+        many are waiting, or on flush, close and any read.
+
+    Methods
+    -------
+    append(record):
+        Inserts one result.
+    append_many(records):
+        Inserts several results in one transaction.
+    read_page(page, page_size, player):
+        Returns one page of results, newest first.
+    iter_records():
+        Yields every result, oldest first.
+    player_records(name, birthday, limit):
+        Returns the results of one player, newest first.
+    best_scores(since, limit):
+        Returns the results with the fewest tries.
+    flush():
+        Commits the waiting results.
+    close():
+        Commits and releases the connection.
+
+    """
+
+    def __init__(self, path: str, fsync: str = 'flush',
+                 batch_size: int = 1) -> None:
+        """Initializes the SqliteResultStore instance.
+
+        Parameters
+        ----------
+        path : str
+            Path to the database file. Created with its tables if missing.
+        fsync : str
+            One of FSYNC_POLICIES.
+        batch_size : int
+            Results to commit together. The default 1 commits every append,
+        so a result is saved when append returns, as with the CSV store;
+        the game server sends WIN only after that. Raise it, or wrap the
+        store in a BatchedResultWriter, when throughput matters more.
+
+        Raises
+        ------
+        ValueError
+            If the fsync policy or batch size is invalid.
+
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Invalid fsync policy: {fsync}")
+        if batch_size < 1:
+            raise ValueError(f"Invalid batch size: {batch_size}")
+        self.path = path
+        self.fsync = fsync
+        self.batch_size = batch_size
+        self._pending = []
+        self._pid = os.getpid()
+        self._connection, self._lock = _acquire(path, SYNCHRONOUS[fsync])
+
+    def _check_process(self) -> None:
+        """Opens a connection of this process after a fork."""
+        if self._pid != os.getpid() and self._connection is not None:
+            self._pid = os.getpid()
+            self._pending = []
+            self._connection, self._lock = _acquire(
+                self.path, SYNCHRONOUS[self.fsync])
+
+    def append(self, record: dict) -> int:
+        """Inserts one result, committing once batch_size are waiting.
+
+        Parameters
+        ----------
+        record : dict
+            Game result keyed by FIELDNAMES. A 'played_at' key, in seconds
+            since the epoch, overrides the time of saving.
+
+        Returns
+        -------
+        int
+            Estimated bytes of the inserted values, see _size.
+
+        """
+        self._check_process()
+        row = _row(record)
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self._commit()
+        return _size(row)
+
+    def append_many(self, records: list) -> int:
+        """Inserts several results in one transaction.
+
+        Parameters
+        ----------
+        records : list
+            Game results keyed by FIELDNAMES.
+
+        Returns
+        -------
+        int
+            Estimated bytes of the inserted values, see _size.
+
+        """
+        self._check_process()
+        rows = [_row(record) for record in records]
+        with self._lock:
+            self._pending.extend(rows)
+            self._commit()
+        return sum(map(_size, rows))
+
+    def _commit(self) -> None:
+        """Inserts the waiting results in one transaction, under the lock."""
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        with self._connection:
+            self._connection.execute('BEGIN')
+            self._connection.executemany(INSERT, rows)
+
+    def _query(self, sql: str, parameters: tuple = ()) -> list:
+        """Returns the results a query selects, after committing."""
+        self._check_process()
+        with self._lock:
+            self._commit()
+            rows = self._connection.execute(sql, parameters).fetchall()
+        return [dict(zip(FIELDNAMES, row)) for row in rows]
+
+    def read_page(self, page: int = 0, page_size: int = 20,
+                  player: str = None) -> list:
+        """Returns one page of results, newest first.
+
+        Parameters
+        ----------
+        page : int
+            Page number, 0 is the newest results.
+        page_size : int
+            Results per page.
+        player : str, optional
+            Only return results of the player with this name. The page is
+            read from the player index.
+
+        Returns
+        -------
+        list
+            Game results keyed by FIELDNAMES.
+
+        """
+        if player is None:
+            return self._query(
+                f'SELECT {COLUMNS} FROM results ORDER BY id DESC '
+                'LIMIT ? OFFSET ?', (page_size, page * page_size))
+        return self._query(
+            f'SELECT {COLUMNS} FROM results WHERE name = ? '
+            'ORDER BY id DESC LIMIT ? OFFSET ?',
+            (player, page_size, page * page_size))
+
+    def iter_records(self):
+        """Yields every result, oldest first.
+
+        Rows are fetched SCAN_BLOCK at a time, so other threads can use
+        the store between blocks.
+
+        Parameters
+        ----------
+        None
+
+        Yields
+        ------
+        dict
+            Game result keyed by FIELDNAMES.
+
+        """
+        self._check_process()
+        last = 0
+        while True:
+            with self._lock:
+                self._commit()
+                rows = self._connection.execute(
+                    f'SELECT id, {COLUMNS} FROM results WHERE id > ? '
+                    'ORDER BY id LIMIT ?', (last, SCAN_BLOCK)).fetchall()
+            for row in rows:
+                yield dict(zip(FIELDNAMES, row[1:]))
+            if len(rows) < SCAN_BLOCK:
+                return
+            last = rows[-1][0]
+
+    def player_records(self, name: str, birthday: str,
+                       limit: int = None) -> list:
+        """Returns the results of one player, newest first.
+
+        Parameters
+        ----------
+        name : str
+            Name of the player.
+        birthday : str
+            Birthdate of the player, 'YYYYMMDD'. Players are keyed by name
+            and birthday, as in the leaderboard module.
+        limit : int, optional
+            Return at most this many results.
+
+        Returns
+        -------
+        list
+            Game results keyed by FIELDNAMES.
+
+        """
+        return self._query(
+            f'SELECT {COLUMNS} FROM results WHERE name = ? AND birthday = ? '
+            'ORDER BY id DESC LIMIT ?',
+            (name, birthday, -1 if limit is None else limit))
+
+    def best_scores(self, since: float = None, limit: int = 10) -> list:
+        """Returns the results with the fewest tries.
+
+        Parameters
+        ----------
+        since : float, optional
+            Only results saved at or after this time, in seconds since the
+            epoch. time.time() - WEEK gives the best of the last week.
+        limit : int
+            Number of results.
+
+        Returns
+        -------
+        list
+            Game results keyed by FIELDNAMES, fewest tries first. Earlier
+            results win ties.
+
+        """
+        if since is None:
+            return self._query(
+                f'SELECT {COLUMNS} FROM results '
+                'ORDER BY total_tries, id LIMIT ?', (limit,))
+        return self._query(
+            f'SELECT {COLUMNS} FROM results WHERE played_at >= ? '
+            'ORDER BY total_tries, id LIMIT ?', (since, limit))
+
+    def flush(self) -> None:
+        """Commits the waiting results.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+
+        """
+        self._check_process()
+        with self._lock:
+            self._commit()
+
+    def close(self) -> None:
+        """Commits and releases the connection.
+
+        The connection is closed when no other store of the database in
+        this process uses it.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+
+        """
+        if self._connection is None:
+            return
+        if self._pid != os.getpid():
+            # The connection is the parent's, this process never used one.
+            self._connection = None
+            return
+        self.flush()
+        self._connection = None
+        _release(self.path)
+
+
+def _row(record: dict) -> tuple:
+    """Returns the values a record is inserted with."""
+    return (record['name'], str(record['birthday']),
+            int(float(record['age'])), int(float(record['lucky_number'])),
+            int(float(record['total_tries'])),
+            record.get('played_at', time.time()))
+
+
+def _size(row: tuple) -> int:
+    """Returns an estimate of the bytes a row's values take.
+
+    SQLite does not tell how many bytes an insert writes. Text counts its
+    UTF-8 length and every number 8 bytes, pages and indexes are left out.
+
+    """
+    return sum(len(value.encode('utf-8')) if isinstance(value, str) else 8
+               for value in row)
+
+
+def convert_csv(csv_path: str, db_path: str, played_at: float = 0.0,
+                batch_size: int = 1 << 16) -> int:
+    """Copies a CSV save file into a database.
+
+    The CSV is streamed, so memory use depends on batch_size only. The
+    copy runs on a connection of its own with synchronous=OFF, the stores
+    of the database in this process keep their setting.
+
+    Parameters
+    ----------
+    csv_path : str
+        Path to the CSV save file.
+    db_path : str
+        Path to the database, appended to if it exists.
+    played_at : float
+        Time saved for every result, the CSV file has none. The default
+        keeps them out of best_scores of any recent period.
+    batch_size : int
+        Results inserted per transaction.
+
+    Returns
+    -------
+    int
+        Number of results converted.
+
+    """
+    connection = sqlite3.connect(db_path, isolation_level=None)
+    count = 0
+    try:
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.executescript(SCHEMA)
+        connection.execute('PRAGMA synchronous=OFF')
+        with open(csv_path, newline='', encoding='utf-8') as file:
+            rows = csv.DictReader(file)
+            while True:
+                batch = [_row(dict(row, played_at=played_at))
+                         for row in itertools.islice(rows, batch_size)]
+                if not batch:
+                    break
+                count += len(batch)
+                with connection:
+                    connection.execute('BEGIN')
+                    connection.executemany(INSERT, batch)
+    finally:
+        connection.close()
+    return count
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit('usage: python sqlite_store.py <csv_path> <db_path>')
+    print(f'{convert_csv(sys.argv[1], sys.argv[2])} results converted.')
@@ -0,0 +1,142 @@
+"""
+Test benchmarks Module
+
+This module contains unit tests for the benchmark runner in the benchmarks
+module. The benchmarks themselves are run with tiny settings only.
+
+Classes
+-------
+TestBenchmarks
+    A test class for running and comparing benchmarks.
+
+Example usage
+-------------
+Run this script to test every method.
+
+"""
+
+import os
+import io
+import json
+import tempfile
+import unittest
+from contextlib import redirect_stdout, redirect_stderr
+from benchmarks import run_benchmarks, compare, main, import_times, \
+    stress_appends
+from results_store import CsvResultStore
+from difficulty import PROFILES
+
+
+def make_results(**timings) -> dict:
+    """Return benchmark results with the given fastest timings."""
+    return {'machine': {}, 'results': {
+        name: {'min': seconds, 'median': seconds, 'number': 1, 'repeat': 1}
+        for name, seconds in timings.items()}}
+
+
+class TestBenchmarks(unittest.TestCase):
+    """
+    TestBenchmarks class for unit testing the benchmark runner.
+
+    Methods
+    -------
+    test_run()
+        Test that every benchmark runs and is timed.
+    test_match()
+        Test running only the benchmarks matching a pattern.
+    test_cold_import()
+        Test that importing number_game leaves pandas and NumPy out.
+    test_compare()
+        Test that only slowdowns beyond the threshold are flagged.
+    test_main_compare()
+        Test the compare command's exit code.
+    test_stress()
+        Test that saving from several processes at once loses no rows.
+
+    """
+    def test_run(self):
+        """
+        Test that every benchmark runs and is timed.
+        """
+        results = run_benchmarks(rows=(150,), min_time=0.0, repeat=2)
+        names = set(results['results'])
+        for difficulty in PROFILES:
+            self.assertIn(f'generate_lucky_list[{difficulty}]', names)
+            self.assertIn(f'guess_sequence[{difficulty}]', names)
+        self.assertIn('my_gamer', names)
+        self.assertIn('import[number_game]', names)
+        for name in ('number_game_init', 'show_stats', 'show_stats_player',
+                     'save_to_csv'):
+            self.assertIn(f'{name}[rows=150]', names)
+        for timing in results['results'].values():
+            self.assertGreater(timing['min'], 0)
+            self.assertLessEqual(timing['min'], timing['median'])
+        json.dumps(results)
+
+    def test_match(self):
+        """
+        Test running only the benchmarks matching a pattern.
+        """
+        results = run_benchmarks(rows=(10**9,), min_time=0.0, repeat=1,
+                                 match='generate_lucky_list*')
+        self.assertEqual(len(results['results']), len(PROFILES))
+
+    def test_cold_import(self):
+        """
+        Test that importing number_game leaves pandas and NumPy out.
+
+        Both take hundreds of milliseconds to import, so the game keeps
+        them to the analytics that need them.
+        """
+        times = import_times('number_game')
+        self.assertIn('results_store', times)
+        self.assertNotIn('pandas', times)
+        self.assertNotIn('numpy', times)
+        self.assertLess(times['number_game'], 0.25)
+
+    def test_compare(self):
+        """
+        Test that only slowdowns beyond the threshold are flagged.
+        """
+        baseline = make_results(fast=1.0, same=1.0, slow=1.0, gone=1.0)
+        results = make_results(fast=0.5, same=1.05, slow=1.5, new=9.0)
+        self.assertEqual(compare(baseline, results, 0.1),
+                         [('slow', 1.0, 1.5)])
+        self.assertEqual(compare(baseline, results, 0.6), [])
+
+    def test_main_compare(self):
+        """
+        Test the compare command's exit code.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for name, seconds in (('base', 1.0), ('new', 1.2)):
+                paths.append(os.path.join(directory, name + '.json'))
+                with open(paths[-1], 'w', encoding='utf-8') as file:
+                    json.dump(make_results(my_gamer=seconds), file)
+            with redirect_stdout(io.StringIO()), \
+                    redirect_stderr(io.StringIO()) as errors:
+                self.assertEqual(main(['compare', *paths]), 1)
+                self.assertEqual(main(['compare', *paths,
+                                       '--threshold', '0.5']), 0)
+            self.assertIn('my_gamer', errors.getvalue())
+
+    def test_stress(self):
+        """
+        Test that saving from several processes at once loses no rows.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'stress.csv')
+            self.assertGreater(stress_appends(path, 3, 200), 0)
+            store = CsvResultStore(path)
+            records = list(store.iter_records())
+            store.close()
+            with redirect_stdout(io.StringIO()) as output:
+                self.assertEqual(main(['stress', '--processes', '2',
+                                       '--rows', '50']), 0)
+        self.assertEqual(len(records), 600)
+        self.assertIn('100/100 rows', output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
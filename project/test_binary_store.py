@@ -0,0 +1,160 @@
+"""
+Test binary_store Module
+
+This module contains unit tests for the binary results backend in the
+binary_store module.
+
+Classes
+-------
+TestBinaryResultStore
+    A test class for BinaryResultStore and convert_csv.
+
+Example usage
+-------------
+Run this script to test every method.
+
+"""
+
+import os
+import tempfile
+import unittest
+from binary_store import BinaryResultStore, RECORD_DTYPE, HEADER, \
+    convert_csv
+
+
+def make_record(number: int, name: str = 'John Doe') -> dict:
+    """Return a game result whose lucky number is number."""
+    return {'name': name, 'birthday': '19950101', 'age': 28,
+            'lucky_number': number, 'total_tries': number % 7 + 1}
+
+
+class TestBinaryResultStore(unittest.TestCase):
+    """
+    TestBinaryResultStore class for unit testing the binary backend.
+
+    Methods
+    -------
+    setUp()
+        Create a temporary directory for the record files.
+    tearDown()
+        Remove the temporary directory.
+    test_fixed_width()
+        Test that every result takes one fixed-width record.
+    test_names_interned()
+        Test that names are stored once and survive reopening the store.
+    test_read_page()
+        Test reading pages of results, newest first.
+    test_read_page_player()
+        Test reading pages of one player's results.
+    test_iter_records()
+        Test streaming every result, oldest first.
+    test_invalid_file()
+        Test that a file that is not a record file is rejected.
+    test_convert_csv()
+        Test converting a CSV save file written with float columns.
+
+    """
+    def setUp(self):
+        """Create a temporary directory for the record files."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'game_save.bin')
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.tmp_dir.cleanup()
+
+    def test_fixed_width(self):
+        """
+        Test that every result takes one fixed-width record.
+        """
+        store = BinaryResultStore(self.path)
+        written = store.append_many([make_record(nr) for nr in range(10)])
+        store.close()
+        self.assertEqual(written, 10 * RECORD_DTYPE.itemsize)
+        self.assertEqual(os.path.getsize(self.path), len(HEADER) + written)
+
+    def test_names_interned(self):
+        """
+        Test that names are stored once and survive reopening the store.
+        """
+        store = BinaryResultStore(self.path)
+        store.append_many([make_record(1), make_record(2, 'Jane Roe'),
+                           make_record(3)])
+        store.close()
+        store = BinaryResultStore(self.path)
+        self.assertEqual(store.names, ['John Doe', 'Jane Roe'])
+        store.append(make_record(4, 'Jane Roe'))
+        self.assertEqual(list(store.records()['name_id']), [0, 1, 0, 1])
+        store.close()
+
+    def test_read_page(self):
+        """
+        Test reading pages of results, newest first.
+        """
+        store = BinaryResultStore(self.path)
+        self.assertEqual(store.read_page(), [])
+        store.append_many([make_record(nr) for nr in range(25)])
+        first = store.read_page(0, 10)
+        self.assertEqual([row['lucky_number'] for row in first],
+                         list(range(24, 14, -1)))
+        self.assertEqual(first[0], make_record(24))
+        last = store.read_page(2, 10)
+        self.assertEqual([row['lucky_number'] for row in last],
+                         list(range(4, -1, -1)))
+        self.assertEqual(store.read_page(3, 10), [])
+        store.close()
+
+    def test_read_page_player(self):
+        """
+        Test reading pages of one player's results.
+        """
+        store = BinaryResultStore(self.path)
+        store.append_many([make_record(nr, 'Jane Roe' if nr % 3 else
+                                       'John Doe') for nr in range(30)])
+        page = store.read_page(1, 3, player='John Doe')
+        self.assertEqual([row['lucky_number'] for row in page],
+                         [18, 15, 12])
+        self.assertEqual(store.read_page(player='Nobody Here'), [])
+        store.close()
+
+    def test_iter_records(self):
+        """
+        Test streaming every result, oldest first.
+        """
+        store = BinaryResultStore(self.path)
+        self.assertEqual(list(store.iter_records()), [])
+        store.append_many([make_record(nr) for nr in range(5)])
+        self.assertEqual(list(store.iter_records()),
+                         [make_record(nr) for nr in range(5)])
+        store.close()
+
+    def test_invalid_file(self):
+        """
+        Test that a file that is not a record file is rejected.
+        """
+        with open(self.path, 'wb') as file:
+            file.write(b'name,birthday\n')
+        with self.assertRaises(ValueError):
+            BinaryResultStore(self.path)
+
+    def test_convert_csv(self):
+        """
+        Test converting a CSV save file written with float columns.
+        """
+        csv_path = os.path.join(self.tmp_dir.name, 'game_save.csv')
+        with open(csv_path, 'w', encoding='utf-8') as file:
+            file.write('name,birthday,age,lucky_number,total_tries\n'
+                       'Tyra Forsgren,20030717,20.0,78.0,2.0\n'
+                       'Tyra Forsgren,20030717,20.0,68.0,3.0\n')
+        self.assertEqual(convert_csv(csv_path, self.path, batch_size=1), 2)
+        store = BinaryResultStore(self.path)
+        self.assertEqual(store.read_page(), [
+            {'name': 'Tyra Forsgren', 'birthday': '20030717', 'age': 20,
+             'lucky_number': 68, 'total_tries': 3},
+            {'name': 'Tyra Forsgren', 'birthday': '20030717', 'age': 20,
+             'lucky_number': 78, 'total_tries': 2}])
+        store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+"""
+Test candidate_set Module
+
+This module contains unit tests for the bitset of numbers that can still be
+guessed in the candidate_set module.
+
+Classes
+-------
+TestCandidateSet
+    A test class for CandidateSet unit tests.
+
+Example usage
+-------------
+Run this script to test every method.
+
+"""
+
+import random
+import unittest
+from candidate_set import CandidateSet
+
+
+class TestCandidateSet(unittest.TestCase):
+    """
+    TestCandidateSet class for unit testing the CandidateSet class.
+
+    Methods
+    -------
+    test_dense()
+        Test membership, size and order of a set over a small range.
+    test_sparse()
+        Test a set whose range is far larger than the list.
+    test_remove()
+        Test removing numbers.
+    test_keep_range()
+        Test keeping only the numbers within a range.
+    test_keep_range_disjoint()
+        Test windows that miss every number left, then further windows.
+    test_rank_select()
+        Test that rank and select are inverses.
+    test_against_set()
+        Test random operations against a Python set.
+    test_out_of_range()
+        Test that numbers outside the range are rejected.
+
+    """
+    def test_dense(self):
+        """
+        Test membership, size and order of a set over a small range.
+        """
+        candidates = CandidateSet([99, 3, 64, 0, 63], 0, 100)
+        self.assertEqual(list(candidates), [0, 3, 63, 64, 99])
+        self.assertEqual(len(candidates), 5)
+        self.assertIn(64, candidates)
+        self.assertNotIn(65, candidates)
+        self.assertNotIn(-1, candidates)
+        self.assertNotIn(101, candidates)
+
+    def test_sparse(self):
+        """
+        Test a set whose range is far larger than the list.
+        """
+        numbers = [10, 5 * 10**8, 10**9, 123456789]
+        candidates = CandidateSet(numbers, 10, 10**9, 'l')
+        self.assertEqual(len(candidates._words), 1)
+        self.assertEqual(list(candidates), sorted(numbers))
+        self.assertIn(123456789, candidates)
+        self.assertNotIn(123456790, candidates)
+        candidates.keep_range(11, 5 * 10**8)
+        self.assertEqual(list(candidates), [123456789, 5 * 10**8])
+
+    def test_remove(self):
+        """
+        Test removing numbers.
+        """
+        candidates = CandidateSet(range(-5, 200, 3), -5, 200)
+        candidates.remove(-5)
+        self.assertFalse(candidates.discard(-5))
+        self.assertTrue(candidates.discard(193))
+        self.assertNotIn(-5, candidates)
+        self.assertEqual(len(candidates), len(range(-5, 200, 3)) - 2)
+        with self.assertRaises(KeyError):
+            candidates.remove(0)
+
+    def test_keep_range(self):
+        """
+        Test keeping only the numbers within a range.
+        """
+        candidates = CandidateSet(range(0, 1000, 7), 0, 1000)
+        candidates.keep_range(60, 140)
+        self.assertEqual(list(candidates), list(range(63, 141, 7)))
+        self.assertEqual(len(candidates), len(range(63, 141, 7)))
+        candidates.keep_range(500, 600)
+        self.assertEqual(list(candidates), [])
+        self.assertEqual(len(candidates), 0)
+
+    def test_keep_range_disjoint(self):
+        """
+        Test windows that miss every number left, then further windows.
+        """
+        for window in ((200, 210), (-50, -1), (0, 0)):
+            candidates = CandidateSet([1, 2, 3, 4, 5], 0, 300)
+            candidates.keep_range(*window)
+            self.assertEqual(list(candidates), [])
+            candidates.keep_range(270, 260)
+            candidates.keep_range(0, 300)
+            self.assertEqual(list(candidates), [])
+            self.assertEqual(len(candidates), 0)
+            self.assertNotIn(3, candidates)
+        candidates = CandidateSet([10, 500, 4000], 0, 5000)
+        candidates.keep_range(600, 3000)
+        candidates.keep_range(3100, 2900)
+        self.assertEqual((list(candidates), len(candidates)), ([], 0))
+
+    def test_rank_select(self):
+        """
+        Test that rank and select are inverses.
+        """
+        numbers = sorted(random.sample(range(5000), 300))
+        candidates = CandidateSet(numbers, 0, 4999)
+        for rank, number in enumerate(numbers):
+            self.assertEqual(candidates.select(rank), number)
+            self.assertEqual(candidates.rank(number), rank)
+        self.assertEqual(candidates.rank(5000), 300)
+        with self.assertRaises(IndexError):
+            candidates.select(300)
+
+    def test_against_set(self):
+        """
+        Test random operations against a Python set.
+        """
+        for low, high, size in ((0, 300, 60), (-50, 10**6, 200)):
+            expected = set(random.sample(range(low, high + 1), size))
+            candidates = CandidateSet(expected, low, high)
+            for _ in range(size // 2):
+                number = random.choice(sorted(expected))
+                if random.random() < 0.1:
+                    start = random.randint(low, high)
+                    stop = start + (high - low) // 3
+                    candidates.keep_range(start, stop)
+                    expected = {nr for nr in expected if start <= nr <= stop}
+                else:
+                    candidates.remove(number)
+                    expected.discard(number)
+                self.assertEqual(list(candidates), sorted(expected))
+                self.assertEqual(len(candidates), len(expected))
+                if not expected:
+                    break
+
+    def test_out_of_range(self):
+        """
+        Test that numbers outside the range are rejected.
+        """
+        with self.assertRaises(ValueError):
+            CandidateSet([1, 2, 101], 0, 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+Test difficulty Module
+
+This module contains unit tests for the difficulty profiles in the
+difficulty module.
+
+Classes
+-------
+TestDifficulty
+    A test class for DifficultyProfile and its helpers.
+
+Example usage
+-------------
+Run this script to test every method.
+
+"""
+
+import unittest
+from difficulty import DifficultyProfile, PROFILES, get_profile, \
+    shrink_schedule
+
+
+class TestDifficulty(unittest.TestCase):
+    """
+    TestDifficulty class for unit testing the difficulty module.
+
+    Methods
+    -------
+    test_schedule_constant()
+        Test the schedule of a constant drop count.
+    test_schedule_ramp()
+        Test the schedule of a drop count that changes per miss.
+    test_schedule_invalid()
+        Test that negative drop counts are rejected.
+    test_invalid_profile()
+        Test that unplayable settings are rejected.
+    test_get_profile()
+        Test looking profiles up by name.
+
+    """
+    def test_schedule_constant(self):
+        """
+        Test the schedule of a constant drop count.
+        """
+        self.assertEqual(shrink_schedule(5, 2), (0, 2, 2, 2))
+
+    def test_schedule_ramp(self):
+        """
+        Test the schedule of a drop count that changes per miss.
+        """
+        self.assertEqual(shrink_schedule(6, (0, 1, 3)), (0, 0, 1, 3, 3))
+
+    def test_schedule_invalid(self):
+        """
+        Test that negative drop counts are rejected.
+        """
+        with self.assertRaises(ValueError):
+            shrink_schedule(5, -1)
+        with self.assertRaises(ValueError):
+            shrink_schedule(5, ())
+
+    def test_invalid_profile(self):
+        """
+        Test that unplayable settings are rejected.
+        """
+        with self.assertRaises(ValueError):
+            DifficultyProfile('test', 0, 5, 7, 10)
+        with self.assertRaises(ValueError):
+            DifficultyProfile('test', 0, 100, 10, 0)
+
+    def test_get_profile(self):
+        """
+        Test looking profiles up by name.
+        """
+        self.assertIs(get_profile('normal'), PROFILES['normal'])
+        self.assertIs(get_profile(PROFILES['hard']), PROFILES['hard'])
+        with self.assertRaises(ValueError):
+            get_profile('impossible')
+
+
+if __name__ == '__main__':
+    unittest.main()
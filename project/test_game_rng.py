@@ -0,0 +1,132 @@
+"""
+Test game_rng Module
+
+This module contains unit tests for the random number generators games draw
+from in the game_rng module.
+
+Classes
+-------
+TestSplitMix64
+    A test class for SplitMix64 unit tests.
+TestMakeRng
+    A test class for make_rng unit tests.
+
+Example usage
+-------------
+Run this script to test every method.
+
+"""
+
+import random
+import unittest
+from collections import Counter
+from game_rng import SplitMix64, make_rng
+
+
+class TestSplitMix64(unittest.TestCase):
+    """
+    TestSplitMix64 class for unit testing the SplitMix64 class.
+
+    Methods
+    -------
+    test_reference_sequence()
+        Test the first outputs against the reference implementation.
+    test_randrange()
+        Test that randrange stays in range and hits every value.
+    test_randint()
+        Test that randint includes both bounds.
+    test_bad_range()
+        Test that an empty range raises ValueError.
+
+    """
+
+    def test_reference_sequence(self):
+        """Test the first outputs against the reference implementation."""
+        rng = SplitMix64(0)
+        self.assertEqual(rng.next64(), 0xE220A8397B1DCDAF)
+        self.assertEqual(rng.next64(), 0x6E789E6AA1B965F4)
+
+    def test_randrange(self):
+        """Test that randrange stays in range and hits every value."""
+        rng = SplitMix64(1)
+        counts = Counter(rng.randrange(10) for _ in range(10000))
+        self.assertEqual(set(counts), set(range(10)))
+        for count in counts.values():
+            self.assertGreater(count, 800)
+            self.assertLess(count, 1200)
+        self.assertEqual(rng.randrange(1), 0)
+
+    def test_randint(self):
+        """Test that randint includes both bounds."""
+        rng = SplitMix64(2)
+        values = {rng.randint(-2, 2) for _ in range(1000)}
+        self.assertEqual(values, {-2, -1, 0, 1, 2})
+
+    def test_bad_range(self):
+        """Test that an empty range raises ValueError."""
+        rng = SplitMix64(3)
+        with self.assertRaises(ValueError):
+            rng.randrange(0)
+        with self.assertRaises(ValueError):
+            rng.randint(5, 4)
+
+
+class TestMakeRng(unittest.TestCase):
+    """
+    TestMakeRng class for unit testing the make_rng function.
+
+    Methods
+    -------
+    test_seed()
+        Test that the same seed gives the same numbers.
+    test_fresh_seed()
+        Test that no seed picks one that replays the generator.
+    test_generators()
+        Test that random.Random and numpy generators are used as given.
+    test_bad_type()
+        Test that anything else raises TypeError.
+
+    """
+
+    def test_seed(self):
+        """Test that the same seed gives the same numbers."""
+        first, seed = make_rng(42)
+        second, _ = make_rng(42)
+        self.assertEqual(seed, 42)
+        self.assertEqual([first.randint(1, 100) for _ in range(20)],
+                         [second.randint(1, 100) for _ in range(20)])
+
+    def test_fresh_seed(self):
+        """Test that no seed picks one that replays the generator."""
+        rng, seed = make_rng()
+        replay, _ = make_rng(seed)
+        self.assertIsInstance(seed, int)
+        self.assertEqual([rng.randrange(1000) for _ in range(20)],
+                         [replay.randrange(1000) for _ in range(20)])
+
+    def test_generators(self):
+        """Test that random.Random and numpy generators are used as given."""
+        given = random.Random(5)
+        rng, seed = make_rng(given)
+        self.assertIs(rng, given)
+        self.assertIsNone(seed)
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest('numpy is not installed')
+        rng, seed = make_rng(numpy.random.default_rng(5))
+        self.assertIsNone(seed)
+        values = {rng.randint(1, 3) for _ in range(200)}
+        self.assertEqual(values, {1, 2, 3})
+        self.assertTrue(all(0 <= rng.randrange(4) < 4 for _ in range(200)))
+        self.assertIsInstance(rng.randint(1, 3), int)
+
+    def test_bad_type(self):
+        """Test that anything else raises TypeError."""
+        for rng in ('seed', 1.5, True):
+            with self.assertRaises(TypeError):
+                make_rng(rng)
+
+
+if __name__ == '__main__':
+    unittest.main()
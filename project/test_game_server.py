@@ -0,0 +1,164 @@
+"""
+Test game_server Module
+
+This module contains unit tests for the asyncio game server and the load
+generator in the game_server module.
+
+Classes
+-------
+TestGameServer
+    A test class for GameServer and run_load.
+
+Example usage
+-------------
+Run this script to test every method.
+
+"""
+
+import os
+import asyncio
+import tempfile
+import unittest
+from game_server import GameServer, run_load
+from results_store import CsvResultStore
+from replay import GuessLog, replay_log
+
+
+class TestGameServer(unittest.IsolatedAsyncioTestCase):
+    """
+    TestGameServer class for unit testing the game server.
+
+    Methods
+    -------
+    asyncSetUp()
+        Start a server saving to a temporary file.
+    asyncTearDown()
+        Stop the server and remove the temporary file.
+    test_session()
+        Test one session played by hand through the protocol.
+    test_invalid_requests()
+        Test the replies to invalid requests.
+    test_malformed_lines()
+        Test the replies to lines that are not UTF-8 or too long.
+    test_run_load()
+        Test that the load generator plays and saves every session.
+    test_guess_log()
+        Test that every round played on a logging server replays.
+
+    """
+    async def asyncSetUp(self):
+        """Start a server saving to a temporary file."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'game_save.csv')
+        self.store = CsvResultStore(self.path)
+        self.server = GameServer(self.store)
+        self.port = await self.server.start()
+
+    async def asyncTearDown(self):
+        """Stop the server and remove the temporary file."""
+        await self.server.close()
+        self.store.close()
+        self.tmp_dir.cleanup()
+
+    async def request(self, line):
+        """Send one request line and return the reply split into words."""
+        self.writer.write(line.encode('utf-8') + b'\n')
+        return (await self.reader.readline()).decode('utf-8').split()
+
+    async def test_session(self):
+        """
+        Test one session played by hand through the protocol.
+
+        Every number of the list is guessed in turn until the game is won,
+        then the saved row is checked.
+        """
+        self.reader, self.writer = await asyncio.open_connection(
+            '127.0.0.1', self.port)
+        self.assertEqual(await self.request('PLAYER 19950101 John Doe'),
+                         ['OK'])
+        reply = await self.request('PLAY')
+        self.assertEqual(reply[0], 'LIST')
+        self.assertEqual(len(reply), 11)
+        numbers = reply[1:]
+        while True:
+            reply = await self.request('GUESS ' + numbers[0])
+            if reply[0] == 'WIN':
+                break
+            self.assertEqual(reply[0], 'MISS')
+            numbers = reply[2:]
+        self.assertEqual(await self.request('QUIT'), ['BYE'])
+        self.writer.close()
+        self.store.flush()
+        with open(self.path, encoding='utf-8') as file:
+            rows = file.read().splitlines()
+        self.assertEqual(len(rows), 2)
+        self.assertTrue(rows[1].startswith('John Doe,19950101,'))
+        self.assertTrue(rows[1].endswith(f',{reply[1]}'))
+
+    async def test_invalid_requests(self):
+        """
+        Test the replies to invalid requests.
+        """
+        self.reader, self.writer = await asyncio.open_connection(
+            '127.0.0.1', self.port)
+        self.assertEqual((await self.request('PLAY'))[0], 'ERR')
+        self.assertEqual((await self.request('PLAYER 1h15 John Doe'))[0],
+                         'ERR')
+        self.assertEqual((await self.request('GUESS 5'))[0], 'ERR')
+        self.assertEqual((await self.request('DANCE'))[0], 'ERR')
+        await self.request('PLAYER 19950101 John Doe')
+        await self.request('PLAY')
+        self.assertEqual((await self.request('GUESS five'))[0], 'ERR')
+        self.assertEqual((await self.request('GUESS 1000'))[0], 'OUTSIDE')
+        await self.request('QUIT')
+        self.writer.close()
+
+    async def test_malformed_lines(self):
+        """
+        Test the replies to lines that are not UTF-8 or too long.
+        """
+        self.reader, self.writer = await asyncio.open_connection(
+            '127.0.0.1', self.port)
+        self.writer.write(b'\xff\xfe\n')
+        self.assertEqual(await self.reader.readline(),
+                         b'ERR invalid encoding\n')
+        self.assertEqual(await self.request('PLAYER 19950101 John Doe'),
+                         ['OK'])
+        self.writer.write(b'x' * (1 << 21) + b'\n')
+        self.assertEqual(await self.reader.readline(),
+                         b'ERR line too long\n')
+        self.assertEqual(await self.reader.read(), b'')
+        self.writer.close()
+        self.assertEqual(self.server.sessions, 0)
+
+    async def test_run_load(self):
+        """
+        Test that the load generator plays and saves every session.
+        """
+        report = await run_load('127.0.0.1', self.port, 50, concurrency=10)
+        self.assertEqual(report['sessions'], 50)
+        self.assertLessEqual(report['p50_ms'], report['p99_ms'])
+        self.store.flush()
+        with open(self.path, encoding='utf-8') as file:
+            self.assertEqual(len(file.read().splitlines()), 51)
+
+    async def test_guess_log(self):
+        """
+        Test that every round played on a logging server replays.
+        """
+        log_path = os.path.join(self.tmp_dir.name, 'guesses.log')
+        log = GuessLog(log_path)
+        server = GameServer(self.store, log=log)
+        port = await server.start()
+        try:
+            await run_load('127.0.0.1', port, 20, concurrency=5)
+        finally:
+            await server.close()
+            log.close()
+        report = replay_log(log_path)
+        self.assertEqual(report.rounds, 20)
+        self.assertEqual(report.mismatches, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -23,6 +23,17 @@ test_invalid_birthdate()
     and nonexistent dates.
 test_calc_age()
     Test the result of certain ages. Too young and old enough. 
+test_calc_age_birthday()
+    Test that the age goes up on the birthday, not at new year.
+test_today_cached()
+    Test that today's date is only read from the clock once per day.
+test_immutable()
+    Test that a player cannot be changed and that names are interned.
+test_pickle_and_copy()
+    Test that a player survives pickle, copy and deepcopy.
+
+TestValidatePlayers(unittest.TestCase)
+    Class to test the bulk validator 'validate_players'.
 
 Example usage
 -------------
@@ -30,9 +41,14 @@ Run this script to test every method.
 
 """
 
+import copy
+import pickle
+import datetime
 import unittest
 from unittest.mock import patch
-from gamer_module import MyGamer
+import gamer_module
+from gamer_module import MyGamer, validate_players, OK, BAD_NAME, \
+    BAD_DATE, TOO_YOUNG
 
 class TestMyGamer(unittest.TestCase):
     """Class to test the 'MyGamer' class from the 'gamer_module' module."""
@@ -102,6 +118,70 @@ class TestMyGamer(unittest.TestCase):
             young_player = MyGamer("Charlie Willie", birthdate_young)
             young_player.calc_age(birthdate_young)
 
+    def test_calc_age_birthday(self) -> None:
+        """Test that the age goes up on the birthday, not at new year."""
+        gamer = MyGamer("Alice Moose", "19900101")
+        with patch('gamer_module._today',
+                   return_value=datetime.date(2025, 7, 16)):
+            # 17 until tomorrow, although 2025 - 2007 is 18.
+            with self.assertRaises(ValueError):
+                gamer.calc_age('20070717')
+            self.assertEqual(gamer.calc_age('20070716'), 18)
+            self.assertEqual(gamer.calc_age('20000229'), 25)
+            with self.assertRaises(ValueError):
+                gamer.calc_age('20010229')
+
+    def test_today_cached(self) -> None:
+        """Test that today's date is only read from the clock once per day."""
+        calls = []
+
+        class FakeDate(datetime.date):
+            """A date whose today() is counted."""
+            @classmethod
+            def today(cls):
+                calls.append(1)
+                return cls(2025, 7, 16)
+
+        gamer_module._today_cache[:] = [None, 0.0]
+        try:
+            with patch('gamer_module.datetime.date', FakeDate):
+                midnight = datetime.datetime(2025, 7, 17).timestamp()
+                with patch('gamer_module.time.time',
+                           return_value=midnight - 1):
+                    self.assertEqual(gamer_module._today(),
+                                     datetime.date(2025, 7, 16))
+                    gamer_module._today()
+                self.assertEqual(len(calls), 1)
+                with patch('gamer_module.time.time', return_value=midnight):
+                    gamer_module._today()
+                self.assertEqual(len(calls), 2)
+        finally:
+            gamer_module._today_cache[:] = [None, 0.0]
+
+    def test_immutable(self) -> None:
+        """Test that a player cannot be changed and that names are interned."""
+        gamer = MyGamer("simon bell", "19991212")
+        with self.assertRaises(AttributeError):
+            gamer.name = "Other Name"
+        with self.assertRaises(AttributeError):
+            del gamer.age
+        with self.assertRaises(AttributeError):
+            gamer.nickname = "Simon"
+        other = MyGamer(" ".join(["Simon", "Bell"]), "19991212")
+        self.assertIs(gamer.name, other.name)
+        self.assertIs(gamer.birthdate, other.birthdate)
+
+    def test_pickle_and_copy(self) -> None:
+        """Test that a player survives pickle, copy and deepcopy."""
+        gamer = MyGamer("simon bell", "19991212")
+        for clone in (pickle.loads(pickle.dumps(gamer)), copy.copy(gamer),
+                      copy.deepcopy(gamer)):
+            self.assertEqual(repr(clone), repr(gamer))
+            self.assertEqual(clone.age, gamer.age)
+            self.assertIs(clone.name, gamer.name)
+            with self.assertRaises(AttributeError):
+                clone.name = "Other Name"
+
     def calc_age_correct_age(self) -> None:
         """Tests that age has been correctly calculated."""
         mock_gamer = MyGamer('','')
@@ -115,5 +195,65 @@ class TestMyGamer(unittest.TestCase):
         self.assertEqual(age, expected_age)
 
 
+class TestValidatePlayers(unittest.TestCase):
+    """Class to test 'validate_players' from the 'gamer_module' module."""
+
+    today = datetime.date(2025, 6, 1)
+
+    def test_valid_rows(self) -> None:
+        """Test that valid rows become records like MyGamer would make."""
+        records, codes = validate_players(
+            ['john peterson', ' Ben Johnson '], ['19991212', 20000229],
+            self.today)
+        self.assertEqual(list(codes), [OK, OK])
+        self.assertEqual(records, [
+            {'name': 'John Peterson', 'birthday': '19991212', 'age': 25},
+            {'name': 'Ben Johnson', 'birthday': '20000229', 'age': 25}])
+
+    def test_error_codes(self) -> None:
+        """Test that every invalid row gets its code and no exception."""
+        names = ['', '12345', 'Steve 123', 'Merry Lee Smith', 'Ann Lee',
+                 'Ann Lee', 'Ann Lee', 'Ann Lee', 'Ann Lee', 'Ann Lee']
+        births = ['20001231'] * 4 + [9 * '0', '1h15', '10005050',
+                                     '19000229', '20230419', '20070601']
+        records, codes = validate_players(names, births, self.today)
+        self.assertEqual(records[0]['birthday'], '20070601')
+        self.assertEqual(list(codes), [BAD_NAME] * 4 + [BAD_DATE] * 4
+                         + [TOO_YOUNG, OK])
+
+    def test_matches_my_gamer(self) -> None:
+        """Test that the bulk validator accepts what MyGamer accepts."""
+        names = ['John Peterson', 'ben johnson', 'Steve 123', 'Simon Bell']
+        births = ['20030519', '1h15', '19991212', '20230419']
+        _, codes = validate_players(names, births)
+        for name, birth, code in zip(names, births, codes):
+            try:
+                MyGamer(name, birth)
+                valid = True
+            except ValueError:
+                valid = False
+            self.assertEqual(code == OK, valid)
+
+    def test_same_names_rejected(self) -> None:
+        """Test that the bulk validator rejects the names MyGamer rejects."""
+        names = ['Ab\u00b2 Cd', 'Ab Cd\u2167', 'Ab\u0660 Cd', 'Ab  Cd',
+                 'Ab\tCd', 'Ab_ Cd', '\u00c5sa \u00d6berg', 'Ab Cd']
+        _, codes = validate_players(names, ['19991212'] * len(names),
+                                    self.today)
+        for name, code in zip(names, codes):
+            try:
+                MyGamer(name, '19991212')
+                valid = True
+            except ValueError:
+                valid = False
+            self.assertEqual(code == OK, valid, name)
+        self.assertEqual(list(codes), [BAD_NAME] * 6 + [OK, OK])
+
+    def test_different_lengths(self) -> None:
+        """Test that columns of different lengths are rejected."""
+        with self.assertRaises(ValueError):
+            validate_players(['John Peterson'], [])
+
+
 if __name__ == '__main__':
     unittest.main()
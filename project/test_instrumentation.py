@@ -0,0 +1,222 @@
+"""
+Test instrumentation Module
+
+This module contains unit tests for the opt-in metrics of the
+instrumentation module.
+
+Classes
+-------
+TestInstrumentation
+    A test class for instrument(), Metrics and their exports.
+
+Example usage
+-------------
+Run this script to test every method.
+
+"""
+
+import os
+import io
+import json
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+import number_game
+from number_game import NumberGame, HIT, MISS, OUTSIDE
+from gamer_module import MyGamer
+from results_store import CsvResultStore
+from sqlite_store import SqliteResultStore
+from game_server import _Session
+from instrumentation import Metrics, Histogram, instrument, uninstrument
+
+
+class TestInstrumentation(unittest.TestCase):
+    """
+    TestInstrumentation class for unit testing the instrumentation layer.
+
+    Methods
+    -------
+    setUp()
+        Create a game saving to a temporary directory.
+    tearDown()
+        Turn instrumentation off and remove the temporary directory.
+    test_uninstrumented()
+        Test that the original methods are back after uninstrument().
+    test_guesses()
+        Test counting guesses, wins and save bytes.
+    test_history_load()
+        Test timing the history read of show_stats.
+    test_inputs()
+        Test timing input and counting invalid inputs.
+    test_server_inputs()
+        Test counting the invalid guesses a server session answers.
+    test_sqlite_save_bytes()
+        Test counting the estimated save bytes of an SQLite store.
+    test_instrument_twice()
+        Test that instrumenting twice is rejected.
+    test_histogram()
+        Test the buckets of a histogram.
+    test_prometheus()
+        Test the Prometheus text export.
+    test_write()
+        Test writing JSON and Prometheus exports to files.
+
+    """
+    def setUp(self):
+        """Create a game saving to a temporary directory."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = CsvResultStore(
+            os.path.join(self.tmp_dir.name, 'game_save.csv'))
+        self.game = NumberGame(MyGamer('John Doe', '19950101'), self.store)
+
+    def tearDown(self):
+        """Turn instrumentation off and remove the temporary directory."""
+        uninstrument()
+        self.store.close()
+        self.tmp_dir.cleanup()
+
+    def test_uninstrumented(self):
+        """
+        Test that the original methods are back after uninstrument().
+        """
+        originals = (NumberGame.judge_guess, NumberGame.take_guess,
+                     number_game.load_history)
+        instrument()
+        self.assertIsNot(NumberGame.judge_guess, originals[0])
+        uninstrument()
+        self.assertEqual((NumberGame.judge_guess, NumberGame.take_guess,
+                          number_game.load_history), originals)
+
+    def test_guesses(self):
+        """
+        Test counting guesses, wins and save bytes.
+        """
+        metrics = instrument()
+        game = self.game
+        wrong = next(nr for nr in game.lucky_list if nr != game.lucky_nr)
+        for guess, outcome in ((-1, OUTSIDE), (wrong, MISS),
+                               (game.lucky_nr, HIT)):
+            game.tries += 1
+            self.assertEqual(game.judge_guess(guess), outcome)
+        written = game.save_to_csv()
+        for outcome in (HIT, MISS, OUTSIDE):
+            self.assertEqual(metrics.counter('guesses_total',
+                                             outcome=outcome), 1)
+        self.assertEqual(metrics.counter('wins_total'), 1)
+        self.assertEqual(metrics.counter('save_bytes_total'), written)
+        self.assertEqual(metrics.histogram('guess_seconds').count, 3)
+        self.assertEqual(metrics.histogram('save_seconds').count, 1)
+
+    def test_history_load(self):
+        """
+        Test timing the history read of show_stats.
+        """
+        metrics = instrument()
+        self.game.tries = 2
+        self.game.save_to_csv()
+        with redirect_stdout(io.StringIO()):
+            self.game.show_stats()
+        self.assertEqual(metrics.histogram('history_load_seconds').count, 1)
+        self.assertEqual(metrics.histogram('show_stats_seconds').count, 1)
+
+    def test_inputs(self):
+        """
+        Test timing input and counting invalid inputs.
+        """
+        metrics = instrument()
+        with patch('builtins.input', side_effect=['seven', '', '7']), \
+                redirect_stdout(io.StringIO()):
+            self.assertEqual(self.game.take_guess(), 7)
+            self.game.show_stats()
+        self.assertEqual(metrics.counter('invalid_inputs_total'), 2)
+        self.assertEqual(metrics.histogram('input_wait_seconds').count, 1)
+        self.assertEqual(metrics.histogram('show_stats_seconds').count, 1)
+
+    def test_server_inputs(self):
+        """
+        Test counting the invalid guesses a server session answers.
+        """
+        metrics = instrument()
+        session = _Session(self.store)
+        session.handle(['PLAYER', '19950101', 'John', 'Doe'])
+        session.handle(['PLAY'])
+        for text in ('five', '\u00b2', '-3'):
+            self.assertEqual(session.handle(['GUESS', text]),
+                             'ERR not a number')
+        self.assertEqual(session.handle(['GUESS', '1000']).split()[0],
+                         'OUTSIDE')
+        self.assertEqual(metrics.counter('invalid_inputs_total'), 3)
+
+    def test_sqlite_save_bytes(self):
+        """
+        Test counting the estimated save bytes of an SQLite store.
+        """
+        metrics = instrument()
+        store = SqliteResultStore(os.path.join(self.tmp_dir.name, 'game.db'))
+        game = NumberGame(MyGamer('John Doe', '19950101'), store)
+        game.tries = 2
+        written = game.save_to_csv()
+        store.close()
+        self.assertGreater(written, 0)
+        self.assertEqual(metrics.counter('save_bytes_total'), written)
+
+    def test_instrument_twice(self):
+        """
+        Test that instrumenting twice is rejected.
+        """
+        instrument()
+        with self.assertRaises(RuntimeError):
+            instrument()
+
+    def test_histogram(self):
+        """
+        Test the buckets of a histogram.
+        """
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0, 3.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [2, 1, 2])
+        self.assertEqual(histogram.count, 5)
+        self.assertAlmostEqual(histogram.sum, 5.65)
+
+    def test_prometheus(self):
+        """
+        Test the Prometheus text export.
+        """
+        metrics = Metrics(buckets=(0.1, 1.0))
+        metrics.inc('guesses_total', outcome='miss')
+        metrics.inc('guesses_total', 2, outcome='hit')
+        metrics.observe('save_seconds', 0.5)
+        metrics.observe('save_seconds', 5.0)
+        lines = metrics.to_prometheus().splitlines()
+        self.assertEqual(lines.count('# TYPE numbergame_guesses_total '
+                                     'counter'), 1)
+        self.assertIn('numbergame_guesses_total{outcome="hit"} 2', lines)
+        self.assertIn('numbergame_guesses_total{outcome="miss"} 1', lines)
+        self.assertIn('# TYPE numbergame_save_seconds histogram', lines)
+        self.assertIn('numbergame_save_seconds_bucket{le="0.1"} 0', lines)
+        self.assertIn('numbergame_save_seconds_bucket{le="1.0"} 1', lines)
+        self.assertIn('numbergame_save_seconds_bucket{le="+Inf"} 2', lines)
+        self.assertIn('numbergame_save_seconds_count 2', lines)
+
+    def test_write(self):
+        """
+        Test writing JSON and Prometheus exports to files.
+        """
+        metrics = Metrics()
+        metrics.inc('wins_total')
+        path = os.path.join(self.tmp_dir.name, 'metrics')
+        metrics.write(path + '.json')
+        metrics.write(path + '.prom')
+        with open(path + '.json', encoding='utf-8') as file:
+            self.assertEqual(json.load(file)['counters'], [
+                {'name': 'wins_total', 'labels': {}, 'value': 1}])
+        with open(path + '.prom', encoding='utf-8') as file:
+            self.assertIn('numbergame_wins_total 1\n', file.read())
+        self.assertFalse([name for name in os.listdir(self.tmp_dir.name)
+                          if name.endswith('.tmp')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+"""
+Test leaderboard Module
+
+This module contains unit tests for the aggregate index and leaderboard in
+the leaderboard module.
+
+Classes
+-------
+TestAggregateIndex
+    A test class for AggregateIndex and IndexedResultStore.
+
+Example usage
+-------------
+Run this script to test every method.
+
+"""
+
+import os
+import random
+import tempfile
+import unittest
+from leaderboard import AggregateIndex, IndexedResultStore
+from results_store import CsvResultStore
+from binary_store import BinaryResultStore
+
+
+def make_record(name: str, tries: int, lucky_number: int = 7) -> dict:
+    """Return a game result of name won in tries tries."""
+    return {'name': name, 'birthday': '19950101', 'age': 28,
+            'lucky_number': lucky_number, 'total_tries': tries}
+
+
+class TestAggregateIndex(unittest.TestCase):
+    """
+    TestAggregateIndex class for unit testing the aggregate index.
+
+    Methods
+    -------
+    setUp()
+        Create a temporary directory for the save files.
+    tearDown()
+        Remove the temporary directory.
+    test_player_stats()
+        Test the aggregates of one player.
+    test_leaderboard()
+        Test that the leaderboard holds the top_k best results in order.
+    test_leaderboard_ties()
+        Test that earlier results win ties on the leaderboard.
+    test_indexed_store()
+        Test that saving through an IndexedResultStore updates the index.
+    test_rebuild()
+        Test that an index rebuilt from the raw log matches the live one.
+    test_snapshot()
+        Test saving and loading a JSON snapshot of the index.
+
+    """
+    def setUp(self):
+        """Create a temporary directory for the save files."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'game_save.csv')
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.tmp_dir.cleanup()
+
+    def test_player_stats(self):
+        """
+        Test the aggregates of one player.
+        """
+        index = AggregateIndex()
+        for tries, lucky in ((3, 7), (1, 7), (2, 50), (3, 8)):
+            index.add(make_record('John Doe', tries, lucky))
+        index.add(make_record('Jane Roe', 5))
+        stats = index.player('John Doe', '19950101')
+        self.assertEqual(stats.games, 4)
+        self.assertEqual(stats.best, 1)
+        self.assertEqual(stats.mean_tries, 2.25)
+        self.assertEqual(stats.tries_histogram, {3: 2, 1: 1, 2: 1})
+        self.assertEqual(stats.lucky_numbers, {7: 2, 50: 1, 8: 1})
+        self.assertIsNone(index.player('John Doe', '20000101'))
+        self.assertEqual(index.results, 5)
+
+    def test_leaderboard(self):
+        """
+        Test that the leaderboard holds the top_k best results in order.
+        """
+        index = AggregateIndex(top_k=5)
+        tries = [random.randint(1, 10) for _ in range(500)]
+        for number, count in enumerate(tries):
+            index.add(make_record(f'Player {number}', count))
+        board = index.leaderboard()
+        self.assertEqual([row['total_tries'] for row in board],
+                         sorted(tries)[:5])
+
+    def test_leaderboard_ties(self):
+        """
+        Test that earlier results win ties on the leaderboard.
+        """
+        index = AggregateIndex(top_k=2)
+        for name in ('First Player', 'Second Player', 'Third Player'):
+            index.add(make_record(name, 2))
+        self.assertEqual([row['name'] for row in index.leaderboard()],
+                         ['First Player', 'Second Player'])
+
+    def test_indexed_store(self):
+        """
+        Test that saving through an IndexedResultStore updates the index.
+        """
+        index = AggregateIndex()
+        store = IndexedResultStore(CsvResultStore(self.path), index)
+        store.append(make_record('John Doe', 4))
+        store.append_many([make_record('John Doe', 2)] * 2)
+        self.assertEqual(index.player('John Doe', '19950101').games, 3)
+        self.assertEqual(len(store.read_page()), 3)
+        store.close()
+
+    def test_rebuild(self):
+        """
+        Test that an index rebuilt from the raw log matches the live one.
+        """
+        for store in (CsvResultStore(self.path),
+                      BinaryResultStore(self.path + '.bin')):
+            live = AggregateIndex(top_k=3)
+            indexed = IndexedResultStore(store, live)
+            for number in range(50):
+                indexed.append(make_record(f'Player {number % 4}',
+                                           number % 6 + 1, number))
+            rebuilt = AggregateIndex.from_store(store, top_k=3)
+            self.assertEqual(rebuilt.leaderboard(), live.leaderboard())
+            self.assertEqual(
+                rebuilt.player('Player 2', '19950101').to_dict(),
+                live.player('Player 2', '19950101').to_dict())
+            indexed.close()
+
+    def test_snapshot(self):
+        """
+        Test saving and loading a JSON snapshot of the index.
+        """
+        index = AggregateIndex(top_k=3)
+        for number in range(20):
+            index.add(make_record(f'Player {number % 3}', number % 5 + 1))
+        snapshot = os.path.join(self.tmp_dir.name, 'index.json')
+        index.save(snapshot)
+        loaded = AggregateIndex.load(snapshot)
+        self.assertEqual(loaded.leaderboard(), index.leaderboard())
+        self.assertEqual(loaded.player('Player 1', '19950101').to_dict(),
+                         index.player('Player 1', '19950101').to_dict())
+        # Ties keep going to the results counted before the snapshot.
+        loaded.add(make_record('Player 9', 1))
+        self.assertEqual(loaded.leaderboard(), index.leaderboard())
+
+
+if __name__ == '__main__':
+    unittest.main()
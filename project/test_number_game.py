@@ -24,10 +24,22 @@ this concept and that suggestions of this in method heads are enough.
 
 """
 
+import sys
+import tracemalloc
 import unittest
 from unittest.mock import patch
-from number_game import NumberGame
+from number_game import NumberGame, MENU, PLAYING, WON, QUIT
 from gamer_module import MyGamer
+from difficulty import DifficultyProfile
+
+
+def stack_depth() -> int:
+    """Return the number of frames on the current call stack."""
+    frame, depth = sys._getframe(), 0
+    while frame is not None:
+        frame, depth = frame.f_back, depth + 1
+    return depth
+
 
 class TestNumberGame(unittest.TestCase):
     """
@@ -42,18 +54,32 @@ class TestNumberGame(unittest.TestCase):
         Reset the testing environment to ensure independence between every test.
     test_start_menu_quit()
         Test the start_menu method with quitting the game.
+    test_start_menu_quit_cancel()
+        Test the start_menu method when quitting is not confirmed.
     test_start_menu_show_stats()
         Test the start_menu method with showing statistics.
     test_start_menu_play()
         Test the start_menu method with starting a new game.
     test_win_menu()
         Test the win_menu method.
+    test_play_round()
+        Test the play_round method.
+    test_game_loop_constant_depth()
+        Test the game_loop method over many games.
     test_take_guess()
         Test the take_guess method with valid and invalid inputs.
     test_generate_lucky_list()
         Test the generate_lucky_list method.
+    test_generate_lucky_list_config()
+        Test the generate_lucky_list method with a configured range and size.
+    test_generate_lucky_list_full_range()
+        Test the generate_lucky_list method when the list fills the range.
+    test_invalid_difficulty()
+        Test that an unknown difficulty is rejected.
     test_generate_lucky_nr()
         Test the generate_lucky_nr method.
+    test_seeded_replay()
+        Test that games with the same seed play the same way.
     test_check_guess_true()
         Test the check_guess method with a correct guess.
     test_check_guess_false()
@@ -64,10 +90,20 @@ class TestNumberGame(unittest.TestCase):
         Test the shorten_list method when dropping a number.
     test_shorten_list_equal()
         Test the shorten_list method when the list has only one element.
+    test_shorten_list_schedule()
+        Test the shorten_list method with a schedule dropping several numbers.
     test_show_stats()
         Test the show_stats method.
+    test_show_stats_page()
+        Test the show_stats method printing one page from the store.
+    test_browse_stats()
+        Test the browse_stats method.
+    test_stats_loaded_lazily()
+        Test that the save file is only read when stats are needed.
     test_save_to_csv()
         Test the save_to_csv method.
+    test_idle_session_memory()
+        Test the memory held by games waiting for a guess.
 
     """
     def setUp(self):
@@ -95,23 +131,32 @@ class TestNumberGame(unittest.TestCase):
         Test the start_menu method with quitting the game.
 
         This test simulates user input 'q' followed by 'y' to quit the game.
-        It asserts that the sys.exit function is called exactly once.
+        It asserts that the next phase is QUIT.
+        """
+        with patch('builtins.input', side_effect=['q', 'y']):
+            self.assertEqual(self.game.start_menu(), QUIT)
+
+    def test_start_menu_quit_cancel(self):
+        """
+        Test the start_menu method when quitting is not confirmed.
+
+        This test simulates user input 'q', 'n' and then 'p'. It asserts that
+        the menu is shown again and the next phase is PLAYING.
         """
-        with patch('builtins.input', side_effect=['q', 'y']), \
-            patch('sys.exit') as mock_exit: 
-            self.game.start_menu()
-            mock_exit.assert_called_once()
+        with patch('builtins.input', side_effect=['q', 'n', 'p']):
+            self.assertEqual(self.game.start_menu(), PLAYING)
 
     def test_start_menu_show_stats(self):
         """
         Test the start_menu method with showing statistics.
 
         This test simulates user input 's' to see game statistics. It asserts
-        that the NumberGame.show_stats method is called exactly once.
+        that the NumberGame.show_stats method is called exactly once and that
+        the session returns to the menu.
         """
         with patch('builtins.input', return_value='s'), \
             patch('number_game.NumberGame.show_stats') as mock_stats:
-            self.game.start_menu()
+            self.assertEqual(self.game.start_menu(), MENU)
             mock_stats.assert_called_once()
 
     def test_start_menu_play(self):
@@ -119,26 +164,61 @@ class TestNumberGame(unittest.TestCase):
         Test the start_menu method with starting a new game.
 
         This test simulates user input 'p' to start a new game. It asserts
-        that the NumberGame.game_loop method is called exactly once.
+        that a new round is drawn and the next phase is PLAYING.
         """
+        self.game.tries = 4
         with patch('builtins.input', return_value='p'), \
-            patch('number_game.NumberGame.game_loop') as mock_play:
-            self.game.start_menu()
-            mock_play.assert_called_once()
+            patch('number_game.NumberGame.new_round',
+                  wraps=self.game.new_round) as mock_round:
+            self.assertEqual(self.game.start_menu(), PLAYING)
+            mock_round.assert_called_once()
+        self.assertEqual(self.game.tries, 0)
 
-    def test_win_menu(self): 
+    def test_win_menu(self):
         """
         Test the win_menu method.
 
         This test simulates the win_menu method. It asserts that the
         NumberGame.save_to_csv method is called exactly once and that the
-        NumberGame.game_loop method is called with begin=True.
+        session returns to the menu.
         """
         with patch('number_game.NumberGame.save_to_csv') as mock_save, \
-            patch('number_game.NumberGame.game_loop') as mock_loop:
-            self.game.win_menu()
+            patch('builtins.print'):
+            self.assertEqual(self.game.win_menu(), MENU)
             mock_save.assert_called_once()
-            mock_loop.assert_called_once_with(begin=True)
+
+    def test_play_round(self):
+        """
+        Test the play_round method.
+
+        This test guesses a number in the list and then the lucky number. It
+        asserts that it takes two tries and that the next phase is WON.
+        """
+        self.game.lucky_list = [1, 2, 3, 4]
+        self.game.lucky_nr = 4
+        with patch('builtins.input', side_effect=['1', '4']), \
+            patch('builtins.print'):
+            self.assertEqual(self.game.play_round(), WON)
+        self.assertEqual(self.game.tries, 2)
+
+    def test_game_loop_constant_depth(self):
+        """
+        Test the game_loop method over many games.
+
+        This test plays more games than the recursion limit and asserts that
+        every game is saved from the same stack depth.
+        """
+        games = 2000
+        depths = []
+        with patch('number_game.NumberGame.start_menu',
+                   side_effect=[PLAYING] * games + [QUIT]), \
+            patch('number_game.NumberGame.play_round', return_value=WON), \
+            patch('number_game.NumberGame.save_to_csv',
+                  side_effect=lambda: depths.append(stack_depth())), \
+            patch('builtins.print'):
+            self.game.game_loop(begin=True)
+        self.assertEqual(len(depths), games)
+        self.assertEqual(len(set(depths)), 1)
 
     def test_take_guess(self):
         """  
@@ -165,16 +245,75 @@ class TestNumberGame(unittest.TestCase):
         self.assertEqual(len(mock_list), 10)
         self.assertEqual(mock_list.count(self.game.lucky_nr), 1)
 
+    def test_generate_lucky_list_config(self):
+        """
+        Test the generate_lucky_list method with a configured range and size.
+
+        This test creates a game over a range of 10^9 numbers and asserts
+        that the list holds list_size unique numbers in range, one of them
+        the lucky number.
+        """
+        profile = DifficultyProfile('test', 10, 10**9, 500, 10)
+        game = NumberGame(self.gamer, difficulty=profile)
+        self.assertEqual(len(set(game.lucky_list)), 500)
+        self.assertIn(game.lucky_nr, game.lucky_list)
+        self.assertTrue(all(10 <= nr <= 10**9 for nr in game.lucky_list))
+        self.assertEqual(list(game.lucky_list), sorted(game.lucky_list))
+
+    def test_generate_lucky_list_full_range(self):
+        """
+        Test the generate_lucky_list method when the list fills the range.
+
+        This test asserts that every number of the range is generated.
+        """
+        profile = DifficultyProfile('test', -5, 94, 100, 10)
+        game = NumberGame(self.gamer, difficulty=profile)
+        self.assertEqual(list(game.lucky_list), list(range(-5, 95)))
+
+    def test_invalid_difficulty(self):
+        """
+        Test that an unknown difficulty is rejected.
+        """
+        with self.assertRaises(ValueError):
+            NumberGame(self.gamer, difficulty='impossible')
+
     def test_generate_lucky_nr(self):
         """
         Test the generate_lucky_nr method.
 
-        This test simulates random.randint to return 10 as the lucky number.
-        It asserts that the returned value is 10.
+        This test simulates the game's rng.randint to return 10 as the lucky
+        number. It asserts that the returned value is 10.
         """
-        with patch('random.randint', return_value=10):
+        with patch.object(self.game, 'rng') as mock_rng:
+            mock_rng.randint.return_value = 10
             mock_luck = self.game.generate_lucky_nr()
             self.assertEqual(mock_luck, 10)
+            mock_rng.randint.assert_called_once_with(0, 100)
+
+    def test_seeded_replay(self):
+        """
+        Test that games with the same seed play the same way.
+
+        This test plays two games seeded alike with the same wrong guesses
+        and asserts that their lucky numbers and lists stay equal, and that
+        a game without a seed records the one it drew.
+        """
+        first = NumberGame(self.gamer, rng=1234)
+        second = NumberGame(self.gamer, rng=1234)
+        self.assertEqual(first.seed, 1234)
+        self.assertEqual(first.lucky_nr, second.lucky_nr)
+        self.assertEqual(list(first.lucky_list), list(second.lucky_list))
+        for game in (first, second):
+            for _ in range(3):
+                game.tries += 1
+                guess = game.lucky_list.select(0)
+                if guess == game.lucky_nr and len(game.lucky_list) > 1:
+                    guess = game.lucky_list.select(1)
+                game.check_guess(guess)
+        self.assertEqual(list(first.lucky_list), list(second.lucky_list))
+        self.assertIsInstance(self.game.seed, int)
+        replay = NumberGame(self.gamer, rng=self.game.seed)
+        self.assertEqual(replay.lucky_nr, self.game.lucky_nr)
 
     def test_check_guess_true(self):
         """
@@ -210,7 +349,7 @@ class TestNumberGame(unittest.TestCase):
         self.game.lucky_list = [1, 5, 10, self.game.lucky_nr, 20, 25, 30]
         self.game.shorten_list()
         expected_list = [10, 15, 20]
-        self.assertEqual(expected_list, self.game.lucky_list)
+        self.assertEqual(expected_list, list(self.game.lucky_list))
 
     def test_shorten_list_drop(self):
         """
@@ -234,6 +373,27 @@ class TestNumberGame(unittest.TestCase):
         self.game.shorten_list()
         self.assertEqual(len(self.game.lucky_list), 1)
 
+    def test_shorten_list_schedule(self):
+        """
+        Test the shorten_list method with a schedule dropping several numbers.
+
+        This test uses a profile that drops three numbers per miss and
+        asserts that three numbers, never the lucky number, are dropped and
+        returned.
+        """
+        profile = DifficultyProfile('test', 0, 100, 10, 10, drops=3)
+        game = NumberGame(self.gamer, difficulty=profile)
+        for _ in range(200):
+            game.tries = 2
+            game.lucky_nr = 15
+            game.lucky_list = [1, 5, 10, game.lucky_nr, 20, 25, 30]
+            dropped = game.shorten_list()
+            self.assertEqual(len(game.lucky_list), 4)
+            self.assertEqual(len(dropped), 3)
+            self.assertFalse(set(dropped) & set(game.lucky_list))
+            self.assertIn(game.lucky_nr, game.lucky_list)
+            self.assertEqual(len(set(game.lucky_list)), 4)
+
     def test_show_stats(self):
         """
         Test the show_stats method.
@@ -241,20 +401,96 @@ class TestNumberGame(unittest.TestCase):
         This test simulates the show_stats method and checks if the print
         function is called.
         """
-        with patch('builtins.print') as mock_print:
+        with patch.object(self.game.store, 'read_page', return_value=[]), \
+            patch('builtins.print') as mock_print:
             self.game.show_stats()
             mock_print.assert_called_once()
 
+    def test_show_stats_page(self):
+        """
+        Test the show_stats method printing one page from the store.
+
+        This test asserts that the page is read from the store and printed
+        without loading the save file.
+        """
+        record = {'name': 'John Doe', 'birthday': '19950101', 'age': 28,
+                  'lucky_number': 42, 'total_tries': 3}
+        with patch.object(self.game.store, 'read_page',
+                          return_value=[record]) as mock_page, \
+            patch('number_game.load_history') as mock_load, \
+            patch('builtins.print') as mock_print:
+            self.game.show_stats(page=2, page_size=5, player='John Doe')
+            mock_page.assert_called_once_with(2, 5, 'John Doe')
+            mock_load.assert_not_called()
+            self.assertIn('John Doe', mock_print.call_args.args[0])
+
+    def test_browse_stats(self):
+        """
+        Test the browse_stats method.
+
+        This test pages forward twice, back once, filters by a player and
+        leaves. It asserts the pages and filters shown.
+        """
+        with patch('builtins.input',
+                   side_effect=['n', 'n', 'p', 'f', 'john doe', 'q']), \
+            patch('number_game.NumberGame.show_stats') as mock_stats:
+            self.game.browse_stats(page_size=10)
+        shown = [call.args for call in mock_stats.call_args_list]
+        self.assertEqual(shown, [(0, 10, None), (1, 10, None),
+                                 (2, 10, None), (1, 10, None),
+                                 (0, 10, 'John Doe')])
+
+    def test_stats_loaded_lazily(self):
+        """
+        Test that the save file is only read when stats are needed.
+
+        This test creates a new game and asserts that load_history is not
+        called until the save_file is accessed.
+        """
+        with patch('number_game.load_history') as mock_load:
+            game = NumberGame(self.gamer)
+            mock_load.assert_not_called()
+            self.assertIs(game.save_file, mock_load.return_value)
+            mock_load.assert_called_once_with(game.path)
+
     def test_save_to_csv(self):
         """
         Test the save_to_csv method.
 
-        This test simulates the save_to_csv method and checks if the to_csv
-        function is called with the correct arguments.
+        This test simulates the save_to_csv method and checks that exactly
+        one record, holding the game results, is appended to the store.
+        """
+        with patch.object(self.game.store, 'append',
+                          return_value=42) as mock_append:
+            written = self.game.save_to_csv()
+            mock_append.assert_called_once()
+            record = mock_append.call_args.args[0]
+            self.assertEqual(record['name'], self.gamer.name)
+            self.assertEqual(record['lucky_number'], self.game.lucky_nr)
+            self.assertEqual(record['total_tries'], self.game.tries)
+            self.assertEqual(written, 42)
+
+    def test_idle_session_memory(self):
+        """
+        Test the memory held by games waiting for a guess.
+
+        This test creates many games sharing one store and asserts that
+        none of them has a __dict__ and that each holds well under 640
+        bytes, a tenth of what a game holding its own DataFrame of a
+        three-row save file took.
         """
-        with patch('pandas.DataFrame.to_csv') as mock_to_csv:
-            self.game.save_to_csv()
-            mock_to_csv.assert_called_once_with(self.game.path, index=False)
+        self.assertFalse(hasattr(self.game, '__dict__'))
+        self.assertFalse(hasattr(self.gamer, '__dict__'))
+        store, count = self.game.store, 1000
+        tracemalloc.start()
+        try:
+            games = [NumberGame(MyGamer('John Doe', '19950101'), store)
+                     for _ in range(count)]
+            size = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(len(games), count)
+        self.assertLess(size / count, 640)
 # """
 if __name__ == '__main__':
     unittest.main()
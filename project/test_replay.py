@@ -0,0 +1,167 @@
+"""
+Test replay Module
+
+This module contains unit tests for the guess log and the replay engine in
+the replay module.
+
+Classes
+-------
+TestReplay
+    A test class for GuessLog, read_log and the replay functions.
+
+Example usage
+-------------
+Run this script to test every method.
+
+"""
+
+import os
+import random
+import tempfile
+import unittest
+from unittest.mock import patch
+from replay import GuessLog, read_log, replay_round, replay_log
+from number_game import NumberGame, HIT, MISS, OUTSIDE
+from gamer_module import MyGamer
+from results_store import ResultsStore
+
+
+class TestReplay(unittest.TestCase):
+    """
+    TestReplay class for unit testing the replay module.
+
+    Methods
+    -------
+    setUp()
+        Create a log in a temporary directory.
+    tearDown()
+        Close the log and remove the temporary directory.
+    test_round_trip()
+        Test that a round reads back as it was played.
+    test_replay()
+        Test that logged rounds replay without mismatches.
+    test_rule_change()
+        Test that a change to the rules is reported.
+    test_written_when_won()
+        Test that a won round reaches the file before the log is closed.
+    test_unfinished_round()
+        Test that unfinished rounds are written when flushed.
+    test_torn_frame()
+        Test that a frame cut short is ignored.
+    test_invalid()
+        Test that bad files and generators are rejected.
+
+    """
+    def setUp(self):
+        """Create a log in a temporary directory."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'guesses.log')
+        self.log = GuessLog(self.path)
+        self.gamer = MyGamer('John Doe', '19950101')
+        self.store = ResultsStore()
+
+    def tearDown(self):
+        """Close the log and remove the temporary directory."""
+        self.log.close()
+        self.tmp_dir.cleanup()
+
+    def play(self, seed, difficulty='normal'):
+        """Play one round guessing the smallest wrong number, return it."""
+        game = NumberGame(self.gamer, self.store, difficulty, rng=seed,
+                          log=self.log)
+        played = []
+        outcome = None
+        while outcome != HIT:
+            game.tries += 1
+            guess = game.lucky_list.select(0)
+            if guess == game.lucky_nr and len(game.lucky_list) > 1:
+                guess = game.lucky_list.select(1)
+            if len(played) == 1:
+                guess = game.difficulty.high + 1  # Outside the list.
+            outcome = game.judge_guess(guess)
+            played.append((guess, outcome, len(game.lucky_list)))
+        return played
+
+    def test_round_trip(self):
+        """Test that a round reads back as it was played."""
+        played = self.play(7)
+        self.log.close()
+        rounds = list(read_log(self.path))
+        self.assertEqual(len(rounds), 1)
+        self.assertEqual(rounds[0].profile.name, 'normal')
+        self.assertEqual([entry[:3] for entry in rounds[0].guesses], played)
+        self.assertEqual(rounds[0].guesses[1][1], OUTSIDE)
+        lucky_nr = played[-1][0]
+        for _, outcome, _, dropped in rounds[0].guesses[2:]:
+            if outcome == MISS:
+                self.assertLessEqual(len(dropped), 1)
+                self.assertNotIn(lucky_nr, dropped)
+
+    def test_replay(self):
+        """Test that logged rounds replay without mismatches."""
+        for seed in range(30):
+            self.play(seed, ('easy', 'normal', 'hard')[seed % 3])
+        self.log.close()
+        for logged in read_log(self.path):
+            self.assertIsNone(replay_round(logged))
+        for workers in (1, 2):
+            report = replay_log(self.path, workers)
+            self.assertEqual(report.rounds, 30)
+            self.assertEqual(report.mismatches, [])
+            self.assertGreater(report.guesses, 30)
+
+    def test_rule_change(self):
+        """Test that a change to the rules is reported."""
+        for seed in range(5):
+            self.play(seed)
+        self.log.close()
+        with patch.object(NumberGame, 'shorten_list', return_value=[]):
+            report = replay_log(self.path)
+        self.assertEqual(len(report.mismatches), 5)
+        self.assertIn('guess 1', report.mismatches[0][1])
+
+    def test_written_when_won(self):
+        """Test that a won round reaches the file before the log is
+        closed."""
+        self.play(1)
+        self.play(2)
+        self.assertEqual(len(list(read_log(self.path))), 2)
+
+    def test_unfinished_round(self):
+        """Test that unfinished rounds are written when flushed."""
+        game = NumberGame(self.gamer, self.store, rng=3, log=self.log)
+        game.new_round()  # A round without guesses is not written.
+        game.tries += 1
+        game.judge_guess(-1)
+        game.flush_log()
+        self.log.close()
+        rounds = list(read_log(self.path))
+        self.assertEqual(len(rounds), 1)
+        self.assertEqual(rounds[0].guesses, [(-1, OUTSIDE, 10, ())])
+        self.assertIsNone(replay_round(rounds[0]))
+
+    def test_torn_frame(self):
+        """Test that a frame cut short is ignored."""
+        self.play(1)
+        self.play(2)
+        self.log.close()
+        with open(self.path, 'r+b') as file:
+            file.truncate(os.path.getsize(self.path) - 3)
+        self.assertEqual(len(list(read_log(self.path))), 1)
+
+    def test_invalid(self):
+        """Test that bad files and generators are rejected."""
+        other = os.path.join(self.tmp_dir.name, 'other.log')
+        with open(other, 'wb') as file:
+            file.write(b'not a guess log')
+        with self.assertRaises(ValueError):
+            GuessLog(other)
+        with self.assertRaises(ValueError):
+            list(read_log(other))
+        with self.assertRaises(TypeError):
+            NumberGame(self.gamer, self.store, rng=random.Random(1),
+                       log=self.log)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,510 @@
+"""
+Test results_store Module
+
+This module contains unit tests for the results store backends in the
+results_store module.
+
+Classes
+-------
+TestCsvResultStore
+    A test class for CsvResultStore unit tests.
+TestLoadHistory
+    A test class for the cached history loader.
+TestBatchedResultWriter
+    A test class for BatchedResultWriter unit tests.
+
+Example usage
+-------------
+Run this script to test every method.
+
+"""
+
+import os
+import time
+import tempfile
+import threading
+import unittest
+import multiprocessing
+from unittest.mock import patch
+import pandas as pd
+from results_store import CsvResultStore, BatchedResultWriter, FIELDNAMES, \
+    load_history, clear_history_cache, reverse_lines, format_results, \
+    _lock, _unlock
+
+RECORD = {
+    'name': 'John Doe',
+    'birthday': '19950101',
+    'age': 28,
+    'lucky_number': 42,
+    'total_tries': 3
+}
+
+
+def append_rows(path, worker, rows):
+    """Append rows results numbered by worker, from another process."""
+    store = CsvResultStore(path)
+    for nr in range(rows):
+        store.append(dict(RECORD, lucky_number=nr, total_tries=worker))
+    store.close()
+
+
+class TestCsvResultStore(unittest.TestCase):
+    """
+    TestCsvResultStore class for unit testing the CsvResultStore class.
+
+    Methods
+    -------
+    setUp()
+        Create a temporary directory for the save file.
+    tearDown()
+        Remove the temporary directory.
+    test_append_new_file()
+        Test that appending to a missing file writes a header first.
+    test_append_existing_file()
+        Test that appending keeps the earlier rows untouched.
+    test_append_returns_bytes()
+        Test that append reports the number of bytes written.
+    test_fsync_always()
+        Test that the 'always' policy fsyncs on every append.
+    test_fsync_never()
+        Test that the 'never' policy does not fsync.
+    test_invalid_fsync()
+        Test that an unknown fsync policy is rejected.
+    test_append_many()
+        Test that several results are written with a single write.
+    test_read_page()
+        Test reading pages of results, newest first.
+    test_read_page_player()
+        Test reading pages of one player's results.
+    test_read_page_float_rows()
+        Test reading rows written with float columns.
+    test_iter_records()
+        Test streaming every result, oldest first.
+    test_reverse_lines()
+        Test reading lines backwards across block boundaries.
+    test_format_results()
+        Test formatting results as a table.
+    test_torn_row()
+        Test that a row cut short by a crash is not glued to the next one.
+    test_compact()
+        Test compacting the file while another store appends to it.
+    test_processes()
+        Test that processes appending and compacting at once lose no rows.
+    test_fork()
+        Test that a child started with fork waits for the parent's lock.
+
+    """
+    def setUp(self):
+        """Create a temporary directory for the save file."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'game_save.csv')
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.tmp_dir.cleanup()
+
+    def read_lines(self):
+        """Return the lines of the save file."""
+        with open(self.path, encoding='utf-8') as file:
+            return file.read().splitlines()
+
+    def test_append_new_file(self):
+        """
+        Test that appending to a missing file writes a header first.
+        """
+        store = CsvResultStore(self.path)
+        store.append(RECORD)
+        store.close()
+        self.assertEqual(self.read_lines(), [
+            ','.join(FIELDNAMES), 'John Doe,19950101,28,42,3'])
+
+    def test_append_existing_file(self):
+        """
+        Test that appending keeps the earlier rows untouched.
+        """
+        with open(self.path, 'w', encoding='utf-8') as file:
+            file.write(','.join(FIELDNAMES) + '\nTyra Forsgren,20030717,'
+                       '20.0,78.0,2.0\n')
+        store = CsvResultStore(self.path)
+        store.append(RECORD)
+        store.append(RECORD)
+        store.close()
+        lines = self.read_lines()
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(lines[1], 'Tyra Forsgren,20030717,20.0,78.0,2.0')
+
+    def test_append_returns_bytes(self):
+        """
+        Test that append reports the number of bytes written.
+        """
+        store = CsvResultStore(self.path)
+        store.append(RECORD)
+        size = os.path.getsize(self.path)
+        written = store.append(RECORD)
+        store.close()
+        self.assertEqual(os.path.getsize(self.path), size + written)
+
+    def test_fsync_always(self):
+        """
+        Test that the 'always' policy fsyncs on every append.
+        """
+        store = CsvResultStore(self.path, fsync='always')
+        with patch('os.fsync') as mock_fsync:
+            store.append(RECORD)
+            store.append(RECORD)
+            self.assertEqual(mock_fsync.call_count, 2)
+        store.close()
+
+    def test_fsync_never(self):
+        """
+        Test that the 'never' policy does not fsync.
+        """
+        store = CsvResultStore(self.path)
+        with patch('os.fsync') as mock_fsync:
+            store.append(RECORD)
+            store.close()
+            mock_fsync.assert_not_called()
+
+    def test_invalid_fsync(self):
+        """
+        Test that an unknown fsync policy is rejected.
+        """
+        with self.assertRaises(ValueError):
+            CsvResultStore(self.path, fsync='sometimes')
+
+    def test_append_many(self):
+        """
+        Test that several results are written with a single write.
+        """
+        store = CsvResultStore(self.path, fsync='always')
+        with patch('os.fsync') as mock_fsync:
+            written = store.append_many([RECORD] * 5)
+            mock_fsync.assert_called_once()
+        store.close()
+        self.assertEqual(len(self.read_lines()), 6)
+        self.assertEqual(written, 5 * len('John Doe,19950101,28,42,3\n'))
+
+    def test_read_page(self):
+        """
+        Test reading pages of results, newest first.
+        """
+        store = CsvResultStore(self.path)
+        self.assertEqual(store.read_page(), [])
+        store.append_many([dict(RECORD, lucky_number=nr)
+                           for nr in range(25)])
+        first = store.read_page(0, 10)
+        self.assertEqual(first[0], dict(RECORD, lucky_number=24))
+        self.assertEqual([row['lucky_number'] for row in first],
+                         list(range(24, 14, -1)))
+        last = store.read_page(2, 10)
+        self.assertEqual([row['lucky_number'] for row in last],
+                         list(range(4, -1, -1)))
+        self.assertEqual(store.read_page(3, 10), [])
+        store.close()
+
+    def test_read_page_player(self):
+        """
+        Test reading pages of one player's results.
+        """
+        store = CsvResultStore(self.path)
+        store.append_many([
+            dict(RECORD, lucky_number=nr,
+                 name='Jane Roe' if nr % 3 else 'John Doe')
+            for nr in range(30)])
+        page = store.read_page(1, 3, player='John Doe')
+        self.assertEqual([row['lucky_number'] for row in page],
+                         [18, 15, 12])
+        self.assertEqual(store.read_page(player='Nobody Here'), [])
+        store.close()
+
+    def test_read_page_float_rows(self):
+        """
+        Test reading rows written with float columns.
+        """
+        with open(self.path, 'w', encoding='utf-8') as file:
+            file.write(','.join(FIELDNAMES) + '\nTyra Forsgren,20030717,'
+                       '20.0,78.0,2.0\n')
+        self.assertEqual(CsvResultStore(self.path).read_page(), [
+            {'name': 'Tyra Forsgren', 'birthday': '20030717', 'age': 20,
+             'lucky_number': 78, 'total_tries': 2}])
+
+    def test_iter_records(self):
+        """
+        Test streaming every result, oldest first.
+        """
+        store = CsvResultStore(self.path)
+        self.assertEqual(list(store.iter_records()), [])
+        store.append_many([dict(RECORD, lucky_number=nr)
+                           for nr in range(5)])
+        self.assertEqual([row['lucky_number']
+                          for row in store.iter_records()], list(range(5)))
+        store.close()
+
+    def test_reverse_lines(self):
+        """
+        Test reading lines backwards across block boundaries.
+        """
+        lines = [f'line number {nr}'.encode() for nr in range(50)]
+        with open(self.path, 'wb') as file:
+            file.write(b'\n'.join(lines) + b'\n')
+        with open(self.path, 'rb') as file:
+            self.assertEqual(list(reverse_lines(file, block_size=7)),
+                             lines[::-1])
+
+    def test_format_results(self):
+        """
+        Test formatting results as a table.
+        """
+        table = format_results([RECORD]).splitlines()
+        self.assertEqual(len(table), 2)
+        self.assertTrue(table[0].startswith('name      birthday'))
+        self.assertTrue(table[1].startswith('John Doe  19950101'))
+
+
+    def test_torn_row(self):
+        """
+        Test that a row cut short by a crash is not glued to the next one.
+        """
+        with open(self.path, 'w', encoding='utf-8') as file:
+            file.write(','.join(FIELDNAMES) + '\nTyra Forsgren,2003')
+        store = CsvResultStore(self.path)
+        store.append(RECORD)
+        self.assertEqual(self.read_lines()[-1], 'John Doe,19950101,28,42,3')
+        self.assertEqual(store.compact(), 1)
+        self.assertEqual(list(store.iter_records()), [RECORD])
+        store.close()
+
+    def test_compact(self):
+        """
+        Test compacting the file while another store appends to it.
+        """
+        writer, other = CsvResultStore(self.path), CsvResultStore(self.path)
+        writer.append(RECORD)
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(','.join(FIELDNAMES) + '\n\nbroken,row\n')
+        self.assertEqual(other.compact(), 1)
+        writer.append(RECORD)  # Reopens the compacted file.
+        other.append(RECORD)
+        writer.close()
+        other.close()
+        self.assertEqual(self.read_lines(), [','.join(FIELDNAMES)] +
+                         ['John Doe,19950101,28,42,3'] * 3)
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)),
+                         ['game_save.csv', 'game_save.csv.lock'])
+
+    def test_processes(self):
+        """
+        Test that processes appending and compacting at once lose no rows.
+        """
+        workers, rows = 4, 300
+        processes = [multiprocessing.Process(target=append_rows,
+                                             args=(self.path, worker, rows))
+                     for worker in range(workers)]
+        for process in processes:
+            process.start()
+        store = CsvResultStore(self.path)
+        while any(process.is_alive() for process in processes):
+            store.compact()
+        for process in processes:
+            process.join()
+            self.assertEqual(process.exitcode, 0)
+        records = list(store.iter_records())
+        store.close()
+        self.assertEqual(
+            sorted((record['total_tries'], record['lucky_number'])
+                   for record in records),
+            [(worker, nr) for worker in range(workers) for nr in range(rows)])
+        self.assertEqual(self.read_lines().count(','.join(FIELDNAMES)), 1)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'needs fork')
+    def test_fork(self):
+        """
+        Test that a child started with fork waits for the parent's lock.
+        """
+        store = CsvResultStore(self.path)
+        store.append(RECORD)
+        # Hold the file lock only, the thread lock stays free.
+        _lock(store._lock_fd, exclusive=True)
+        try:
+            pid = os.fork()
+            if pid == 0:  # Child: the exit code tells the parent what it saw.
+                code = 1
+                try:
+                    saver = threading.Thread(target=store.append,
+                                             args=(RECORD,), daemon=True)
+                    saver.start()
+                    saver.join(0.5)
+                    code = 0 if saver.is_alive() else 2
+                finally:
+                    os._exit(code)
+            _, status = os.waitpid(pid, 0)
+        finally:
+            _unlock(store._lock_fd)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        store.append(RECORD)
+        store.close()
+        self.assertEqual(len(self.read_lines()), 3)
+
+
+class TestLoadHistory(unittest.TestCase):
+    """
+    TestLoadHistory class for unit testing load_history.
+
+    Methods
+    -------
+    setUp()
+        Create a save file with one result and clear the cache.
+    tearDown()
+        Remove the temporary directory and clear the cache.
+    test_cached_between_calls()
+        Test that an unchanged file is parsed only once.
+    test_invalidated_on_change()
+        Test that appending to the file invalidates the cached history.
+
+    """
+    def setUp(self):
+        """Create a save file with one result and clear the cache."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'game_save.csv')
+        self.store = CsvResultStore(self.path)
+        self.store.append(RECORD)
+        clear_history_cache()
+
+    def tearDown(self):
+        """Remove the temporary directory and clear the cache."""
+        self.store.close()
+        self.tmp_dir.cleanup()
+        clear_history_cache()
+
+    def test_cached_between_calls(self):
+        """
+        Test that an unchanged file is parsed only once.
+        """
+        with patch('pandas.read_csv', wraps=pd.read_csv) as mock_read:
+            first = load_history(self.path)
+            second = load_history(self.path)
+            mock_read.assert_called_once()
+        self.assertIs(first, second)
+
+    def test_invalidated_on_change(self):
+        """
+        Test that appending to the file invalidates the cached history.
+        """
+        self.assertEqual(len(load_history(self.path)), 1)
+        self.store.append(RECORD)
+        self.assertEqual(len(load_history(self.path)), 2)
+
+
+
+class TestBatchedResultWriter(unittest.TestCase):
+    """
+    TestBatchedResultWriter class for unit testing BatchedResultWriter.
+
+    Methods
+    -------
+    setUp()
+        Create a temporary directory for the save file.
+    tearDown()
+        Remove the temporary directory.
+    test_concurrent_appends()
+        Test that no result is lost when many threads append at once.
+    test_flush_by_time()
+        Test that a lone result is written once max_delay has passed.
+    test_flush()
+        Test that flush writes everything queued before it.
+    test_closed()
+        Test that appending to a closed writer is rejected.
+    test_error()
+        Test that a write error is raised to the producer on flush.
+
+    """
+    def setUp(self):
+        """Create a temporary directory for the save file."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'game_save.csv')
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.tmp_dir.cleanup()
+
+    def count_rows(self):
+        """Return the number of results in the save file."""
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, encoding='utf-8') as file:
+            return len(file.read().splitlines()) - 1
+
+    def test_concurrent_appends(self):
+        """
+        Test that no result is lost when many threads append at once.
+
+        The results must also be coalesced into far fewer writes.
+        """
+        store = CsvResultStore(self.path)
+        writer = BatchedResultWriter(store, max_batch=100, max_delay=1)
+
+        def produce():
+            for _ in range(500):
+                writer.append(RECORD)
+
+        with patch.object(store, 'append_many',
+                          wraps=store.append_many) as mock_write:
+            threads = [threading.Thread(target=produce) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            writer.close()
+            self.assertLessEqual(mock_write.call_count, 4000 // 100 + 8)
+        self.assertEqual(self.count_rows(), 4000)
+
+    def test_flush_by_time(self):
+        """
+        Test that a lone result is written once max_delay has passed.
+        """
+        writer = BatchedResultWriter(CsvResultStore(self.path),
+                                     max_delay=0.01)
+        writer.append(RECORD)
+        for _ in range(200):
+            if self.count_rows() == 1:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.count_rows(), 1)
+        writer.close()
+
+    def test_flush(self):
+        """
+        Test that flush writes everything queued before it.
+        """
+        writer = BatchedResultWriter(CsvResultStore(self.path),
+                                     max_delay=60)
+        for _ in range(3):
+            writer.append(RECORD)
+        writer.flush()
+        self.assertEqual(self.count_rows(), 3)
+        writer.close()
+
+    def test_closed(self):
+        """
+        Test that appending to a closed writer is rejected.
+        """
+        writer = BatchedResultWriter(CsvResultStore(self.path))
+        writer.close()
+        with self.assertRaises(ValueError):
+            writer.append(RECORD)
+
+    def test_error(self):
+        """
+        Test that a write error is raised to the producer on flush.
+        """
+        store = CsvResultStore(self.path)
+        writer = BatchedResultWriter(store)
+        with patch.object(store, 'append_many', side_effect=OSError('full')):
+            writer.append(RECORD)
+            with self.assertRaises(OSError):
+                writer.flush()
+        writer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
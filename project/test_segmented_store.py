@@ -0,0 +1,384 @@
+"""
+Test segmented_store Module
+
+This module contains unit tests for the segmented results backend in the
+segmented_store module.
+
+Classes
+-------
+TestSegmentedResultStore
+    A test class for SegmentedResultStore unit tests.
+
+Example usage
+-------------
+Run this script to test every method.
+
+"""
+
+import os
+import sys
+import json
+import tempfile
+import subprocess
+import threading
+import unittest
+from unittest.mock import patch
+import segmented_store
+from segmented_store import SegmentedResultStore, summarize, convert_csv, \
+    ACTIVE, SEALED, COMPACTED
+from number_game import NumberGame
+from gamer_module import MyGamer
+
+NAMES = ('John Doe', 'Tyra Forsgren', 'Jane Roe')
+
+
+def records(count, start=0, names=NAMES):
+    """Return count results, cycling through names."""
+    return [{'name': names[nr % len(names)], 'birthday': '19950101',
+             'age': 28, 'lucky_number': nr, 'total_tries': nr % 7 + 1}
+            for nr in range(start, start + count)]
+
+
+class TestSegmentedResultStore(unittest.TestCase):
+    """
+    TestSegmentedResultStore class for unit testing the segmented backend.
+
+    Methods
+    -------
+    setUp()
+        Create a temporary directory for the store.
+    tearDown()
+        Close the stores and remove the temporary directory.
+    test_rotation()
+        Test sealing the active segment once it is full.
+    test_max_age()
+        Test sealing the active segment once it is too old.
+    test_compact()
+        Test compressing sealed segments and summarizing them.
+    test_background()
+        Test that the background thread compacts sealed segments.
+    test_read_page()
+        Test reading pages across segments, newest first.
+    test_skip_segments()
+        Test that player pages skip segments by their summaries.
+    test_page_streamed()
+        Test that a page of a compacted segment parses the page only.
+    test_player_stats()
+        Test player stats from summaries and uncompacted segments.
+    test_reopen()
+        Test that opening a store reads the manifest only.
+    test_exclusive()
+        Test that a directory is used by one store at a time.
+    test_leftovers()
+        Test that files the manifest does not name are removed.
+    test_threads()
+        Test appending from several threads while compacting.
+    test_number_game()
+        Test saving and showing stats of a game through the store.
+    test_convert_csv()
+        Test converting a CSV save file into segments.
+    test_invalid()
+        Test that invalid settings are rejected.
+
+    """
+    def setUp(self):
+        """Create a temporary directory for the store."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp_dir.name, 'history')
+        self.stores = []
+
+    def tearDown(self):
+        """Close the stores and remove the temporary directory."""
+        for store in self.stores:
+            store.close()
+        self.tmp_dir.cleanup()
+
+    def open(self, **settings):
+        """Return a store of the directory, without a background thread
+        unless asked for."""
+        settings.setdefault('background', False)
+        store = SegmentedResultStore(self.directory, **settings)
+        self.stores.append(store)
+        return store
+
+    def filled(self, count=60, per_segment=10, compact=True):
+        """Return a store of count results, sealed every per_segment."""
+        store = self.open()
+        for start in range(0, count, per_segment):
+            store.append_many(records(per_segment, start))
+            store.rotate()
+        if compact:
+            store.compact()
+        return store
+
+    def test_rotation(self):
+        """Test sealing the active segment once it is full."""
+        store = self.open(max_bytes=200)
+        for record in records(30):
+            store.append(record)
+        segments = store.segments()
+        self.assertGreater(len(segments), 2)
+        self.assertEqual([entry['state'] for entry in segments],
+                         [SEALED] * (len(segments) - 1) + [ACTIVE])
+        for entry in segments[:-1]:
+            size = os.path.getsize(os.path.join(self.directory,
+                                                entry['file']))
+            self.assertGreaterEqual(size, 200)
+            self.assertLess(size, 250)
+        self.assertEqual(list(store.iter_records()), records(30))
+
+    def test_max_age(self):
+        """Test sealing the active segment once it is too old."""
+        with patch('segmented_store.time.time', return_value=1000.0):
+            store = self.open(max_age=60)
+            store.append_many(records(2))
+        with patch('segmented_store.time.time', return_value=1059.0):
+            store.append_many(records(2, 2))
+        self.assertEqual(len(store.segments()), 1)
+        with patch('segmented_store.time.time', return_value=1060.0):
+            store.append_many(records(2, 4))
+        self.assertEqual([entry['state'] for entry in store.segments()],
+                         [SEALED, ACTIVE])
+        self.assertEqual(list(store.iter_records()), records(6))
+
+    def test_compact(self):
+        """Test compressing sealed segments and summarizing them."""
+        store = self.filled(compact=False)
+        store.append_many(records(5, 60))
+        self.assertEqual(store.compact(), 6)
+        self.assertEqual(store.compact(), 0)
+        segments = store.segments()
+        self.assertEqual([entry['state'] for entry in segments],
+                         [COMPACTED] * 6 + [ACTIVE])
+        self.assertEqual(segments[0]['file'], 'segment-000001.csv.gz')
+        self.assertEqual(segments[0]['summary'], summarize(records(10)))
+        self.assertEqual(segments[0]['summary']['players']['John Doe'],
+                         [4, 1, 7])
+        self.assertEqual(sorted(os.listdir(self.directory)), sorted(
+            ['manifest.json', 'store.lock', segments[-1]['file'],
+             segments[-1]['file'] + '.lock'] +
+            [entry['file'] for entry in segments[:-1]]))
+        self.assertEqual(list(store.iter_records()), records(65))
+
+    def test_background(self):
+        """Test that the background thread compacts sealed segments."""
+        store = self.open(background=True)
+        store.append_many(records(10))
+        store.rotate()
+        store.append_many(records(10, 10))
+        store.compact()
+        self.assertEqual([entry['state'] for entry in store.segments()],
+                         [COMPACTED, ACTIVE])
+        store.close()
+        self.assertFalse(store._thread)
+        self.assertEqual(list(self.open().iter_records()), records(20))
+        with self.assertRaises(ValueError):
+            store.append(records(1)[0])
+
+    def test_read_page(self):
+        """Test reading pages across segments, newest first."""
+        store = self.filled(count=50)
+        # A sealed and an active segment after the compacted ones.
+        store.append_many(records(10, 50))
+        store.rotate()
+        store.append_many(records(7, 60))
+        expected = records(67)[::-1]
+        for page_size in (1, 4, 10, 25):
+            for page in range(67 // page_size + 2):
+                self.assertEqual(
+                    store.read_page(page, page_size),
+                    expected[page * page_size:(page + 1) * page_size])
+        mine = [record for record in expected
+                if record['name'] == 'Tyra Forsgren']
+        for page in range(5):
+            self.assertEqual(store.read_page(page, 6, 'Tyra Forsgren'),
+                             mine[page * 6:(page + 1) * 6])
+        self.assertEqual(store.read_page(0, 5, 'Nobody Here'), [])
+
+    def test_skip_segments(self):
+        """Test that player pages skip segments by their summaries."""
+        store = self.open()
+        store.append_many(records(10, names=('John Doe',)))
+        store.rotate()
+        for start in range(10, 40, 10):
+            store.append_many(records(10, start, names=('Jane Roe',)))
+            store.rotate()
+        store.compact()
+        with patch('segmented_store.gzip.open',
+                   wraps=segmented_store.gzip.open) as mock_open:
+            page = store.read_page(0, 3, 'John Doe')
+            self.assertEqual([record['lucky_number'] for record in page],
+                             [9, 8, 7])
+            self.assertEqual(mock_open.call_count, 1)
+            # Page 1 is the whole second newest segment, the newest is
+            # skipped unopened.
+            store.read_page(1, 10)
+            self.assertEqual(mock_open.call_count, 2)
+            self.assertEqual(store.read_page(0, 3, 'Nobody Here'), [])
+            self.assertEqual(mock_open.call_count, 2)
+
+    def test_page_streamed(self):
+        """Test that a page of a compacted segment parses the page only."""
+        names = ('John Doe', 'Roe, Jane')
+        store = self.open()
+        store.append_many(records(1000, names=names))
+        store.rotate()
+        store.compact()
+        expected = records(1000, names=names)[::-1]
+        with patch('segmented_store.parse_row',
+                   wraps=segmented_store.parse_row) as mock_parse:
+            self.assertEqual(store.read_page(3, 5), expected[15:20])
+            self.assertEqual(mock_parse.call_count, 5)
+        for name in names:
+            mine = [record for record in expected if record['name'] == name]
+            self.assertEqual(store.read_page(7, 9, name), mine[63:72])
+        self.assertEqual(store.read_page(99, 10), expected[990:])
+
+    def test_player_stats(self):
+        """Test player stats from summaries and uncompacted segments."""
+        store = self.filled()
+        store.append(dict(records(1)[0], total_tries=9))
+        with patch('segmented_store.gzip.open') as mock_open:
+            stats = store.player_stats('John Doe')
+        mock_open.assert_not_called()
+        mine = [record['total_tries'] for record in records(60)
+                if record['name'] == 'John Doe'] + [9]
+        self.assertEqual(stats, {'games': len(mine),
+                                 'fewest_tries': min(mine),
+                                 'most_tries': 9})
+        self.assertEqual(store.player_stats('Nobody Here'), {
+            'games': 0, 'fewest_tries': None, 'most_tries': None})
+
+    def test_reopen(self):
+        """Test that opening a store reads the manifest only."""
+        store = self.filled()
+        store.append_many(records(5, 60))
+        store.close()
+        with patch('segmented_store.gzip.open') as mock_open, \
+                patch('segmented_store._rows') as mock_rows:
+            store = self.open()
+        mock_open.assert_not_called()
+        mock_rows.assert_not_called()
+        store.append_many(records(5, 65))
+        self.assertEqual(len(store.segments()), 7)
+        self.assertEqual(list(store.iter_records()), records(70))
+        with open(os.path.join(self.directory, 'manifest.json'),
+                  encoding='utf-8') as file:
+            manifest = json.load(file)
+        manifest['version'] = 2
+        with open(os.path.join(self.directory, 'manifest.json'), 'w',
+                  encoding='utf-8') as file:
+            json.dump(manifest, file)
+        store.close()
+        with self.assertRaises(ValueError):
+            SegmentedResultStore(self.directory)
+        manifest['version'] = 1
+        with open(os.path.join(self.directory, 'manifest.json'), 'w',
+                  encoding='utf-8') as file:
+            json.dump(manifest, file)
+        self.open()  # The failed store released the directory.
+
+    def test_exclusive(self):
+        """Test that a directory is used by one store at a time."""
+        store = self.open()
+        store.append_many(records(3))
+        with self.assertRaises(RuntimeError):
+            SegmentedResultStore(self.directory)
+        process = subprocess.run(
+            [sys.executable, '-c',
+             'import sys, segmented_store\n'
+             'try:\n'
+             '    segmented_store.SegmentedResultStore(sys.argv[1])\n'
+             'except RuntimeError:\n'
+             '    sys.exit(3)\n', self.directory],
+            cwd=os.path.dirname(os.path.abspath(segmented_store.__file__)),
+            check=False)
+        self.assertEqual(process.returncode, 3)
+        store.close()
+        self.assertEqual(list(self.open().iter_records()), records(3))
+
+    def test_leftovers(self):
+        """Test that files the manifest does not name are removed."""
+        store = self.filled(count=20, compact=False)
+        store.close()
+        for name in ('segment-000001.csv.gz.tmp', 'segment-000099.csv',
+                     'manifest.json.tmp'):
+            with open(os.path.join(self.directory, name), 'wb') as file:
+                file.write(b'torn')
+        with open(os.path.join(self.directory, 'notes.txt'), 'w',
+                  encoding='utf-8') as file:
+            file.write('kept')
+        store = self.open(background=True)
+        store.compact()
+        store.close()
+        self.assertEqual(sorted(os.listdir(self.directory)), [
+            'manifest.json', 'notes.txt', 'segment-000001.csv.gz',
+            'segment-000002.csv.gz', 'store.lock'])
+        self.assertEqual(list(store.iter_records()), records(20))
+
+    def test_threads(self):
+        """Test appending from several threads while compacting."""
+        store = self.open(max_bytes=500, background=True)
+
+        def save(worker):
+            for record in records(100, worker * 100):
+                store.append(record)
+
+        threads = [threading.Thread(target=save, args=(worker,))
+                   for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        store.rotate()
+        store.compact()
+        self.assertEqual(sorted(record['lucky_number']
+                                for record in store.iter_records()),
+                         list(range(400)))
+        self.assertEqual(sum(entry['summary']['rows']
+                             for entry in store.segments()), 400)
+
+    def test_number_game(self):
+        """Test saving and showing stats of a game through the store."""
+        store = self.open()
+        game = NumberGame(MyGamer('John Doe', '19950101'), store)
+        game.tries = 2
+        game.save_to_csv()
+        with patch('builtins.print') as mock_print:
+            game.show_stats(player='John Doe')
+        self.assertIn('John Doe', mock_print.call_args[0][0])
+        self.assertEqual(store.read_page()[0]['total_tries'], 2)
+
+    def test_convert_csv(self):
+        """Test converting a CSV save file into segments."""
+        csv_path = os.path.join(self.tmp_dir.name, 'game_save.csv')
+        with open(csv_path, 'w', encoding='utf-8') as file:
+            file.write('name,birthday,age,lucky_number,total_tries\n'
+                       'Tyra Forsgren,20030717,20.0,78.0,2.0\n')
+            for record in records(99):
+                file.write(','.join(str(value)
+                                    for value in record.values()) + '\n')
+        self.assertEqual(
+            convert_csv(csv_path, self.directory, max_bytes=500,
+                        batch_size=10), 100)
+        store = self.open()
+        self.assertEqual(store.read_page(0, 1, 'Tyra Forsgren')[0],
+                         records(99)[-2])
+        self.assertEqual(list(store.iter_records())[0], {
+            'name': 'Tyra Forsgren', 'birthday': '20030717', 'age': 20,
+            'lucky_number': 78, 'total_tries': 2})
+        states = [entry['state'] for entry in store.segments()]
+        self.assertEqual(states, [COMPACTED] * (len(states) - 1) + [ACTIVE])
+
+    def test_invalid(self):
+        """Test that invalid settings are rejected."""
+        with self.assertRaises(ValueError):
+            SegmentedResultStore(self.directory, fsync='sometimes')
+        with self.assertRaises(ValueError):
+            SegmentedResultStore(self.directory, max_bytes=0)
+        with self.assertRaises(ValueError):
+            SegmentedResultStore(self.directory, max_age=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+"""
+Test simulation Module
+
+This module contains unit tests for the headless batch simulation in the
+simulation module.
+
+Classes
+-------
+TestSimulation
+    A test class for the simulation functions.
+
+Example usage
+-------------
+Run this script to test every method.
+
+"""
+
+import unittest
+from unittest.mock import patch
+import numpy as np
+from simulation import simulate, simulate_parallel, sample_lists, \
+    mean_tries
+from solver import expected_tries
+
+
+class TestSimulation(unittest.TestCase):
+    """
+    TestSimulation class for unit testing the simulation functions.
+
+    Methods
+    -------
+    test_sample_lists_unique()
+        Test that every drawn list holds distinct numbers in range.
+    test_sample_lists_full_range()
+        Test drawing lists as large as the range itself.
+    test_histogram_counts_every_game()
+        Test that every game ends up in the histogram.
+    test_seed_is_deterministic()
+        Test that the same seed gives the same histogram.
+    test_two_numbers()
+        Test the distribution of a game with only two numbers.
+    test_invalid_config()
+        Test that configurations that cannot be played are rejected.
+    test_parallel_matches_serial()
+        Test that the worker count does not change the result.
+    test_drops_shorten_games()
+        Test that dropping more numbers per miss makes games shorter.
+    test_drawn_first_round()
+        Test that long lists, whose first miss is drawn, match drawn lists.
+    test_wide_range()
+        Test that ranges too wide for numpy's sampler still simulate.
+    test_wide_negative_range()
+        Test a range whose bounds fit int32 but whose span does not.
+
+    """
+    def test_sample_lists_unique(self):
+        """
+        Test that every drawn list holds distinct numbers in range.
+        """
+        rng = np.random.default_rng(0)
+        lists = sample_lists(rng, 1000, 5, 30, 10)
+        self.assertEqual(lists.shape, (10, 1000))
+        self.assertTrue((lists >= 5).all() and (lists <= 30).all())
+        sorted_lists = np.sort(lists, axis=0)
+        self.assertTrue((np.diff(sorted_lists, axis=0) > 0).all())
+
+    def test_sample_lists_full_range(self):
+        """
+        Test drawing lists as large as the range itself.
+        """
+        rng = np.random.default_rng(0)
+        lists = sample_lists(rng, 50, 0, 9, 10)
+        expected = np.arange(10)[:, None].repeat(50, axis=1)
+        np.testing.assert_array_equal(np.sort(lists, axis=0), expected)
+
+    def test_histogram_counts_every_game(self):
+        """
+        Test that every game ends up in the histogram.
+        """
+        histogram = simulate(10_000, seed=1, chunk_size=3000)
+        self.assertEqual(histogram.sum(), 10_000)
+        self.assertEqual(histogram[0], 0)
+        self.assertEqual(histogram.size, 11)
+
+    def test_seed_is_deterministic(self):
+        """
+        Test that the same seed gives the same histogram.
+        """
+        np.testing.assert_array_equal(simulate(5000, seed=3),
+                                      simulate(5000, seed=3))
+
+    def test_two_numbers(self):
+        """
+        Test the distribution of a game with only two numbers.
+
+        Half of the games are won on the first try, the rest on the second.
+        """
+        histogram = simulate(100_000, seed=5, list_size=2)
+        self.assertAlmostEqual(histogram[1] / 100_000, 0.5, delta=0.01)
+        self.assertEqual(histogram[1] + histogram[2], 100_000)
+        self.assertAlmostEqual(mean_tries(histogram), 1.5, delta=0.01)
+
+    def test_invalid_config(self):
+        """
+        Test that configurations that cannot be played are rejected.
+        """
+        with self.assertRaises(ValueError):
+            simulate(10, low=0, high=5, list_size=10)
+        with self.assertRaises(ValueError):
+            simulate(10, window=0)
+
+
+    def test_parallel_matches_serial(self):
+        """
+        Test that the worker count does not change the result.
+        """
+        expected = simulate(20_000, seed=11, chunk_size=1000)
+        for workers in (1, 2, 3):
+            histogram = simulate_parallel(20_000, seed=11, workers=workers,
+                                          chunk_size=1000, chunks_per_task=3)
+            np.testing.assert_array_equal(histogram, expected)
+
+
+    def test_drops_shorten_games(self):
+        """
+        Test that dropping more numbers per miss makes games shorter.
+        """
+        config = {'low': 0, 'high': 300, 'list_size': 40, 'window': 60}
+        slow = mean_tries(simulate(50_000, seed=2, drops=0, **config))
+        fast = mean_tries(simulate(50_000, seed=2, drops=3, **config))
+        self.assertLess(fast, slow)
+
+    def test_drawn_first_round(self):
+        """
+        Test that long lists, whose first miss is drawn, match drawn lists.
+        """
+        config = {'low': 0, 'high': 300, 'list_size': 40, 'window': 30,
+                  'drops': (0, 1)}
+        drawn_lists = simulate(100_000, seed=4, **config)
+        with patch('simulation.LIST_LIMIT', 10):
+            drawn_counts = simulate(100_000, seed=4, **config)
+        self.assertAlmostEqual(mean_tries(drawn_lists),
+                               mean_tries(drawn_counts), delta=0.05)
+
+    def test_wide_range(self):
+        """
+        Test that ranges too wide for numpy's hypergeometric sampler match
+        the exact distribution.
+        """
+        config = {'low': 0, 'high': 300, 'list_size': 100, 'window': 30}
+        with patch('simulation.HYPERGEOMETRIC_LIMIT', 100):
+            histogram = simulate(50_000, seed=5, **config)
+        self.assertAlmostEqual(mean_tries(histogram),
+                               expected_tries(**config), delta=0.1)
+        histogram = simulate(1000, seed=5, high=10**12, list_size=100)
+        self.assertEqual(histogram.sum(), 1000)
+
+    def test_wide_negative_range(self):
+        """
+        Test a range whose bounds fit int32 but whose span does not.
+        """
+        low, high = -2_000_000_000, 2_000_000_000
+        lists = sample_lists(np.random.default_rng(1), 1000, low, high, 10)
+        self.assertTrue(((lists >= low) & (lists <= high)).all())
+        self.assertLess(lists.min(), 0)
+        self.assertEqual(simulate(10_000, 1, low, high, 10, 10).sum(),
+                         10_000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Test solver Module
+
+This module contains unit tests for the exact distribution of total tries
+in the solver module.
+
+Classes
+-------
+TestSolver
+    A test class for the solver functions.
+
+Example usage
+-------------
+Run this script to test every method.
+
+"""
+
+import unittest
+import numpy as np
+from solver import exact_distribution, expected_tries, compare
+from simulation import simulate
+
+
+class TestSolver(unittest.TestCase):
+    """
+    TestSolver class for unit testing the solver functions.
+
+    Methods
+    -------
+    test_by_hand()
+        Test configurations small enough to work out by hand.
+    test_sums_to_one()
+        Test that every distribution is a probability distribution.
+    test_large_config()
+        Test that long lists with wide windows neither overflow nor
+        underflow.
+    test_matches_simulation()
+        Test that simulated histograms converge to the exact distribution.
+    test_cached()
+        Test that a configuration is only solved once.
+    test_invalid_config()
+        Test that unplayable configurations are rejected.
+
+    """
+
+    def test_by_hand(self):
+        """Test configurations small enough to work out by hand."""
+        # One number: won on the first try.
+        np.testing.assert_allclose(exact_distribution(0, 5, 1, 1), [0, 1])
+        # Window 1 keeps only the lucky number after the first miss.
+        np.testing.assert_allclose(exact_distribution(0, 2, 3, 1),
+                                   [0, 1 / 3, 2 / 3, 0])
+        # A window covering the range keeps 2 decoys, a miss removes both.
+        np.testing.assert_allclose(exact_distribution(0, 100, 4, 1000),
+                                   [0, 1 / 4, 1 / 4, 1 / 2, 0])
+        self.assertAlmostEqual(expected_tries(0, 100, 4, 1000), 2.25)
+
+    def test_sums_to_one(self):
+        """Test that every distribution is a probability distribution."""
+        for config in ((0, 50, 8, 10, 2), (0, 1000, 20, 50, (0, 1)),
+                       (0, 100_000, 5000, 2000, 1), (-5, 5, 11, 3, 1)):
+            distribution = exact_distribution(*config)
+            self.assertEqual(distribution.size, config[2] + 1)
+            self.assertAlmostEqual(distribution.sum(), 1.0, places=9)
+            self.assertGreaterEqual(distribution.min(), 0.0)
+
+    def test_large_config(self):
+        """Test that long lists with wide windows neither overflow nor
+        underflow."""
+        for config in ((0, 3000, 1000, 1000), (0, 20000, 5000, 5000)):
+            distribution = exact_distribution(*config)
+            self.assertFalse(np.isnan(distribution).any())
+            self.assertAlmostEqual(distribution.sum(), 1.0)
+            self.assertTrue(np.isfinite(expected_tries(*config)))
+
+    def test_matches_simulation(self):
+        """Test that simulated histograms converge to the exact distribution."""
+        for config in ((0, 100, 10, 10, 1), (0, 10_000, 100, 500, 2)):
+            exact = exact_distribution(*config)
+            gap = compare(simulate(200_000, 3, *config), exact)
+            self.assertEqual(gap['games'], 200_000)
+            self.assertLess(gap['total_variation'], 0.01)
+            self.assertLess(abs(gap['mean_error']), 0.05)
+        counts = np.round(exact * 1e12)
+        self.assertLess(compare(counts, exact)['total_variation'], 1e-9)
+
+    def test_cached(self):
+        """Test that a configuration is only solved once."""
+        first = exact_distribution(10, 110, 10, 10)
+        self.assertIs(exact_distribution(0, 100, 10, 10), first)
+        with self.assertRaises(ValueError):
+            first[1] = 0.5
+
+    def test_invalid_config(self):
+        """Test that unplayable configurations are rejected."""
+        with self.assertRaises(ValueError):
+            exact_distribution(0, 5, 7, 1)
+        with self.assertRaises(ValueError):
+            exact_distribution(0, 5, 3, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
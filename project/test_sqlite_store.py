@@ -0,0 +1,268 @@
+"""
+Test sqlite_store Module
+
+This module contains unit tests for the SQLite results backend in the
+sqlite_store module.
+
+Classes
+-------
+TestSqliteResultStore
+    A test class for SqliteResultStore unit tests.
+
+Example usage
+-------------
+Run this script to test every method.
+
+"""
+
+import os
+import time
+import sqlite3
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from sqlite_store import SqliteResultStore, convert_csv, WEEK
+from number_game import NumberGame
+from gamer_module import MyGamer
+
+RECORD = {
+    'name': 'John Doe',
+    'birthday': '19950101',
+    'age': 28,
+    'lucky_number': 42,
+    'total_tries': 3
+}
+
+
+class TestSqliteResultStore(unittest.TestCase):
+    """
+    TestSqliteResultStore class for unit testing the SQLite backend.
+
+    Methods
+    -------
+    setUp()
+        Create a temporary directory for the database.
+    tearDown()
+        Close the store and remove the temporary directory.
+    test_schema()
+        Test that the database runs in WAL mode with its indexes.
+    test_read_page()
+        Test reading pages of results, newest first.
+    test_read_page_player()
+        Test reading pages of one player's results from the index.
+    test_batching()
+        Test that appends are committed in batches.
+    test_iter_records()
+        Test streaming every result, oldest first, block by block.
+    test_player_records()
+        Test reading every game of one player.
+    test_best_scores()
+        Test the best results overall and of the last week.
+    test_shared_connection()
+        Test that stores of one database share a connection.
+    test_threads()
+        Test appending from several threads at once.
+    test_fork()
+        Test that a child started with fork opens its own connection.
+    test_number_game()
+        Test saving and showing stats of a game through the store.
+    test_convert_csv()
+        Test converting a CSV save file, open stores keeping their fsync.
+    test_invalid()
+        Test that invalid settings are rejected.
+
+    """
+    def setUp(self):
+        """Create a temporary directory for the database."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'game_save.db')
+        self.store = SqliteResultStore(self.path)
+
+    def tearDown(self):
+        """Close the store and remove the temporary directory."""
+        self.store.close()
+        self.tmp_dir.cleanup()
+
+    def count_rows(self):
+        """Return the rows committed, as another connection sees them."""
+        connection = sqlite3.connect(self.path)
+        try:
+            return connection.execute(
+                'SELECT COUNT(*) FROM results').fetchone()[0]
+        finally:
+            connection.close()
+
+    def test_schema(self):
+        """Test that the database runs in WAL mode with its indexes."""
+        connection = sqlite3.connect(self.path)
+        try:
+            self.assertEqual(connection.execute(
+                'PRAGMA journal_mode').fetchone()[0], 'wal')
+            plan = connection.execute(
+                'EXPLAIN QUERY PLAN SELECT * FROM results WHERE name = ? '
+                'ORDER BY id DESC', ('x',)).fetchall()
+            self.assertIn('results_player', str(plan))
+            plan = connection.execute(
+                'EXPLAIN QUERY PLAN SELECT * FROM results '
+                'WHERE played_at >= ?', (0,)).fetchall()
+            self.assertIn('results_played_at', str(plan))
+        finally:
+            connection.close()
+
+    def test_read_page(self):
+        """Test reading pages of results, newest first."""
+        self.store.append_many([dict(RECORD, lucky_number=nr)
+                                for nr in range(5)])
+        page = self.store.read_page(0, 2)
+        self.assertEqual([record['lucky_number'] for record in page], [4, 3])
+        self.assertEqual(page[0], dict(RECORD, lucky_number=4))
+        self.assertEqual([record['lucky_number']
+                          for record in self.store.read_page(2, 2)], [0])
+        self.assertEqual(self.store.read_page(3, 2), [])
+
+    def test_read_page_player(self):
+        """Test reading pages of one player's results from the index."""
+        for nr in range(6):
+            self.store.append(dict(RECORD, lucky_number=nr,
+                                   name='Tyra Forsgren' if nr % 2
+                                   else 'John Doe'))
+        page = self.store.read_page(0, 2, player='Tyra Forsgren')
+        self.assertEqual([record['lucky_number'] for record in page], [5, 3])
+        self.assertEqual(self.store.read_page(0, 2, player='Nobody Here'), [])
+
+    def test_batching(self):
+        """Test that appends are committed in batches."""
+        store = SqliteResultStore(self.path, batch_size=3)
+        # Two 8 byte strings and four numbers.
+        self.assertEqual(store.append(RECORD), 48)
+        store.append(RECORD)
+        self.assertEqual(self.count_rows(), 0)
+        store.append(RECORD)
+        self.assertEqual(self.count_rows(), 3)
+        store.append(RECORD)
+        self.assertEqual(len(store.read_page(0, 10)), 4)
+        store.close()
+        self.assertEqual(self.count_rows(), 4)
+
+    def test_iter_records(self):
+        """Test streaming every result, oldest first, block by block."""
+        self.assertEqual(self.store.append_many(
+            [dict(RECORD, lucky_number=nr) for nr in range(10)]), 480)
+        with patch('sqlite_store.SCAN_BLOCK', 3):
+            records = list(self.store.iter_records())
+        self.assertEqual([record['lucky_number'] for record in records],
+                         list(range(10)))
+
+    def test_player_records(self):
+        """Test reading every game of one player."""
+        self.store.append_many([
+            dict(RECORD, lucky_number=1),
+            dict(RECORD, lucky_number=2, birthday='20000101'),
+            dict(RECORD, lucky_number=3),
+        ])
+        records = self.store.player_records('John Doe', '19950101')
+        self.assertEqual([record['lucky_number'] for record in records],
+                         [3, 1])
+        self.assertEqual(len(self.store.player_records(
+            'John Doe', '19950101', limit=1)), 1)
+
+    def test_best_scores(self):
+        """Test the best results overall and of the last week."""
+        now = time.time()
+        self.store.append_many([
+            dict(RECORD, total_tries=1, played_at=now - 2 * WEEK),
+            dict(RECORD, total_tries=4, lucky_number=1),
+            dict(RECORD, total_tries=2, lucky_number=2),
+            dict(RECORD, total_tries=2, lucky_number=3),
+        ])
+        best = self.store.best_scores(limit=2)
+        self.assertEqual([record['total_tries'] for record in best], [1, 2])
+        week = self.store.best_scores(since=now - WEEK)
+        self.assertEqual([(record['total_tries'], record['lucky_number'])
+                          for record in week], [(2, 2), (2, 3), (4, 1)])
+
+    def test_shared_connection(self):
+        """Test that stores of one database share a connection."""
+        other = SqliteResultStore(self.path)
+        self.assertIs(other._connection, self.store._connection)
+        other.append(RECORD)
+        other.close()
+        self.assertEqual(len(self.store.read_page()), 1)
+
+    def test_threads(self):
+        """Test appending from several threads at once."""
+        def save():
+            store = SqliteResultStore(self.path, batch_size=7)
+            for _ in range(100):
+                store.append(RECORD)
+            store.close()
+
+        threads = [threading.Thread(target=save) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.count_rows(), 400)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'needs fork')
+    def test_fork(self):
+        """Test that a child started with fork opens its own connection."""
+        store = SqliteResultStore(self.path, batch_size=10)
+        store.append(RECORD)
+        parent = store._connection
+        pid = os.fork()
+        if pid == 0:  # Child: the exit code tells the parent what it saw.
+            code = 1
+            try:
+                store.append_many([RECORD, RECORD])
+                if store._connection is not parent and \
+                        len(store.read_page(0, 10)) == 2:
+                    code = 0
+                store.close()
+            finally:
+                os._exit(code)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertIs(store._connection, parent)
+        store.close()
+        self.assertEqual(self.count_rows(), 3)
+
+    def test_number_game(self):
+        """Test saving and showing stats of a game through the store."""
+        game = NumberGame(MyGamer('John Doe', '19950101'), self.store)
+        game.tries = 2
+        game.save_to_csv()
+        with patch('builtins.print') as mock_print:
+            game.show_stats(player='John Doe')
+        self.assertIn('John Doe', mock_print.call_args[0][0])
+        self.assertEqual(self.store.read_page()[0]['total_tries'], 2)
+
+    def test_convert_csv(self):
+        """Test converting a CSV save file written with float columns,
+        without changing the durability of open stores."""
+        csv_path = os.path.join(self.tmp_dir.name, 'game_save.csv')
+        with open(csv_path, 'w', encoding='utf-8') as file:
+            file.write('name,birthday,age,lucky_number,total_tries\n'
+                       'Tyra Forsgren,20030717,20.0,78.0,2.0\n'
+                       'John Doe,19950101,28,42,3\n')
+        self.assertEqual(convert_csv(csv_path, self.path, batch_size=1), 2)
+        # The store's connection keeps synchronous=NORMAL.
+        self.assertEqual(self.store._connection.execute(
+            'PRAGMA synchronous').fetchone()[0], 1)
+        self.assertEqual(self.store.read_page(0, 1, 'Tyra Forsgren'), [{
+            'name': 'Tyra Forsgren', 'birthday': '20030717', 'age': 20,
+            'lucky_number': 78, 'total_tries': 2}])
+        self.assertEqual(self.store.best_scores(time.time() - WEEK), [])
+        self.assertEqual(len(self.store.best_scores()), 2)
+
+    def test_invalid(self):
+        """Test that invalid settings are rejected."""
+        with self.assertRaises(ValueError):
+            SqliteResultStore(self.path, fsync='sometimes')
+        with self.assertRaises(ValueError):
+            SqliteResultStore(self.path, batch_size=0)
+
+
+if __name__ == '__main__':
+    unittest.main()